@@ -0,0 +1,75 @@
+"""
+Benchmarks of the message bus hot paths, based on the demo's in memory fakes.
+
+Run from the root folder:
+    python -m benchmarks run --output baseline.json
+    python -m benchmarks run --output current.json
+    python -m benchmarks compare baseline.json current.json --threshold 0.1
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from benchmarks.cases import CASES, Params
+from benchmarks.runner import compare, run
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks and emit their results as JSON')
+    run_parser.add_argument('cases', nargs='*', help=f'any of: {", ".join(sorted(CASES))} (defaults to all)')
+    run_parser.add_argument('--output', '-o', help='a file to write the JSON results to, defaults to stdout')
+    run_parser.add_argument('--number', type=int, default=2000, help='operations per repeat')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--depth', type=int, default=Params.depth, help='levels of the event cascade')
+    run_parser.add_argument('--fan-out', type=int, default=Params.fan_out, help='events raised per cascade event')
+    run_parser.add_argument(
+        '--rollback-ratio', type=float, default=Params.rollback_ratio, help='ratio of the commands that roll back'
+    )
+
+    compare_parser = commands.add_parser('compare', help='compare two results files, failing on regressions')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=0.1, help='the tolerated slowdown ratio, defaults to 0.1 (10%%)'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == 'run':
+        unknown = set(args.cases) - set(CASES)
+        if unknown:
+            print(f'unknown cases: {", ".join(sorted(unknown))}', file=sys.stderr)
+            return 2
+        params = Params(depth=args.depth, fan_out=args.fan_out, rollback_ratio=args.rollback_ratio)
+        results = run(args.cases or sorted(CASES), params, args.number, args.repeat)
+        output = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output)
+        else:
+            print(output)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    comparison = compare(baseline, current, args.threshold)
+    for row in comparison:
+        status = 'REGRESSED' if row['regressed'] else 'ok'
+        print(
+            f'{row["name"]:<28}{row["baseline_ns_per_op"]:>14.1f}{row["ns_per_op"]:>14.1f} ns/op'
+            f'{row["ratio"]:>8.2f}x  {status}'
+        )
+    return 1 if any(row['regressed'] for row in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Microbenchmark of a bulk import of users by handle_commands, with the per-command handler versus the batch handler.
+
+Run from the root folder:
+    python -m benchmarks.bench_batch
+"""
+from __future__ import annotations
+
+import timeit
+from collections.abc import Callable
+
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+NUMBER = 20
+REPEAT = 5
+BATCH_SIZE = 5_000
+
+
+def _bench(label: str, statement: Callable[[], object], number: int = NUMBER) -> None:
+    seconds = min(timeit.repeat(statement, number=number, repeat=REPEAT))
+    print(f'{label:<45}{seconds / number / BATCH_SIZE * 1e9:>10.1f} ns/command')
+
+
+def _import_users(batch_handlers: bool) -> Callable[[], object]:
+    bootstrapper = DemoBootstrapper(batch_handlers)
+    for i in range(BATCH_SIZE):
+        bootstrapper.user_repository.users_by_id[str(i)] = User(f'user{i}@mail.com', str(i))
+    imports = [
+        [SaveUserCommand(str(i), f'user{i}@{domain}') for i in range(BATCH_SIZE)]
+        for domain in ('mail.com', 'other.com')
+    ]
+    # Alternates between importing the same emails (no changes) and changing all of them
+    turns = iter(range(1_000_000))
+    return lambda: bootstrapper.handle_commands(imports[next(turns) % 2])
+
+
+def main() -> None:
+    _bench(f'import {BATCH_SIZE} users, per command', _import_users(batch_handlers=False))
+    _bench(f'import {BATCH_SIZE} users, in batch', _import_users(batch_handlers=True))
+
+
+if __name__ == '__main__':
+    main()
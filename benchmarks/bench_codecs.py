@@ -0,0 +1,59 @@
+"""
+Microbenchmark of the compiled message codecs, versus converting the messages to & from dicts by hand.
+
+Run from the root folder:
+    python -m benchmarks.bench_codecs
+"""
+from __future__ import annotations
+
+import dataclasses
+import json
+import timeit
+from collections.abc import Callable
+
+from demo.adapters.message_codecs import MESSAGE_CODECS
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.save_user_command import SaveUserCommand
+
+NUMBER = 200_000
+REPEAT = 5
+
+
+def _bench(label: str, statement: Callable[[], object], number: int = NUMBER) -> None:
+    seconds = min(timeit.repeat(statement, number=number, repeat=REPEAT))
+    print(f'{label:<45}{seconds / number * 1e9:>10.1f} ns/op')
+
+
+def _encode_by_hand(event: EmailSetEvent) -> bytes:
+    """The encoding used before the codecs."""
+    return json.dumps(dataclasses.asdict(event)).encode()
+
+
+def _decode_by_hand(data: bytes) -> SaveUserCommand:
+    raw = json.loads(data)
+    return SaveUserCommand(user_id=raw['user_id'], email=raw['email'])
+
+
+def main() -> None:
+    event = EmailSetEvent(user_id='1', new_email='eli.cohen@mossad.gov.il', old_email='kamel.amin@thaabet.sy')
+    command = SaveUserCommand(user_id='1', email='eli.cohen@mossad.gov.il')
+    raw = MESSAGE_CODECS.to_dict(command)
+    json_data = MESSAGE_CODECS.encode_json(command)
+    binary_data = MESSAGE_CODECS.encode_binary(command)
+    codec = MESSAGE_CODECS.get(SaveUserCommand)
+    print(f'{"event size, by hand":<45}{len(_encode_by_hand(event)):>10} bytes')
+    print(f'{"event size, json":<45}{len(MESSAGE_CODECS.encode_json(event)):>10} bytes')
+    print(f'{"event size, binary":<45}{len(MESSAGE_CODECS.encode_binary(event)):>10} bytes')
+
+    _bench('encode event, by hand', lambda: _encode_by_hand(event))
+    _bench('encode event, json', lambda: MESSAGE_CODECS.encode_json(event))
+    _bench('encode event, binary', lambda: MESSAGE_CODECS.encode_binary(event))
+    _bench('decode command from dict, by hand', lambda: SaveUserCommand(user_id=raw['user_id'], email=raw['email']))
+    _bench('decode command from dict, compiled', lambda: codec.from_dict(raw))
+    _bench('decode command from json, by hand', lambda: _decode_by_hand(json_data))
+    _bench('decode command from json', lambda: MESSAGE_CODECS.decode_json(json_data))
+    _bench('decode command from binary', lambda: MESSAGE_CODECS.decode_binary(binary_data))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Microbenchmark of the event handlers lookup, before and after Bootstrapper.freeze().
+
+Run from the root folder:
+    python -m benchmarks.bench_dispatch
+"""
+from __future__ import annotations
+
+import collections
+import timeit
+
+import ddd
+from demo.adapters.clients.pubsub_client import InMemoryPubSubClient
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.domain.model import EmailChangedEvent
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+from demo.service_layer.event_handlers.email_set_event_handler import EmailSetEventHandler
+from demo.service_layer.event_handlers.kpi_event_handler import KpiEventHandler
+
+NUMBER = 200_000
+REPEAT = 5
+REGISTRATIONS = 200
+
+
+class _DefaultDictEventHandlersFactory:
+    """The lookup used before the dispatch tables could be frozen."""
+
+    def __init__(self, factory: ddd.EventHandlersFactory):
+        self._handler_factories = collections.defaultdict(list)
+        for event_name, providers in factory._handler_providers.items():
+            self._handler_factories[event_name].extend(providers)
+
+    def create_handlers(self, event_name: str) -> list:
+        factories = self._handler_factories[event_name]
+        result = []
+        for factory in factories:
+            handler = factory.acquire()
+            result.append(handler)
+        return result
+
+
+class _ScanningEventHandlersFactory:
+    """The per-event isinstance scan of the registrations, which type-based dispatch resolves once per class."""
+
+    def __init__(self, registrations: list):
+        self._registrations = registrations
+
+    def create_handlers(self, event: ddd.AbstractEvent) -> list:
+        name = event.name
+        return [
+            provider.acquire() for key, provider in self._registrations
+            if key == name or (isinstance(key, type) and isinstance(event, key))
+        ]
+
+
+def _bench(label: str, statement, number: int = NUMBER) -> None:
+    seconds = min(timeit.repeat(statement, number=number, repeat=REPEAT))
+    print(f'{label:<45}{seconds / number * 1e9:>10.1f} ns/op')
+
+
+def _dynamic_event_names():
+    i = 0
+    while True:
+        i += 1
+        yield f'DynamicEvent{i}'
+
+
+def main() -> None:
+    # Singleton handlers, so that only the lookup itself is measured
+    pubsub_client = InMemoryPubSubClient()
+    factory = ddd.EventHandlersFactory()
+    factory.register(EmailSetEvent().name, lambda: EmailSetEventHandler(pubsub_client), ddd.SINGLETON)
+    factory.register(EmailSetEvent().name, lambda: KpiEventHandler(pubsub_client), ddd.SINGLETON)
+    legacy = _DefaultDictEventHandlersFactory(factory)
+    frozen = ddd.EventHandlersFactory()
+    frozen.register(EmailSetEvent().name, lambda: EmailSetEventHandler(pubsub_client), ddd.SINGLETON)
+    frozen.register(EmailSetEvent().name, lambda: KpiEventHandler(pubsub_client), ddd.SINGLETON)
+    frozen.freeze()
+    event_name = EmailSetEvent().name
+
+    _bench('defaultdict lookup (registered)', lambda: legacy.create_handlers(event_name))
+    _bench('mutable table lookup (registered)', lambda: factory.create_handlers(event_name))
+    _bench('frozen table lookup (registered)', lambda: frozen.create_handlers(event_name))
+    names = _dynamic_event_names()
+    _bench('frozen table lookup (dynamic names)', lambda: frozen.create_handlers(next(names)))
+    print(f'{"  table entries after the run":<45}{len(frozen._handler_providers):>10}')
+    names = _dynamic_event_names()
+    _bench('defaultdict lookup (dynamic names)', lambda: legacy.create_handlers(next(names)))
+    print(f'{"  table entries after the run":<45}{len(legacy._handler_factories):>10}')
+    # Frees the table grown by the dynamic names
+    legacy._handler_factories.clear()
+
+    # Events dispatched by instance among many registrations, including a catch-all and a class subscriber
+    registrations = ddd.EventHandlersFactory()
+    for i in range(REGISTRATIONS):
+        registrations.register(f'OtherEvent{i}', lambda: KpiEventHandler(pubsub_client), ddd.SINGLETON)
+    registrations.register(ddd.AbstractEvent, lambda: KpiEventHandler(pubsub_client), ddd.SINGLETON)
+    registrations.register(EmailSetEvent, lambda: EmailSetEventHandler(pubsub_client), ddd.SINGLETON)
+    registrations.register(EmailChangedEvent, lambda: EmailSetEventHandler(pubsub_client), ddd.SINGLETON)
+    scanning = _ScanningEventHandlersFactory(list(registrations._registrations))
+    registrations.freeze()
+    # EmailSetEvent is named by a class attribute, EmailChangedEvent by a property
+    for event in (EmailSetEvent(), EmailChangedEvent()):
+        label = type(event).__name__
+        _bench(f'isinstance scan ({label})', lambda: scanning.create_handlers(event), number=NUMBER // 10)
+        _bench(f'frozen table lookup ({label})', lambda: registrations.create_handlers(event))
+
+    for freeze in (False, True):
+        bootstrapper = DemoBootstrapper()
+        if freeze:
+            bootstrapper.freeze()
+        bootstrapper.user_repository.users_by_id['1'] = User(email='kamel.amin@thaabet.sy', id_='1')
+        command = SaveUserCommand('1', 'eli.cohen@mossad.gov.il')
+        label = 'frozen' if freeze else 'not frozen'
+        _bench(f'handle_command ({label})', lambda: bootstrapper.handle_command(command), number=NUMBER // 10)
+
+
+if __name__ == '__main__':
+    main()
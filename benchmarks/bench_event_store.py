@@ -0,0 +1,110 @@
+"""
+Throughput of appending events to the FileEventStore and of loading them back, with and without snapshots.
+
+Run from the root folder:
+    python -m benchmarks.bench_event_store
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Callable
+
+import ddd
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.user import User
+
+EVENTS = 100_000
+STREAMS = 100
+REPEAT = 3
+
+
+def _apply(user: User, event: EmailSetEvent) -> None:
+    user._email = event.new_email
+
+
+def _events(stream: int, count: int) -> list[EmailSetEvent]:
+    user_id = str(stream)
+    return [
+        EmailSetEvent(user_id=user_id, new_email=f'{i}@mail.com', old_email=f'{i - 1}@mail.com') for i in range(count)
+    ]
+
+
+def _report(label: str, run: Callable[[], int], unit: str = 'events') -> None:
+    """Reports the best of REPEAT runs, each of which returns the number of units it handled."""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        count = run()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    print(f'{label:<50}{count / best:>14,.0f} {unit}/s')
+
+
+def _append(directory: str, batch_size: int, fsync: bool = False) -> Callable[[], int]:
+    batches = [_events(stream, batch_size) for stream in range(STREAMS)]
+
+    def run() -> int:
+        path = tempfile.mkdtemp(dir=directory)
+        store = ddd.FileEventStore(path, fsync=fsync)
+        events = 0
+        while events < (EVENTS // 10 if fsync else EVENTS):
+            for stream, batch in enumerate(batches):
+                store.append(str(stream), batch)
+                events += len(batch)
+        store.close()
+        shutil.rmtree(path)
+        return events
+
+    return run
+
+
+def _reopen(path: str) -> int:
+    store = ddd.FileEventStore(path)
+    events = sum(store.get_version(str(stream)) for stream in range(STREAMS))
+    store.close()
+    return events
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    try:
+        _report('append, 1 event per batch', _append(directory, 1))
+        _report('append, 100 events per batch', _append(directory, 100))
+        _report('append, 100 events per batch, fsync', _append(directory, 100, fsync=True))
+
+        path = os.path.join(directory, 'store')
+        store = ddd.FileEventStore(path)
+        for stream in range(STREAMS):
+            store.append(str(stream), _events(stream, EVENTS // STREAMS))
+        store.close()
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.endswith('.segment'))
+        print(f'{"segments size":<50}{size:>14,} bytes')
+
+        store = ddd.FileEventStore(path)
+        _report('load all streams', lambda: sum(len(store.load(str(stream))) for stream in range(STREAMS)))
+        _report('reopen, rebuilding the index', lambda: _reopen(path))
+
+        repository = ddd.EventSourcedRepository(store, lambda id_: User(id_=id_), _apply, snapshot_every=None)
+
+        def rehydrate() -> int:
+            return len([repository.get_by_id(str(stream)) for stream in range(STREAMS)])
+
+        _report('rehydrate without snapshots', rehydrate, unit='aggregates')
+        for stream in range(STREAMS):
+            user = User(id_=str(stream))
+            events = store.load(str(stream))[:-10]
+            for event in events:
+                _apply(user, event)
+            store.save_snapshot(str(stream), len(events), user)
+        # Only the 10 events after each snapshot are replayed
+        _report('rehydrate from snapshots', rehydrate, unit='aggregates')
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
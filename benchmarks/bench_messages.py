@@ -0,0 +1,90 @@
+"""
+Memory and speed of the events defined as plain dataclasses, versus as slotted ddd.Event subclasses.
+
+Run from the root folder:
+    python -m benchmarks.bench_messages
+"""
+from __future__ import annotations
+
+import dataclasses
+import timeit
+import tracemalloc
+from collections.abc import Callable
+
+import ddd
+
+NUMBER = 200_000
+REPEAT = 5
+EVENTS = 100_000
+
+
+@dataclasses.dataclass
+class DataclassKpiEvent(ddd.AbstractEvent):
+    """The events' style before ddd.Event."""
+
+    action: str | None = None
+    data: str | None = None
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+
+class SlottedKpiEvent(ddd.Event):
+    action: str | None = None
+    data: str | None = None
+
+
+class FrozenKpiEvent(ddd.Event, frozen=True):
+    action: str | None = None
+    data: str | None = None
+
+
+class _NoopEventHandler(ddd.AbstractEventHandler):
+    def handle(self, event: ddd.TEvent) -> None:
+        pass
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return []
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+def _bench(label: str, statement: Callable[[], object], number: int = NUMBER) -> None:
+    seconds = min(timeit.repeat(statement, number=number, repeat=REPEAT))
+    print(f'{label:<45}{seconds / number * 1e9:>10.1f} ns/op')
+
+
+def _bytes_per_event(event_type: type) -> float:
+    """The memory allocated per event, of a list holding EVENTS events (with distinct data strings)."""
+    data = [str(i) for i in range(EVENTS)]
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    events = [event_type('action', item) for item in data]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return (end - start) / EVENTS
+
+
+def main() -> None:
+    for event_type in (DataclassKpiEvent, SlottedKpiEvent, FrozenKpiEvent):
+        label = event_type.__name__
+        print(f'{label + " memory":<45}{_bytes_per_event(event_type):>10.1f} bytes/event')
+        _bench(f'{label} creation', lambda: event_type('action', 'data'))
+        event = event_type('action', 'data')
+        _bench(f'{label} name', lambda: event.name)
+
+        bootstrapper = ddd.Bootstrapper()
+        bootstrapper.register_event_handler_factory(event_type, _NoopEventHandler, ddd.SINGLETON)
+        events = [event]
+        _bench(f'{label} handle_events', lambda: bootstrapper.handle_events(events), number=NUMBER // 10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Microbenchmark of the compiled field validators, versus validating a command by hand.
+
+Run from the root folder:
+    python -m benchmarks.bench_validation
+"""
+from __future__ import annotations
+
+import re
+import timeit
+from collections.abc import Callable
+
+import ddd
+from demo.domain.command_model.save_user_command import SaveUserCommand
+
+NUMBER = 200_000
+REPEAT = 5
+BATCH_SIZE = 1_000
+
+_EMAIL = re.compile(r'[^@\s]+@[^@\s]+')
+
+
+def _bench(label: str, statement: Callable[[], object], number: int = NUMBER) -> None:
+    seconds = min(timeit.repeat(statement, number=number, repeat=REPEAT))
+    print(f'{label:<45}{seconds / number * 1e9:>10.1f} ns/op')
+
+
+def _validate_by_hand(command: SaveUserCommand) -> None:
+    """The validation of the command by its own validate(), as before the compiled validators."""
+    errors = []
+    if not command.user_id:
+        errors.append('Missing user_id')
+    elif len(command.user_id) > 64:
+        errors.append('Invalid user_id: longer than 64')
+    if not command.email:
+        errors.append('Missing email')
+    elif _EMAIL.fullmatch(command.email) is None or len(command.email) > 254:
+        errors.append('Invalid email')
+    if errors:
+        raise ddd.BoundedContextError(ddd.BAD_REQUEST, '; '.join(errors))
+
+
+def main() -> None:
+    command = SaveUserCommand(user_id='1', email='eli.cohen@mossad.gov.il')
+    commands = [SaveUserCommand(user_id=str(i), email=f'user{i}@mail.com') for i in range(BATCH_SIZE)]
+    batch_number = NUMBER // BATCH_SIZE
+
+    _bench('validate, by hand', lambda: _validate_by_hand(command))
+    _bench('validate, compiled', command.validate)
+    _bench(
+        f'validate {BATCH_SIZE} one by one, by hand',
+        lambda: [_validate_by_hand(command) for command in commands],
+        batch_number,
+    )
+    _bench(f'validate {BATCH_SIZE} one by one, compiled', lambda: [c.validate() for c in commands], batch_number)
+    _bench(f'validate {BATCH_SIZE} at once, compiled', lambda: ddd.validate_batch(commands), batch_number)
+
+
+if __name__ == '__main__':
+    main()
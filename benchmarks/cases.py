@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import atexit
+import dataclasses
+import itertools
+import os
+import shutil
+import tempfile
+from typing import Any, Awaitable, Callable, Union
+
+import ddd
+from ddd.unit_of_work import CommandUnitOfWork
+from demo.adapters.clients.pubsub_client import InMemoryPubSubClient
+from demo.adapters.repositories.sqlite_user_repository import SqliteConnectionPool, SqliteUserRepository
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+Operation = Union[Callable[[], Any], Callable[[], Awaitable[Any]]]
+
+
+@dataclasses.dataclass
+class Params:
+    depth: int = 3
+    fan_out: int = 2
+    rollback_ratio: float = 0.9
+
+
+@dataclasses.dataclass
+class Case:
+    name: str
+    setup: Callable[[Params], Operation]
+    is_async: bool = False
+
+
+CASES: dict[str, Case] = {}
+
+
+Setup = Callable[[Params], Operation]
+
+
+def case(name: str, is_async: bool = False) -> Callable[[Setup], Setup]:
+    def decorator(setup: Setup) -> Setup:
+        CASES[name] = Case(name, setup, is_async)
+        return setup
+
+    return decorator
+
+
+USER_ID = '1'
+OLD_EMAIL = 'kamel.amin@thaabet.sy'
+NEW_EMAIL = 'eli.cohen@mossad.gov.il'
+
+
+def _create_demo_bootstrapper() -> DemoBootstrapper:
+    bootstrapper = DemoBootstrapper()
+    bootstrapper.user_repository.users_by_id[USER_ID] = User(email=OLD_EMAIL, id_=USER_ID)
+    bootstrapper.async_user_repository.users_by_id[USER_ID] = User(email=OLD_EMAIL, id_=USER_ID)
+    return bootstrapper
+
+
+def _next_command() -> Callable[[], SaveUserCommand]:
+    """Alternates the email of the same demo user, whose events are pulled by each command."""
+    return itertools.cycle([SaveUserCommand(USER_ID, NEW_EMAIL), SaveUserCommand(USER_ID, OLD_EMAIL)]).__next__
+
+
+@case('publish')
+def _publish(params: Params) -> Operation:
+    bootstrapper = _create_demo_bootstrapper()
+    next_command = _next_command()
+    return lambda: bootstrapper.handle_command(next_command())
+
+
+@case('timed_publish')
+def _timed_publish(params: Params) -> Operation:
+    """The publish case, with every stage wrapped by the timing middleware."""
+    bootstrapper = _create_demo_bootstrapper()
+    bootstrapper.add_middleware(ddd.TimingMiddleware())
+    next_command = _next_command()
+    return lambda: bootstrapper.handle_command(next_command())
+
+
+@case('sampled_publish')
+def _sampled_publish(params: Params) -> Operation:
+    """The publish case, tracing 1% of the commands."""
+    bootstrapper = _create_demo_bootstrapper()
+    bootstrapper.set_tracer(ddd.Tracer(sample_rate=0.01))
+    next_command = _next_command()
+    return lambda: bootstrapper.handle_command(next_command())
+
+
+def _create_sqlite_bootstrapper(with_outbox: bool = False) -> DemoBootstrapper:
+    """A demo bootstrapper against a SQLite database file (removed at exit), optionally sharing it with an outbox."""
+    directory = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    pool = SqliteConnectionPool(os.path.join(directory, 'users.db'))
+    outbox = ddd.SqliteOutbox(pool.path, uri=pool.uri) if with_outbox else None
+    repository = SqliteUserRepository(pool, outbox)
+    repository.save(User(email=OLD_EMAIL, id_=USER_ID))
+    repository.commit()
+    bootstrapper = DemoBootstrapper()
+    bootstrapper.user_repository = repository
+    bootstrapper.use_outbox(outbox)
+    return bootstrapper
+
+
+@case('outbox_publish')
+def _outbox_publish(params: Params) -> Operation:
+    """The sqlite_publish case, appending the events to an outbox of the same database instead of handling them."""
+    bootstrapper = _create_sqlite_bootstrapper(with_outbox=True)
+    next_command = _next_command()
+    return lambda: bootstrapper.handle_command(next_command())
+
+
+@case('sqlite_publish')
+def _sqlite_publish(params: Params) -> Operation:
+    """The publish case, against a SQLite database file (removed at exit) instead of the in memory repository."""
+    bootstrapper = _create_sqlite_bootstrapper()
+    next_command = _next_command()
+    return lambda: bootstrapper.handle_command(next_command())
+
+
+@case('async_publish', is_async=True)
+def _async_publish(params: Params) -> Operation:
+    bootstrapper = _create_demo_bootstrapper()
+    next_command = _next_command()
+    return lambda: bootstrapper.async_handle_command(next_command())
+
+
+@dataclasses.dataclass
+class CascadeEvent(ddd.AbstractEvent):
+    depth: int = 0
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+
+class CascadeCommand(ddd.AbstractCommand):
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    def validate(self) -> None:
+        pass
+
+
+class _CascadeCommandHandler(ddd.AbstractCommandHandler[CascadeCommand, None]):
+    def __init__(self, pubsub_client: InMemoryPubSubClient):
+        super().__init__()
+        self._pubsub_client = pubsub_client
+
+    def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
+        return None
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return [CascadeEvent(depth=1)]
+
+    def commit(self) -> None:
+        self._pubsub_client.commit()
+
+    def rollback(self) -> None:
+        self._pubsub_client.rollback()
+
+
+class _CascadeEventHandler(ddd.AbstractEventHandler[CascadeEvent]):
+    def __init__(self, pubsub_client: InMemoryPubSubClient, max_depth: int, fan_out: int):
+        super().__init__()
+        self._pubsub_client = pubsub_client
+        self._max_depth = max_depth
+        self._fan_out = fan_out
+        self._events: list[ddd.AbstractEvent] = []
+
+    def handle(self, event: ddd.TEvent) -> None:
+        if event.depth < self._max_depth:
+            self._events.extend(CascadeEvent(depth=event.depth + 1) for _ in range(self._fan_out))
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return list(self._events)
+
+    def commit(self) -> None:
+        self._pubsub_client.commit()
+
+    def rollback(self) -> None:
+        self._pubsub_client.rollback()
+
+
+@case('event_cascade')
+def _event_cascade(params: Params) -> Operation:
+    """A single command whose event cascade is params.depth levels deep, each event raising params.fan_out events."""
+    pubsub_client = InMemoryPubSubClient()
+    bootstrapper = ddd.Bootstrapper()
+    bootstrapper.register_command_handler_factory(CascadeCommand, lambda: _CascadeCommandHandler(pubsub_client))
+    bootstrapper.register_event_handler_factory(
+        CascadeEvent, lambda: _CascadeEventHandler(pubsub_client, params.depth, params.fan_out)
+    )
+    command = CascadeCommand()
+    return lambda: bootstrapper.handle_command(command)
+
+
+@case('handler_factory')
+def _handler_factory(params: Params) -> Operation:
+    bootstrapper = _create_demo_bootstrapper()
+    factory = bootstrapper._command_handler_factory
+    command = SaveUserCommand(USER_ID, NEW_EMAIL)
+
+    def create_and_release_handler() -> None:
+        handler = factory.create_handler(command)
+        factory.release_handler(command, handler)
+
+    return create_and_release_handler
+
+
+@case('unit_of_work_commit')
+def _unit_of_work_commit(params: Params) -> Operation:
+    handler = _CascadeCommandHandler(InMemoryPubSubClient())
+    command = CascadeCommand()
+
+    def commit() -> None:
+        with CommandUnitOfWork(handler) as uow:
+            uow.handle(command)
+
+    return commit
+
+
+@case('unit_of_work_rollback')
+def _unit_of_work_rollback(params: Params) -> Operation:
+    handler = _CascadeCommandHandler(InMemoryPubSubClient())
+    error = ValueError()
+
+    def rollback() -> None:
+        try:
+            with CommandUnitOfWork(handler):
+                raise error
+        except ValueError:
+            pass
+
+    return rollback
+
+
+@case('rollback_heavy_publish')
+def _rollback_heavy_publish(params: Params) -> Operation:
+    """Publishes commands, params.rollback_ratio of which fail on a missing user and are rolled back."""
+    bootstrapper = _create_demo_bootstrapper()
+    failing = round(params.rollback_ratio * 100)
+    failing_command = SaveUserCommand('missing-user', NEW_EMAIL)
+    next_command = _next_command()
+    commands = itertools.cycle([True] * failing + [False] * (100 - failing))
+
+    def publish() -> None:
+        try:
+            bootstrapper.handle_command(failing_command if next(commands) else next_command())
+        except ddd.BoundedContextError:
+            pass
+
+    return publish
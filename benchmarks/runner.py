@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import platform
+import statistics
+import time
+from collections.abc import Iterable
+
+from benchmarks.cases import CASES, Case, Params
+
+
+def run_case(case: Case, params: Params, number: int, repeat: int) -> dict:
+    operation = case.setup(params)
+    if case.is_async:
+        timings = asyncio.run(_time_async(operation, number, repeat))
+    else:
+        timings = _time(operation, number, repeat)
+    ns_per_op = [timing / number for timing in timings]
+    median = statistics.median(ns_per_op)
+    return {
+        'ns_per_op': median,
+        'min_ns_per_op': min(ns_per_op),
+        'ops_per_sec': 1e9 / median,
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def _time(operation, number: int, repeat: int) -> list[int]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            operation()
+        timings.append(time.perf_counter_ns() - start)
+    return timings
+
+
+async def _time_async(operation, number: int, repeat: int) -> list[int]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            await operation()
+        timings.append(time.perf_counter_ns() - start)
+    return timings
+
+
+def run(names: Iterable[str], params: Params, number: int, repeat: int) -> dict:
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'params': vars(params),
+        },
+        'results': {name: run_case(CASES[name], params, number, repeat) for name in names},
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    """
+    Compares the best timings of the cases found in both runs, as they are the least affected by noise.
+    A case regressed when it is slower than its baseline by more than the threshold ratio.
+    """
+    comparison = []
+    for name, result in current['results'].items():
+        baseline_result = baseline['results'].get(name)
+        if baseline_result is None:
+            continue
+        ratio = result['min_ns_per_op'] / baseline_result['min_ns_per_op']
+        comparison.append({
+            'name': name,
+            'baseline_ns_per_op': baseline_result['min_ns_per_op'],
+            'ns_per_op': result['min_ns_per_op'],
+            'ratio': ratio,
+            'regressed': ratio > 1 + threshold,
+        })
+    return comparison
@@ -5,13 +5,21 @@ from collections.abc import AsyncIterator
 from collections.abc import Iterator
 
 import ddd
+from demo.adapters.message_codecs import MESSAGE_CODECS
+from demo.domain.command_model.email_set_event import EmailSetEvent
 from demo.domain.command_model.kpi_event import KpiEvent
 
+EMAIL_CHANGED_TOPIC = 'email-changed'
+KPI_TOPIC = 'kpi'
+
 
 class AbstractPubSubClient(ddd.RollbackCommitter, abc.ABC):
     def get_save_user_messages(self) -> Iterator[dict]:
         return self._get_save_user_messages()
 
+    def ack_save_user_messages(self, messages: list[dict]) -> None:
+        self._ack_save_user_messages(messages)
+
     def notify_email_changed(self, user_id: str, new_email: str, old_email: str) -> None:
         self._notify_email_changed(user_id, new_email, old_email)
 
@@ -22,6 +30,10 @@ class AbstractPubSubClient(ddd.RollbackCommitter, abc.ABC):
     def _get_save_user_messages(self) -> Iterator[dict]:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def _ack_save_user_messages(self, messages: list[dict]) -> None:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def _notify_kpi_service(self, event: KpiEvent) -> None:
         raise NotImplementedError
@@ -32,8 +44,11 @@ class AbstractPubSubClient(ddd.RollbackCommitter, abc.ABC):
 
 
 class AbstractAsyncPubSubClient(ddd.AsyncRollbackCommitter, abc.ABC):
-    async def get_save_user_messages(self) -> AsyncIterator[dict]:
-        return await self._get_save_user_messages()
+    def get_save_user_messages(self) -> AsyncIterator[dict]:
+        return self._get_save_user_messages()
+
+    async def ack_save_user_messages(self, messages: list[dict]) -> None:
+        await self._ack_save_user_messages(messages)
 
     async def notify_email_changed(self, user_id: str, new_email: str, old_email: str) -> None:
         await self._notify_email_changed(user_id, new_email, old_email)
@@ -42,7 +57,11 @@ class AbstractAsyncPubSubClient(ddd.AsyncRollbackCommitter, abc.ABC):
         await self._notify_kpi_service(event)
 
     @abc.abstractmethod
-    async def _get_save_user_messages(self) -> AsyncIterator[dict]:
+    def _get_save_user_messages(self) -> AsyncIterator[dict]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def _ack_save_user_messages(self, messages: list[dict]) -> None:
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -58,6 +77,7 @@ class InMemoryPubSubClient(AbstractPubSubClient):
     def __init__(self):
         super().__init__()
         self.commands: list[dict] = []
+        self.acked_commands: list[dict] = []
         self.commit_called = False
         self.commit_should_fail = False
         self.email_sent = False
@@ -76,6 +96,9 @@ class InMemoryPubSubClient(AbstractPubSubClient):
     def _get_save_user_messages(self) -> Iterator[dict]:
         yield from (command for command in self.commands)
 
+    def _ack_save_user_messages(self, messages: list[dict]) -> None:
+        self.acked_commands.extend(messages)
+
     def _notify_kpi_service(self, event: KpiEvent) -> None:
         self.notify_kpi_called = True
         self.kpi_event = event
@@ -108,6 +131,7 @@ class AsyncInMemoryPubSubClient(AbstractAsyncPubSubClient):
     def __init__(self):
         super().__init__()
         self.commands: list[dict] = []
+        self.acked_commands: list[dict] = []
         self.commit_called = False
         self.commit_should_fail = False
         self.email_sent = False
@@ -127,6 +151,9 @@ class AsyncInMemoryPubSubClient(AbstractAsyncPubSubClient):
         for command in self.commands:
             yield command
 
+    async def _ack_save_user_messages(self, messages: list[dict]) -> None:
+        self.acked_commands.extend(messages)
+
     async def _notify_kpi_service(self, event: KpiEvent) -> None:
         self.notify_kpi_called = True
         self.kpi_event = event
@@ -152,3 +179,65 @@ class AsyncInMemoryPubSubClient(AbstractAsyncPubSubClient):
         self.rollback_called = True
         if self.rollback_should_fail:
             raise Exception('rollback failed')
+
+
+class BufferedInMemoryPubSubClient(InMemoryPubSubClient):
+    """Publishes the notifications in batches on commit, by a ddd.BufferedPublisher, into published_batches."""
+
+    def __init__(self, max_count: int = 100, max_bytes: int = 1_000_000, max_linger: float = 0.0):
+        super().__init__()
+        self.published_batches: list[tuple[str, list[bytes]]] = []
+        self.publisher = ddd.BufferedPublisher(self._publish_batch, max_count, max_bytes, max_linger)
+        # The client is shared by the handlers of the sequentially handled events, and so is its stage
+        self._stage = self.publisher.stage()
+
+    def _notify_kpi_service(self, event: KpiEvent) -> None:
+        super()._notify_kpi_service(event)
+        self._stage.publish(KPI_TOPIC, MESSAGE_CODECS.encode_json(event))
+
+    def _notify_email_changed(self, user_id: str, new_email: str, old_email: str) -> None:
+        super()._notify_email_changed(user_id, new_email, old_email)
+        event = EmailSetEvent(user_id=user_id, new_email=new_email, old_email=old_email)
+        self._stage.publish(EMAIL_CHANGED_TOPIC, MESSAGE_CODECS.encode_json(event))
+
+    def _publish_batch(self, topic: str, batch: list[bytes]) -> None:
+        self.published_batches.append((topic, batch))
+
+    def commit(self) -> None:
+        super().commit()
+        self._stage.commit()
+
+    def rollback(self) -> None:
+        super().rollback()
+        self._stage.rollback()
+
+
+class AsyncBufferedInMemoryPubSubClient(AsyncInMemoryPubSubClient):
+    """Publishes the notifications in batches on commit, by a ddd.AsyncBufferedPublisher, into published_batches."""
+
+    def __init__(self, max_count: int = 100, max_bytes: int = 1_000_000, max_linger: float = 0.0):
+        super().__init__()
+        self.published_batches: list[tuple[str, list[bytes]]] = []
+        self.publisher = ddd.AsyncBufferedPublisher(self._publish_batch, max_count, max_bytes, max_linger)
+        # The client is shared by the handlers of the sequentially handled events, and so is its stage
+        self._stage = self.publisher.stage()
+
+    async def _notify_kpi_service(self, event: KpiEvent) -> None:
+        await super()._notify_kpi_service(event)
+        self._stage.publish(KPI_TOPIC, MESSAGE_CODECS.encode_json(event))
+
+    async def _notify_email_changed(self, user_id: str, new_email: str, old_email: str) -> None:
+        await super()._notify_email_changed(user_id, new_email, old_email)
+        event = EmailSetEvent(user_id=user_id, new_email=new_email, old_email=old_email)
+        self._stage.publish(EMAIL_CHANGED_TOPIC, MESSAGE_CODECS.encode_json(event))
+
+    async def _publish_batch(self, topic: str, batch: list[bytes]) -> None:
+        self.published_batches.append((topic, batch))
+
+    async def commit(self) -> None:
+        await super().commit()
+        await self._stage.commit()
+
+    async def rollback(self) -> None:
+        await super().rollback()
+        await self._stage.rollback()
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import ddd
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.kpi_event import KpiEvent
+from demo.domain.command_model.save_user_command import SaveUserCommand
+
+MESSAGE_CODECS = ddd.CodecRegistry()
+MESSAGE_CODECS.register(SaveUserCommand)
+MESSAGE_CODECS.register(EmailSetEvent)
+MESSAGE_CODECS.register(KpiEvent)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import queue
+import sqlite3
+from collections.abc import Iterable, Iterator
+
+import ddd
+from demo.adapters.repositories.user_repository import AbstractUserRepository, AbstractAsyncUserRepository
+from demo.domain.command_model.user import User
+
+# Each connection caches up to that many compiled statements by their SQL, so that the statements below are compiled
+# once per connection - including the selections of a few users, whose SQL varies by their count
+_CACHED_STATEMENTS = 256
+_CREATE_USERS = 'CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, email TEXT, version INTEGER NOT NULL)'
+_SELECT_USER = 'SELECT email, version FROM users WHERE id = ?'
+_SELECT_USERS = 'SELECT id, email, version FROM users WHERE id IN ({})'
+# The users are selected in chunks, within the limit of host parameters per statement (999 on older SQLite builds)
+_MAX_SELECTED_IDS = 500
+# Updates a user only if it is still at the version it was loaded at, i.e. the one preceding the saved version
+_UPSERT_USERS = (
+    'INSERT INTO users (id, email, version) VALUES (?, ?, ?) '
+    'ON CONFLICT (id) DO UPDATE SET email = excluded.email, version = excluded.version '
+    'WHERE users.version = excluded.version - 1'
+)
+
+_memory_databases = itertools.count()
+
+
+class SqliteConnectionPool:
+    def __init__(self, path: str = ':memory:', size: int = 4):
+        """
+        Opens size connections to the SQLite database at path, in WAL mode - to be shared by threads.
+        An in memory database is shared by the connections of the pool only.
+        """
+        if size < 1:
+            raise ValueError(f'size must be positive, got {size}')
+        uri = path == ':memory:'
+        if uri:
+            path = f'file:ddd-demo-{next(_memory_databases)}?mode=memory&cache=shared'
+        # The database (a URI, if uri is set), e.g. for a ddd.SqliteOutbox(pool.path, uri=pool.uri) sharing it
+        self.path = path
+        self.uri = uri
+        self._connections: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(size)
+        for _ in range(size):
+            connection = sqlite3.connect(
+                path, check_same_thread=False, isolation_level=None, cached_statements=_CACHED_STATEMENTS, uri=uri
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._connections.put(connection)
+        with self.connection() as connection:
+            connection.execute(_CREATE_USERS)
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a connection, waiting for one when all are borrowed."""
+        connection = self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get().close()
+
+
+def _select_user(pool: SqliteConnectionPool, id_: str) -> User:
+    with pool.connection() as connection:
+        row = connection.execute(_SELECT_USER, (id_,)).fetchone()
+    if row is None:
+        raise ddd.BoundedContextError(ddd.NOT_FOUND, f'User with ID "{id_}" does not exist')
+    return User(email=row[0], id_=id_, version=row[1])
+
+
+def _select_users(pool: SqliteConnectionPool, ids: Iterable[str]) -> dict[str, User]:
+    ids = list(set(ids))
+    if not ids:
+        return {}
+    rows = []
+    with pool.connection() as connection:
+        for i in range(0, len(ids), _MAX_SELECTED_IDS):
+            chunk = ids[i:i + _MAX_SELECTED_IDS]
+            rows.extend(connection.execute(_SELECT_USERS.format(', '.join('?' * len(chunk))), chunk).fetchall())
+    return {id_: User(email=email, id_=id_, version=version) for id_, email, version in rows}
+
+
+def _upsert_users(
+        pool: SqliteConnectionPool,
+        users: list[User],
+        outbox: ddd.SqliteOutbox | None = None,
+        events: list[ddd.AbstractEvent] | None = None,
+) -> None:
+    """
+    Upserts the users and appends the events to the outbox in a single transaction,
+    unless any of the users was updated since it was loaded - raising a ddd.ConflictError.
+    """
+    # A user saved more than once is upserted once, while other users of its ID at the same version conflict with it
+    users = list({id(user): user for user in users}.values())
+    rows = [(user.get_id(), user.email, user.get_version() + 1) for user in users]
+    with pool.connection() as connection:
+        connection.execute('BEGIN')
+        try:
+            if rows:
+                cursor = connection.executemany(_UPSERT_USERS, rows)
+                if cursor.rowcount != len(rows):
+                    raise ddd.ConflictError(f'{len(rows) - cursor.rowcount} of the users were changed concurrently')
+            if events:
+                outbox.insert(connection, events)
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+    for user in users:
+        user.set_version(user.get_version() + 1)
+
+
+def _check_outbox(outbox: ddd.SqliteOutbox | None) -> None:
+    if outbox is None:
+        raise ValueError('Events can be staged only on a repository of the outbox\'s database')
+
+
+class SqliteUserRepository(AbstractUserRepository, ddd.SavepointRollbackCommitter, ddd.OutboxWriter):
+    def __init__(self, pool: SqliteConnectionPool, outbox: ddd.SqliteOutbox | None = None):
+        """
+        Stages the saved users, and upserts them all on commit, in a single transaction.
+        Given the outbox of the same database, the staged events are appended to it within that transaction.
+        """
+        super().__init__()
+        self._pool = pool
+        self._outbox = outbox
+        self._staged_users: list[User] = []
+        self._staged_events: list[ddd.AbstractEvent] = []
+
+    def _get_by_id(self, id_: str) -> User:
+        return _select_user(self._pool, id_)
+
+    def _get_many(self, ids: Iterable[str]) -> dict[str, User]:
+        return _select_users(self._pool, ids)
+
+    def _save(self, user: User) -> None:
+        self._staged_users.append(user)
+
+    def stage_events(self, events: list[ddd.AbstractEvent]) -> None:
+        _check_outbox(self._outbox)
+        self._staged_events.extend(events)
+
+    def commit(self) -> None:
+        if self._staged_users or self._staged_events:
+            # Unstaged even if the transaction fails, as it is then rolled back
+            users, self._staged_users = self._staged_users, []
+            events, self._staged_events = self._staged_events, []
+            _upsert_users(self._pool, users, self._outbox, events)
+
+    def rollback(self) -> None:
+        self._staged_users.clear()
+        self._staged_events.clear()
+
+    def savepoint(self) -> tuple[int, int]:
+        return len(self._staged_users), len(self._staged_events)
+
+    def rollback_to_savepoint(self, savepoint: tuple[int, int]) -> None:
+        del self._staged_users[savepoint[0]:]
+        del self._staged_events[savepoint[1]:]
+
+
+class AsyncSqliteUserRepository(AbstractAsyncUserRepository, ddd.AsyncSavepointRollbackCommitter, ddd.OutboxWriter):
+    def __init__(self, pool: SqliteConnectionPool, outbox: ddd.SqliteOutbox | None = None):
+        """The async counterpart of SqliteUserRepository, querying the database on the event loop's executor."""
+        super().__init__()
+        self._pool = pool
+        self._outbox = outbox
+        self._staged_users: list[User] = []
+        self._staged_events: list[ddd.AbstractEvent] = []
+
+    async def _get_by_id(self, id_: str) -> User:
+        return await asyncio.get_running_loop().run_in_executor(None, _select_user, self._pool, id_)
+
+    async def _get_many(self, ids: Iterable[str]) -> dict[str, User]:
+        return await asyncio.get_running_loop().run_in_executor(None, _select_users, self._pool, list(ids))
+
+    async def _save(self, user: User) -> None:
+        self._staged_users.append(user)
+
+    def stage_events(self, events: list[ddd.AbstractEvent]) -> None:
+        _check_outbox(self._outbox)
+        self._staged_events.extend(events)
+
+    async def commit(self) -> None:
+        if self._staged_users or self._staged_events:
+            users, self._staged_users = self._staged_users, []
+            events, self._staged_events = self._staged_events, []
+            await asyncio.get_running_loop().run_in_executor(
+                None, _upsert_users, self._pool, users, self._outbox, events
+            )
+
+    async def rollback(self) -> None:
+        self._staged_users.clear()
+        self._staged_events.clear()
+
+    async def savepoint(self) -> tuple[int, int]:
+        return len(self._staged_users), len(self._staged_events)
+
+    async def rollback_to_savepoint(self, savepoint: tuple[int, int]) -> None:
+        del self._staged_users[savepoint[0]:]
+        del self._staged_events[savepoint[1]:]
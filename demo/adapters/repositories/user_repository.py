@@ -1,15 +1,35 @@
 from __future__ import annotations
 
 import abc
+from collections.abc import Iterable
 
 import ddd
 from demo.domain.command_model.user import User
 
 
+def _store_users(users_by_id: dict[str, User], users: list[User]) -> None:
+    """
+    Stores the users, unless any of them was replaced since it was loaded by a user of another version.
+    The stored users are the loaded ones, hence only replacements can be detected.
+    """
+    users = list({user.get_id(): user for user in users}.values())
+    for user in users:
+        stored = users_by_id.get(user.get_id())
+        if stored is not None and stored is not user and stored.get_version() != user.get_version():
+            raise ddd.ConflictError(f'User with ID "{user.get_id()}" was changed concurrently')
+    for user in users:
+        user.set_version(user.get_version() + 1)
+        users_by_id[user.get_id()] = user
+
+
 class AbstractUserRepository(ddd.RollbackCommitter, abc.ABC):
     def get_by_id(self, id_: str) -> User:
         return self._get_by_id(id_)
 
+    def get_many(self, ids: Iterable[str]) -> dict[str, User]:
+        """The found users by ID."""
+        return self._get_many(ids)
+
     def save(self, user: User) -> None:
         self._save(user)
 
@@ -17,14 +37,33 @@ class AbstractUserRepository(ddd.RollbackCommitter, abc.ABC):
     def _get_by_id(self, id_: str) -> User:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def _get_many(self, ids: Iterable[str]) -> dict[str, User]:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def _save(self, user: User) -> None:
         raise NotImplementedError
 
 
 class AbstractAsyncUserRepository(ddd.AsyncRollbackCommitter, abc.ABC):
+    _loader: ddd.AsyncBatchLoader[str, User] | None = None
+
+    def enable_batch_loading(self, max_batch_size: int | None = None) -> None:
+        """Coalesces the get_by_id calls of concurrent handlers into get_many calls."""
+        self._loader = ddd.AsyncBatchLoader(self._get_many, max_batch_size)
+
     async def get_by_id(self, id_: str) -> User:
-        return await self._get_by_id(id_)
+        if self._loader is None:
+            return await self._get_by_id(id_)
+        user = await self._loader.load(id_)
+        if user is None:
+            raise ddd.BoundedContextError(ddd.NOT_FOUND, f'User with ID "{id_}" does not exist')
+        return user
+
+    async def get_many(self, ids: Iterable[str]) -> dict[str, User]:
+        """The found users by ID."""
+        return await self._get_many(ids)
 
     async def save(self, user: User) -> None:
         await self._save(user)
@@ -33,17 +72,22 @@ class AbstractAsyncUserRepository(ddd.AsyncRollbackCommitter, abc.ABC):
     async def _get_by_id(self, id_: str) -> User:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def _get_many(self, ids: Iterable[str]) -> dict[str, User]:
+        raise NotImplementedError
+
     @abc.abstractmethod
     async def _save(self, user: User) -> None:
         raise NotImplementedError
 
 
-class InMemoryUserRepository(AbstractUserRepository):
+class InMemoryUserRepository(AbstractUserRepository, ddd.SavepointRollbackCommitter):
     def __init__(self):
         super().__init__()
         self.users_by_id: dict[str, User] = {}
         self._saved_users: list[User] = []
         self.commit_called = False
+        self.commit_count = 0
         self.rollback_called = False
         self.commit_should_fail = False
         self.rollback_should_fail = False
@@ -54,15 +98,19 @@ class InMemoryUserRepository(AbstractUserRepository):
             raise ddd.BoundedContextError(ddd.NOT_FOUND, f'User with ID "{id_}" does not exist')
         return result
 
+    def _get_many(self, ids: Iterable[str]) -> dict[str, User]:
+        return {id_: self.users_by_id[id_] for id_ in ids if id_ in self.users_by_id}
+
     def _save(self, user: User) -> None:
         self._saved_users.append(user)
 
     def commit(self) -> None:
         self.commit_called = True
+        self.commit_count += 1
         if self.commit_should_fail:
             raise Exception('commit failed')
-        for user in self._saved_users:
-            self.users_by_id[user.get_id()] = user
+        _store_users(self.users_by_id, self._saved_users)
+        self._saved_users.clear()
 
     def rollback(self) -> None:
         self.rollback_called = True
@@ -70,13 +118,21 @@ class InMemoryUserRepository(AbstractUserRepository):
             raise Exception('rollback failed')
         self._saved_users.clear()
 
+    def savepoint(self) -> int:
+        return len(self._saved_users)
+
+    def rollback_to_savepoint(self, savepoint: int) -> None:
+        del self._saved_users[savepoint:]
 
-class AsyncInMemoryUserRepository(AbstractAsyncUserRepository):
+
+class AsyncInMemoryUserRepository(AbstractAsyncUserRepository, ddd.AsyncSavepointRollbackCommitter):
     def __init__(self):
         super().__init__()
         self.users_by_id: dict[str, User] = {}
         self._saved_users: list[User] = []
+        self.get_many_calls: list[list[str]] = []
         self.commit_called = False
+        self.commit_count = 0
         self.rollback_called = False
         self.commit_should_fail = False
         self.rollback_should_fail = False
@@ -87,18 +143,30 @@ class AsyncInMemoryUserRepository(AbstractAsyncUserRepository):
             raise ddd.BoundedContextError(ddd.NOT_FOUND, f'User with ID "{id_}" does not exist')
         return result
 
+    async def _get_many(self, ids: Iterable[str]) -> dict[str, User]:
+        ids = list(ids)
+        self.get_many_calls.append(ids)
+        return {id_: self.users_by_id[id_] for id_ in ids if id_ in self.users_by_id}
+
     async def _save(self, user: User) -> None:
         self._saved_users.append(user)
 
     async def commit(self) -> None:
         self.commit_called = True
+        self.commit_count += 1
         if self.commit_should_fail:
             raise Exception('commit failed')
-        for user in self._saved_users:
-            self.users_by_id[user.get_id()] = user
+        _store_users(self.users_by_id, self._saved_users)
+        self._saved_users.clear()
 
     async def rollback(self) -> None:
         self.rollback_called = True
         if self.rollback_should_fail:
             raise Exception('rollback failed')
         self._saved_users.clear()
+
+    async def savepoint(self) -> int:
+        return len(self._saved_users)
+
+    async def rollback_to_savepoint(self, savepoint: int) -> None:
+        del self._saved_users[savepoint:]
@@ -5,8 +5,8 @@ from demo.domain.command_model.email_set_event import EmailSetEvent
 
 
 class User(ddd.AbstractEntity):
-    def __init__(self, email: str | None = None, id_: str | None = None):
-        super().__init__()
+    def __init__(self, email: str | None = None, id_: str | None = None, version: int = 0):
+        super().__init__(version)
         self._id = id_
         self._email = email
 
@@ -7,7 +7,7 @@ from demo.domain.command_model.email_set_event import EmailSetEvent
 from demo.domain.command_model.kpi_event import KpiEvent
 from demo.domain.command_model.save_user_command import SaveUserCommand
 from demo.service_layer.command_handlers.save_user_command_handler import SaveUserCommandHandler, \
-    AsyncChangeEmailCommandHandler
+    AsyncChangeEmailCommandHandler, BatchSaveUserCommandHandler, AsyncBatchSaveUserCommandHandler
 from demo.service_layer.event_handlers.email_set_event_handler import EmailSetEventHandler, \
     AsyncEmailSetEventHandler
 from demo.service_layer.event_handlers.kpi_event_handler import KpiEventHandler, \
@@ -15,8 +15,10 @@ from demo.service_layer.event_handlers.kpi_event_handler import KpiEventHandler,
 
 
 class DemoBootstrapper(ddd.Bootstrapper):
-    def __init__(self):
+    def __init__(self, batch_handlers: bool = False):
+        """With batch_handlers, batches of SaveUserCommands (see handle_commands) are saved at once."""
         super().__init__()
+        self._batch_handlers = batch_handlers
         self.user_repository = InMemoryUserRepository()
         self.pubsub_client = InMemoryPubSubClient()
         self.async_user_repository = AsyncInMemoryUserRepository()
@@ -39,6 +41,8 @@ class DemoBootstrapper(ddd.Bootstrapper):
         Made public for the framework's unit test.
         In realworld usage, this method should best be private.
         """
+        if self._batch_handlers:
+            return BatchSaveUserCommandHandler(self.user_repository)
         return SaveUserCommandHandler(self.user_repository)
 
     def create_email_changed_event_handler(self) -> ddd.AbstractEventHandler:
@@ -60,6 +64,8 @@ class DemoBootstrapper(ddd.Bootstrapper):
         Made public for the framework's unit test.
         In realworld usage, this method should best be private.
         """
+        if self._batch_handlers:
+            return AsyncBatchSaveUserCommandHandler(self.async_user_repository)
         return AsyncChangeEmailCommandHandler(self.async_user_repository)
 
     def create_async_email_changed_event_handler(self) -> ddd.AbstractAsyncEventHandler:
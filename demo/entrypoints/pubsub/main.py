@@ -1,19 +1,29 @@
 import asyncio
 
+import ddd
+from demo.adapters.message_codecs import MESSAGE_CODECS
 from demo.domain.command_model.save_user_command import SaveUserCommand
 from demo.domain.command_model.user import User
 from demo.entrypoints.bootstrapper import DemoBootstrapper
 
 
+def create_decoder() -> ddd.CommandDecoder:
+    decoder = ddd.CommandDecoder()
+    decoder.register(SaveUserCommand.name, MESSAGE_CODECS.get(SaveUserCommand).from_dict)
+    return decoder
+
+
 def main():
     # Setup demo bootstrap with fake in memory data
     bootstrapper = DemoBootstrapper()
     bootstrapper.async_user_repository.users_by_id['1'] = User(email='kamel.amin@thaabet.sy', id_='1')
 
     # Imagine you just received a ChangeEmail message from pubsub
-    command = SaveUserCommand(user_id='1', email='eli.cohen@mossad.gov.il')
+    pubsub_client = bootstrapper.async_pubsub_client
+    pubsub_client.commands.append({'type': 'SaveUserCommand', 'user_id': '1', 'email': 'eli.cohen@mossad.gov.il'})
 
-    asyncio.run(bootstrapper.async_handle_command(command))
+    consumer = ddd.AsyncConsumer(bootstrapper, create_decoder())
+    asyncio.run(consumer.run(pubsub_client.get_save_user_messages(), pubsub_client.ack_save_user_messages))
 
 
 if __name__ == '__main__':
@@ -14,13 +14,24 @@ class ChangeEmailCommandHandler(ddd.AbstractCommandHandler[ChangeEmailCommand, s
     def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
         user = self._user_repository.get_by_id(command.user_id)
         user.set_email(command.new_email)
-        self._events.extend(user.events)
+        self._events.extend(user.pull_events())
         return user.get_id()
 
     @property
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.RollbackCommitter]:
+        return [self._user_repository]
+
     def commit(self) -> None:
         self._user_repository.commit()
 
@@ -37,13 +48,24 @@ class AsyncChangeEmailCommandHandler(ddd.AbstractAsyncCommandHandler[ChangeEmail
     async def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
         user = await self._user_repository.get_by_id(command.user_id)
         user.set_email(command.new_email)
-        self._events.extend(user.events)
+        self._events.extend(user.pull_events())
         return user.get_id()
 
     @property
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.AsyncRollbackCommitter]:
+        return [self._user_repository]
+
     async def commit(self) -> None:
         await self._user_repository.commit()
 
@@ -1,8 +1,24 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+
 import ddd
 from demo.adapters.repositories.user_repository import AbstractUserRepository, AbstractAsyncUserRepository
 from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+
+
+def _user_not_found(user_id: str) -> ddd.BoundedContextError:
+    return ddd.BoundedContextError(ddd.NOT_FOUND, f'User with ID "{user_id}" does not exist')
+
+
+def _changed_emails(batch: ddd.CommandBatch[SaveUserCommand], users: list[User | None]) -> Iterable[int]:
+    """The indices of the commands that may change the email of their user."""
+    user_ids = batch.column('user_id')
+    if len(set(user_ids)) < len(user_ids):
+        # The later commands of a user would be compared to its email before the earlier ones changed it
+        return range(len(batch))
+    return batch.changed('email', [None if user is None else user.email for user in users])
 
 
 class SaveUserCommandHandler(ddd.AbstractCommandHandler[SaveUserCommand, str]):
@@ -14,13 +30,25 @@ class SaveUserCommandHandler(ddd.AbstractCommandHandler[SaveUserCommand, str]):
     def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
         user = self._user_repository.get_by_id(command.user_id)
         user.set_email(command.email)
-        self._events.extend(user.events)
+        self._user_repository.save(user)
+        self._events.extend(user.pull_events())
         return user.get_id()
 
     @property
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.RollbackCommitter]:
+        return [self._user_repository]
+
     def commit(self) -> None:
         self._user_repository.commit()
 
@@ -37,15 +65,61 @@ class AsyncChangeEmailCommandHandler(ddd.AbstractAsyncCommandHandler[SaveUserCom
     async def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
         user = await self._user_repository.get_by_id(command.user_id)
         user.set_email(command.email)
-        self._events.extend(user.events)
+        await self._user_repository.save(user)
+        self._events.extend(user.pull_events())
         return user.get_id()
 
     @property
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.AsyncRollbackCommitter]:
+        return [self._user_repository]
+
     async def commit(self) -> None:
         await self._user_repository.commit()
 
     async def rollback(self) -> None:
         await self._user_repository.rollback()
+
+
+class BatchSaveUserCommandHandler(SaveUserCommandHandler, ddd.AbstractBatchCommandHandler[SaveUserCommand, str]):
+    """Saves the users of a batch of commands (e.g. of a bulk import) by a single load of all of them."""
+
+    def handle_batch(self, batch: ddd.CommandBatch[SaveUserCommand]) -> list[str | Exception]:
+        user_ids = batch.column('user_id')
+        users_by_id = self._user_repository.get_many(user_ids)
+        users = [users_by_id.get(user_id) for user_id in user_ids]
+        for i in _changed_emails(batch, users):
+            user = users[i]
+            if user is not None:
+                user.set_email(batch.commands[i].email)
+                self._user_repository.save(user)
+                self._events.extend(user.pull_events())
+        return [user_id if user is not None else _user_not_found(user_id) for user_id, user in zip(user_ids, users)]
+
+
+class AsyncBatchSaveUserCommandHandler(
+    AsyncChangeEmailCommandHandler, ddd.AbstractAsyncBatchCommandHandler[SaveUserCommand, str]
+):
+    """The async counterpart of BatchSaveUserCommandHandler."""
+
+    async def handle_batch(self, batch: ddd.CommandBatch[SaveUserCommand]) -> list[str | Exception]:
+        user_ids = batch.column('user_id')
+        users_by_id = await self._user_repository.get_many(user_ids)
+        users = [users_by_id.get(user_id) for user_id in user_ids]
+        for i in _changed_emails(batch, users):
+            user = users[i]
+            if user is not None:
+                user.set_email(batch.commands[i].email)
+                await self._user_repository.save(user)
+                self._events.extend(user.pull_events())
+        return [user_id if user is not None else _user_not_found(user_id) for user_id, user in zip(user_ids, users)]
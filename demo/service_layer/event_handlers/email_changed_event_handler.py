@@ -21,6 +21,17 @@ class EmailChangedEventHandler(ddd.AbstractEventHandler[EmailChangedEvent]):
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.RollbackCommitter]:
+        return [self._email_client]
+
     def commit(self) -> None:
         self._email_client.commit()
 
@@ -44,6 +55,17 @@ class AsyncEmailChangedEventHandler(ddd.AbstractAsyncEventHandler[EmailChangedEv
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.AsyncRollbackCommitter]:
+        return [self._email_client]
+
     async def commit(self) -> None:
         await self._email_client.commit()
 
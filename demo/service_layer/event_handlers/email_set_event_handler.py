@@ -22,6 +22,17 @@ class EmailSetEventHandler(ddd.AbstractEventHandler[EmailSetEvent]):
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.RollbackCommitter]:
+        return [self._email_client]
+
     def commit(self) -> None:
         self._email_client.commit()
 
@@ -45,6 +56,17 @@ class AsyncEmailSetEventHandler(ddd.AbstractAsyncEventHandler[EmailSetEvent]):
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.AsyncRollbackCommitter]:
+        return [self._email_client]
+
     async def commit(self) -> None:
         await self._email_client.commit()
 
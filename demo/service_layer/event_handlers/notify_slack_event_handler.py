@@ -18,6 +18,17 @@ class NotifySlackEventHandler(ddd.AbstractEventHandler[NotifySlackEvent]):
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.RollbackCommitter]:
+        return [self._email_client]
+
     def commit(self) -> None:
         self._email_client.commit()
 
@@ -38,6 +49,17 @@ class AsyncNotifySlackEventHandler(ddd.AbstractAsyncEventHandler[NotifySlackEven
     def events(self) -> list[ddd.AbstractEvent]:
         return list(self._events)
 
+    def pull_events(self) -> list[ddd.AbstractEvent]:
+        events, self._events = self._events, []
+        return events
+
+    def reset(self) -> None:
+        self._events.clear()
+
+    @property
+    def resources(self) -> list[ddd.AsyncRollbackCommitter]:
+        return [self._email_client]
+
     async def commit(self) -> None:
         await self._email_client.commit()
 
@@ -1,5 +1,20 @@
+from ddd.batch import *
 from ddd.bootstrapper import *
+from ddd.cache import *
+from ddd.codec import *
+from ddd.consumer import *
 from ddd.error import *
+from ddd.event_store import *
 from ddd.handlers import *
+from ddd.loader import *
+from ddd.middleware import *
 from ddd.model import *
+from ddd.outbox import *
+from ddd.publisher import *
 from ddd.repository import *
+from ddd.retry import *
+from ddd.scheduler import *
+from ddd.scopes import *
+from ddd.sharding import *
+from ddd.tracing import *
+from ddd.validation import *
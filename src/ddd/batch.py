@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import operator
+from collections.abc import Iterator, Sequence
+from typing import Any, Generic, TypeVar
+
+from ddd.model import AbstractCommand
+
+try:
+    import numpy as _numpy
+except ImportError:  # NumPy is optional: the columns are handed over as lists without it
+    _numpy = None
+
+TBatchCommand = TypeVar('TBatchCommand', bound=AbstractCommand)
+# The types of the values of numeric arrays
+_NUMBERS = {bool, int, float}
+
+
+def _array(values: Sequence) -> Any:
+    """
+    A one dimensional array of the values: of a native dtype (i.e. of fixed width strings, or of numbers) if they are
+    all strings or all numbers, so that NumPy operates on them without calling Python - or else of objects.
+    """
+    types = set(map(type, values))
+    if types and (types <= {str} or types <= _NUMBERS):
+        try:
+            array = _numpy.asarray(values)
+        except OverflowError:  # e.g. of integers beyond 64 bits
+            pass
+        else:
+            if array.dtype != object:
+                return array
+    return _numpy.fromiter(values, dtype=object, count=len(values))
+
+
+class CommandBatch(Generic[TBatchCommand]):
+    def __init__(self, commands: Sequence[TBatchCommand]):
+        """
+        Commands of the same type, handed over at once to an AbstractBatchCommandHandler,
+        along with the columns of their fields - each computed once.
+        """
+        if not commands:
+            raise ValueError('A command batch must not be empty')
+        self.commands = commands
+        self._columns: dict[str, list] = {}
+
+    @property
+    def name(self) -> str:
+        """The name of the commands, so that the middlewares and the tracer report the batch under it."""
+        return self.commands[0].name
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def __iter__(self) -> Iterator[TBatchCommand]:
+        return iter(self.commands)
+
+    def column(self, field: str) -> list:
+        """The values of the field of the commands, in their order."""
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = list(map(operator.attrgetter(field), self.commands))
+        return column
+
+    def array(self, field: str) -> Any:
+        """
+        The column of the field as a NumPy array if NumPy is installed - of a native dtype if its values are all
+        strings or all numbers, or of objects otherwise - or as a list if not.
+        """
+        column = self.column(field)
+        return column if _numpy is None else _array(column)
+
+    def changed(self, field: str, current: Sequence) -> list[int]:
+        """
+        The indices of the commands whose field differs from the current value at the same index
+        (e.g. of the loaded entities). Compared as lists, as converting them into NumPy arrays costs more than that.
+        """
+        column = self.column(field)
+        if len(current) != len(column):
+            raise ValueError(f'Expected {len(column)} current values, got {len(current)}')
+        return [i for i, (value, current_value) in enumerate(zip(column, current)) if value != current_value]
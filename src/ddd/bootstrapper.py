@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import concurrent.futures
 import inspect
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from typing import Any, Type
 
 from ddd.factories import CommandHandlerFactory, EventHandlersFactory, CreateCommandHandler, CreateEventHandler, \
-    AsyncCommandHandlerFactory, AsyncEventHandlersFactory
+    AsyncCommandHandlerFactory, AsyncEventHandlersFactory, CommandKey, EventKey
 from ddd.handlers import CreateAsyncCommandHandler, CreateAsyncEventHandler, AbstractCommandHandler, \
     AbstractEventHandler, AbstractAsyncCommandHandler, AbstractAsyncEventHandler
-from ddd.message_bus import MessageBus, AsyncMessageBus
-from ddd.model import AbstractCommand
+from ddd.message_bus import MessageBus, AsyncMessageBus, CommandResult
+from ddd.middleware import Middleware, AsyncMiddleware, compile_middlewares, compile_async_middlewares
+from ddd.model import AbstractCommand, AbstractEvent
+from ddd.outbox import AbstractOutbox
+from ddd.retry import RetryPolicy
+from ddd.scopes import HandlerScope, TRANSIENT
+from ddd.tracing import Tracer
 
 
 class Bootstrapper:
@@ -18,33 +24,170 @@ class Bootstrapper:
         self._async_command_handler_factory = AsyncCommandHandlerFactory()
         self._event_handlers_factory = EventHandlersFactory()
         self._async_event_handlers_factory = AsyncEventHandlersFactory()
+        self._bus_options: dict[str, Any] = {}
+        self._async_bus_options: dict[str, Any] = {}
+        self._middlewares: list[Middleware] = []
+        self._async_middlewares: list[AsyncMiddleware] = []
 
-    def register_command_handler_factory(self, command_name: str, factory: CreateCommandHandler) -> None:
+    def register_command_handler_factory(
+            self, command_name: CommandKey, factory: CreateCommandHandler, scope: HandlerScope = TRANSIENT
+    ) -> None:
         self._validate_type_returned_by(factory, AbstractCommandHandler)
-        self._command_handler_factory.register(command_name, factory)
+        self._command_handler_factory.register(command_name, factory, scope)
 
-    def register_event_handler_factory(self, event_name: str, factory: CreateEventHandler) -> None:
+    def register_event_handler_factory(
+            self, event_name: EventKey, factory: CreateEventHandler, scope: HandlerScope = TRANSIENT
+    ) -> None:
         self._validate_type_returned_by(factory, AbstractEventHandler)
-        self._event_handlers_factory.register(event_name, factory)
+        self._event_handlers_factory.register(event_name, factory, scope)
 
-    def register_async_command_handler_factory(self, command_name: str, factory: CreateAsyncCommandHandler) -> None:
+    def register_async_command_handler_factory(
+            self, command_name: CommandKey, factory: CreateAsyncCommandHandler, scope: HandlerScope = TRANSIENT
+    ) -> None:
         self._validate_type_returned_by(factory, AbstractAsyncCommandHandler)
-        self._async_command_handler_factory.register(command_name, factory)
+        self._async_command_handler_factory.register(command_name, factory, scope)
 
-    def register_async_event_handler_factory(self, event_name: str, factory: CreateAsyncEventHandler) -> None:
+    def register_async_event_handler_factory(
+            self, event_name: EventKey, factory: CreateAsyncEventHandler, scope: HandlerScope = TRANSIENT
+    ) -> None:
         self._validate_type_returned_by(factory, AbstractAsyncEventHandler)
-        self._async_event_handlers_factory.register(event_name, factory)
+        self._async_event_handlers_factory.register(event_name, factory, scope)
+
+    def freeze(self) -> None:
+        """
+        Compiles the registered handler factories into read-only dispatch tables.
+        Should be called once all the handler factories are registered, as any further registration is rejected.
+        """
+        self._command_handler_factory.freeze()
+        self._async_command_handler_factory.freeze()
+        self._event_handlers_factory.freeze()
+        self._async_event_handlers_factory.freeze()
+
+    def enable_concurrent_events(self, max_workers: int | None = None) -> None:
+        """
+        Runs the (regular) handlers of an event concurrently, on a thread pool of max_workers threads,
+        which is shut down by shutdown() (or on exiting the bootstrapper as a context manager).
+        Suited for I/O bound event handlers, which should not handle commands on the same bootstrapper,
+        as they could be starved of threads.
+        Unlike sequential handling, which stops at the first failing handler, all the handlers of the event run,
+        each committing its own unit of work unless it fails - and then their errors are raised together
+        (see EventHandlersError).
+        """
+        executor = self._bus_options.get('executor')
+        if executor is not None:
+            executor.shutdown(wait=False)
+        self._bus_options['executor'] = concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix='ddd-event-handlers'
+        )
+
+    def enable_concurrent_async_events(
+            self, max_concurrency: int | None = None, concurrent_cascade_levels: bool = False
+    ) -> None:
+        """
+        Runs the async handlers of an event concurrently (and optionally of a whole cascade level),
+        at most max_concurrency at a time.
+        As with enable_concurrent_events, the handlers that do not fail commit even if others fail.
+        """
+        self._async_bus_options.update(
+            concurrent_events=True,
+            max_concurrency=max_concurrency,
+            concurrent_cascade_levels=concurrent_cascade_levels,
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shuts down the thread pool of the concurrent event handlers (if any), handling the events sequentially."""
+        executor = self._bus_options.pop('executor', None)
+        if executor is not None:
+            executor.shutdown(wait)
+
+    def __enter__(self) -> Bootstrapper:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+
+    def add_middleware(self, middleware: Middleware) -> None:
+        """
+        Wraps the stages of handle_command & handle_commands (see ddd.Stage) with the middleware.
+        Middlewares are nested in the order they are added, the first one being the outermost.
+        """
+        self._middlewares.append(middleware)
+        self._bus_options['intercept'] = compile_middlewares(self._middlewares)
+
+    def add_async_middleware(self, middleware: AsyncMiddleware) -> None:
+        """The async counterpart of add_middleware, for async_handle_command & async_handle_commands."""
+        self._async_middlewares.append(middleware)
+        self._async_bus_options['intercept'] = compile_async_middlewares(self._async_middlewares)
+
+    def enable_group_commit(self, checkpoint_every: int | None = None) -> None:
+        """
+        Commits the resources declared by the event handlers of a command's cascade once - after its last event,
+        and after every checkpoint_every handled events (if set) - instead of committing every handler.
+        Once an event handler fails, the resources not committed yet are all rolled back.
+        """
+        if checkpoint_every is not None and checkpoint_every < 1:
+            raise ValueError(f'checkpoint_every must be positive, got {checkpoint_every}')
+        for options in (self._bus_options, self._async_bus_options):
+            options.update(group_commit=True, checkpoint_every=checkpoint_every)
+
+    def use_outbox(self, outbox: AbstractOutbox | None) -> None:
+        """
+        Appends the events raised by the command handlers (both regular and async) to the outbox, instead of
+        handling them before returning: each handler must declare an OutboxWriter resource (e.g. a repository of
+        the outbox's database), which appends them within the transaction of its commit.
+        They should then be dispatched by an OutboxDispatcher
+        (or an AsyncOutboxDispatcher) into handle_events (or async_handle_events).
+        """
+        self._bus_options['outbox'] = outbox
+        self._async_bus_options['outbox'] = outbox
+
+    def set_retry_policy(self, retry_policy: RetryPolicy | None) -> None:
+        """
+        Retries the unit of work of the commands handled by handle_command & async_handle_command
+        on the errors of the policy (by default on a ConflictError), or stops retrying when None.
+        """
+        self._bus_options['retry_policy'] = retry_policy
+        self._async_bus_options['retry_policy'] = retry_policy
+
+    def set_tracer(self, tracer: Tracer | None) -> None:
+        """Traces the handler invocations of the sampled commands (both regular and async), or stops when None."""
+        self._bus_options['tracer'] = tracer
+        self._async_bus_options['tracer'] = tracer
 
     def handle_command(self, command: AbstractCommand) -> Any:
-        message_bus = MessageBus(self._command_handler_factory, self._event_handlers_factory)
+        message_bus = MessageBus(self._command_handler_factory, self._event_handlers_factory, **self._bus_options)
         result = message_bus.publish(command)
         return result
 
     async def async_handle_command(self, command: AbstractCommand) -> Any:
-        message_bus = AsyncMessageBus(self._async_command_handler_factory, self._async_event_handlers_factory)
+        message_bus = AsyncMessageBus(
+            self._async_command_handler_factory, self._async_event_handlers_factory, **self._async_bus_options
+        )
         result = await message_bus.publish(command)
         return result
 
+    def handle_commands(self, commands: Iterable[AbstractCommand]) -> list[CommandResult]:
+        message_bus = MessageBus(self._command_handler_factory, self._event_handlers_factory, **self._bus_options)
+        results = message_bus.publish_batch(commands)
+        return results
+
+    async def async_handle_commands(self, commands: Iterable[AbstractCommand]) -> list[CommandResult]:
+        message_bus = AsyncMessageBus(
+            self._async_command_handler_factory, self._async_event_handlers_factory, **self._async_bus_options
+        )
+        results = await message_bus.publish_batch(commands)
+        return results
+
+    def handle_events(self, events: Iterable[AbstractEvent]) -> None:
+        message_bus = MessageBus(self._command_handler_factory, self._event_handlers_factory, **self._bus_options)
+        message_bus.publish_events(events)
+
+    async def async_handle_events(self, events: Iterable[AbstractEvent]) -> None:
+        message_bus = AsyncMessageBus(
+            self._async_command_handler_factory, self._async_event_handlers_factory, **self._async_bus_options
+        )
+        await message_bus.publish_events(events)
+
     @classmethod
     def _validate_type_returned_by(cls, func: Callable, type_: Type) -> None:
         signature = inspect.signature(func)
@@ -52,4 +195,3 @@ class Bootstrapper:
             return
         if signature.return_annotation.split('.')[-1] != type_.__name__:
             raise ValueError(f'register expected "{type_.__name__}", got "{signature.return_annotation}"')
-
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import collections
+import copy
+import dataclasses
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from ddd.model import AbstractEntity
+from ddd.repository import RollbackCommitter, AsyncRollbackCommitter, SavepointRollbackCommitter, \
+    AsyncSavepointRollbackCommitter
+
+
+class EntityCache:
+    def __init__(
+            self,
+            max_size: int = 1024,
+            ttl: float | None = 300.0,
+            clock: Callable[[], float] = time.monotonic,
+            copy_entity: Callable[[AbstractEntity], AbstractEntity] = copy.deepcopy,
+    ):
+        """
+        A cross-request LRU of up to max_size entities by id, which expire ttl seconds after they were loaded
+        (unless None). May be shared by repositories (e.g. of several bootstrappers) of the same entity type.
+        The cache keeps a snapshot of each entity and hands out copies of it, by copy_entity, so that no unit of work
+        sees the changes of another - unless committed, which invalidates the entity.
+        """
+        if max_size < 1:
+            raise ValueError(f'max_size must be positive, got {max_size}')
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._copy_entity = copy_entity
+        self._lock = threading.Lock()
+        # (entity, expiry) by id, from the least to the most recently used
+        self._entries: collections.OrderedDict[str, tuple[AbstractEntity, float | None]] = collections.OrderedDict()
+        # Incremented by every invalidation, so that the entities loaded meanwhile are not put (see put)
+        self._generation = 0
+
+    def get(self, id_: str) -> AbstractEntity | None:
+        with self._lock:
+            entry = self._entries.get(id_)
+            if entry is None:
+                return None
+            entity, expiry = entry
+            if expiry is not None and self._clock() >= expiry:
+                del self._entries[id_]
+                return None
+            self._entries.move_to_end(id_)
+        return self._copy_entity(entity)
+
+    @property
+    def generation(self) -> int:
+        """The generation of the invalidations, to be read before loading an entity that is then put."""
+        return self._generation
+
+    def put(self, id_: str, entity: AbstractEntity, generation: int | None = None) -> None:
+        """
+        Caches a snapshot of the entity - unless given the generation read before it was loaded, and any entity was
+        invalidated since, as the entity may have been loaded before a commit that invalidated it.
+        """
+        entity = self._copy_entity(entity)
+        expiry = None if self._ttl is None else self._clock() + self._ttl
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[id_] = (entity, expiry)
+            self._entries.move_to_end(id_)
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            for id_ in ids:
+                self._entries.pop(id_, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclasses.dataclass
+class CacheStats:
+    identity_map_hits: int = 0
+    cache_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.identity_map_hits + self.cache_hits
+
+
+class _AbstractCachedRepository:
+    def __init__(self, repository: Any, cache: EntityCache | None = None):
+        """
+        Wraps a repository of get_by_id(id_) & save(entity), loading each entity from it at most once per unit of work
+        (i.e. until commit or rollback) - and, given a cache, at most once while it is cached.
+        Committed entities are invalidated from the cache, and so are all the entities of a rolled back unit of work,
+        as they may have been changed.
+        """
+        self.repository = repository
+        self._cache = cache
+        self._identity_map: dict[str, AbstractEntity] = {}
+        self._saved_ids: set[str] = set()
+        self.stats = CacheStats()
+
+    def _get_loaded(self, id_: str) -> AbstractEntity | None:
+        entity = self._identity_map.get(id_)
+        if entity is not None:
+            self.stats.identity_map_hits += 1
+            return entity
+        entity = self._cache.get(id_) if self._cache is not None else None
+        if entity is not None:
+            self.stats.cache_hits += 1
+            self._identity_map[id_] = entity
+            return entity
+        self.stats.misses += 1
+        return None
+
+    def _generation(self) -> int | None:
+        return None if self._cache is None else self._cache.generation
+
+    def _loaded(self, id_: str, entity: AbstractEntity, generation: int | None) -> None:
+        """Maps the entity loaded from the repository, and caches it unless invalidated since generation."""
+        self._identity_map[id_] = entity
+        if self._cache is not None:
+            self._cache.put(id_, entity, generation)
+
+    def _saved(self, entity: AbstractEntity) -> None:
+        self._identity_map[entity.get_id()] = entity
+        self._saved_ids.add(entity.get_id())
+
+    def _end_unit_of_work(self, committed: bool) -> None:
+        if self._cache is not None:
+            self._cache.invalidate(self._saved_ids if committed else set(self._identity_map) | self._saved_ids)
+        self._identity_map.clear()
+        self._saved_ids.clear()
+
+    def _rolled_back_to(self, loaded: int) -> None:
+        """Forgets the entities loaded after the first loaded ones, and invalidates the possibly changed ones."""
+        if self._cache is not None:
+            self._cache.invalidate(set(self._identity_map) | self._saved_ids)
+        for id_ in list(self._identity_map)[loaded:]:
+            del self._identity_map[id_]
+
+
+class CachedRepository(_AbstractCachedRepository, RollbackCommitter):
+    def get_by_id(self, id_: str) -> AbstractEntity:
+        entity = self._get_loaded(id_)
+        if entity is None:
+            generation = self._generation()
+            entity = self.repository.get_by_id(id_)
+            self._loaded(id_, entity, generation)
+        return entity
+
+    def save(self, entity: AbstractEntity) -> None:
+        self.repository.save(entity)
+        self._saved(entity)
+
+    def commit(self) -> None:
+        try:
+            self.repository.commit()
+        except Exception:
+            self._end_unit_of_work(committed=False)
+            raise
+        self._end_unit_of_work(committed=True)
+
+    def rollback(self) -> None:
+        try:
+            self.repository.rollback()
+        finally:
+            self._end_unit_of_work(committed=False)
+
+
+class CachedSavepointRepository(CachedRepository, SavepointRollbackCommitter):
+    def savepoint(self) -> tuple[Any, int]:
+        return self.repository.savepoint(), len(self._identity_map)
+
+    def rollback_to_savepoint(self, savepoint: tuple[Any, int]) -> None:
+        savepoint, loaded = savepoint
+        self.repository.rollback_to_savepoint(savepoint)
+        self._rolled_back_to(loaded)
+
+
+class AsyncCachedRepository(_AbstractCachedRepository, AsyncRollbackCommitter):
+    async def get_by_id(self, id_: str) -> AbstractEntity:
+        entity = self._get_loaded(id_)
+        if entity is None:
+            generation = self._generation()
+            entity = await self.repository.get_by_id(id_)
+            self._loaded(id_, entity, generation)
+        return entity
+
+    async def save(self, entity: AbstractEntity) -> None:
+        await self.repository.save(entity)
+        self._saved(entity)
+
+    async def commit(self) -> None:
+        try:
+            await self.repository.commit()
+        except Exception:
+            self._end_unit_of_work(committed=False)
+            raise
+        self._end_unit_of_work(committed=True)
+
+    async def rollback(self) -> None:
+        try:
+            await self.repository.rollback()
+        finally:
+            self._end_unit_of_work(committed=False)
+
+
+class AsyncCachedSavepointRepository(AsyncCachedRepository, AsyncSavepointRollbackCommitter):
+    async def savepoint(self) -> tuple[Any, int]:
+        return await self.repository.savepoint(), len(self._identity_map)
+
+    async def rollback_to_savepoint(self, savepoint: tuple[Any, int]) -> None:
+        savepoint, loaded = savepoint
+        await self.repository.rollback_to_savepoint(savepoint)
+        self._rolled_back_to(loaded)
+
+
+def cached_repository(repository: Any, cache: EntityCache | None = None) -> _AbstractCachedRepository:
+    """Wraps the (async) repository by the cached repository supporting the same capabilities (e.g. savepoints)."""
+    if isinstance(repository, AsyncRollbackCommitter):
+        if isinstance(repository, AsyncSavepointRollbackCommitter):
+            return AsyncCachedSavepointRepository(repository, cache)
+        return AsyncCachedRepository(repository, cache)
+    if isinstance(repository, SavepointRollbackCommitter):
+        return CachedSavepointRepository(repository, cache)
+    return CachedRepository(repository, cache)
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import struct
+import types
+import typing
+from collections.abc import Callable
+from typing import Any, Union
+
+from ddd.error import BoundedContextError, BAD_REQUEST
+from ddd.model import AbstractCommand, AbstractEvent
+
+Message = Union[AbstractCommand, AbstractEvent]
+Buffer = Union[bytes, bytearray, memoryview]
+
+# The struct formats of the fixed size fields, by their (optional) types. All the other fields are variable sized
+_FIXED_FORMATS = {bool: '?', int: 'q', float: 'd'}
+# The smallest struct format of the bitmap of the None fields, by the maximal number of fields
+_NULLS_FORMATS = [(8, 'B'), (16, 'H'), (32, 'I'), (64, 'Q')]
+# The type of `X | Y` since Python 3.10
+_UNION_TYPE = getattr(types, 'UnionType', None)
+_BINARY_TYPES = {field_type.__name__: field_type for field_type in (bool, int, float, str, bytes)}
+_json_encode = json.JSONEncoder(separators=(',', ':')).encode
+_json_decode = json.JSONDecoder().decode
+
+
+def _message_name(message_type: type) -> str:
+    """The class attribute name of ddd.Command & ddd.Event subclasses, or the class name, as the name property's."""
+    name = getattr(message_type, 'name', None)
+    return name if isinstance(name, str) else message_type.__name__
+
+
+def _field_type(field: dataclasses.Field, hints: dict[str, Any]) -> type | None:
+    """The type of the field (of an optional field, the type it is optional of), if it has a binary encoding."""
+    hint = hints.get(field.name, field.type)
+    if isinstance(hint, str):
+        # An unresolved annotation, e.g. `str | None` before Python 3.10
+        names = [name.strip() for name in hint.split('|') if name.strip() != 'None']
+        return _BINARY_TYPES.get(names[0]) if len(names) == 1 else None
+    if getattr(hint, '__origin__', None) is Union or (_UNION_TYPE is not None and isinstance(hint, _UNION_TYPE)):
+        args = [arg for arg in hint.__args__ if arg is not type(None)]
+        hint = args[0] if len(args) == 1 else None
+    return hint if hint in _BINARY_TYPES.values() else None
+
+
+def _argument(field: dataclasses.Field, value: str) -> str:
+    """Passes the value of the field positionally (which is faster), unless the field is keyword only."""
+    return f'{field.name}={value}' if getattr(field, 'kw_only', False) is True else value
+
+
+def _compile(name: str, source: list[str], namespace: dict[str, Any]) -> Callable:
+    exec('\n'.join(source), namespace)
+    return namespace[name]
+
+
+class MessageCodec:
+    def __init__(self, message_type: type, type_field: str = 'type'):
+        """
+        Encodes & decodes messages of the dataclass message_type by functions compiled for its fields,
+        to & from dicts (whose type_field is the message name) and a compact binary format:
+        the message name, a bitmap of the None fields, the fixed size fields (bool, int & float)
+        along with the lengths of the variable sized ones, followed by the variable sized fields
+        (str & bytes as is, and any other type as JSON).
+        """
+        if not dataclasses.is_dataclass(message_type):
+            raise ValueError(f'{message_type.__name__} is not a dataclass')
+        self.message_type = message_type
+        self.name = _message_name(message_type)
+        fields = [field for field in dataclasses.fields(message_type) if field.init]
+        try:
+            hints = typing.get_type_hints(message_type)
+        except Exception:
+            # Unresolvable annotations, e.g. `str | None` before Python 3.10, are resolved by _field_type
+            hints = {}
+        nulls_format = next((format_ for size, format_ in _NULLS_FORMATS if len(fields) <= size), None)
+        name = self.name.encode()
+        if nulls_format is None or len(name) > 255:
+            raise ValueError(f'{self.name} has more than 64 fields, or a name longer than 255 bytes')
+        field_types = [_field_type(field, hints) for field in fields]
+        fixed = [i for i, field_type in enumerate(field_types) if field_type in _FIXED_FORMATS]
+        variable = [i for i, field_type in enumerate(field_types) if field_type not in _FIXED_FORMATS]
+        layout = struct.Struct(
+            '<' + nulls_format + ''.join(_FIXED_FORMATS[field_types[i]] for i in fixed) + 'I' * len(variable)
+        )
+        namespace = {
+            'cls': message_type,
+            'name': self.name,
+            'prefix': bytes([len(name)]) + name,
+            'pack': layout.pack,
+            'unpack_from': layout.unpack_from,
+            'size': layout.size,
+            'json_encode': _json_encode,
+            'json_decode': _json_decode,
+            'BoundedContextError': BoundedContextError,
+            'BAD_REQUEST': BAD_REQUEST,
+        }
+        for i, field in enumerate(fields):
+            namespace[f'default_{i}'] = field.default
+            namespace[f'default_factory_{i}'] = field.default_factory
+        self.to_dict: Callable[[Message], dict] = self._compile_to_dict(fields, type_field, namespace)
+        self.from_dict: Callable[[dict], Message] = self._compile_from_dict(fields, namespace)
+        self._encode_binary: Callable[[Message], bytes] = self._compile_encode_binary(
+            fields, field_types, fixed, variable, namespace
+        )
+        self._decode_binary: Callable[[memoryview, int], Message] = self._compile_decode_binary(
+            fields, field_types, fixed, variable, namespace
+        )
+
+    def encode_json(self, message: Message) -> bytes:
+        return _json_encode(self.to_dict(message)).encode()
+
+    def encode_binary(self, message: Message) -> bytes:
+        return self._encode_binary(message)
+
+    def decode_binary(self, data: Buffer, offset: int = 0) -> Message:
+        """Decodes the message whose binary encoding (after its name) starts at offset, without copying data."""
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        try:
+            return self._decode_binary(view, offset)
+        except (struct.error, UnicodeDecodeError, ValueError) as e:
+            raise BoundedContextError(BAD_REQUEST, f'Invalid {self.name}: {e}') from None
+
+    @classmethod
+    def _compile_to_dict(
+            cls, fields: list[dataclasses.Field], type_field: str, namespace: dict[str, Any]
+    ) -> Callable[[Message], dict]:
+        items = ''.join(f', {field.name!r}: message.{field.name}' for field in fields)
+        return _compile('to_dict', [
+            'def to_dict(message):',
+            f'    return {{{type_field!r}: name{items}}}',
+        ], namespace)
+
+    @classmethod
+    def _compile_from_dict(
+            cls, fields: list[dataclasses.Field], namespace: dict[str, Any]
+    ) -> Callable[[dict], Message]:
+        arguments = []
+        for i, field in enumerate(fields):
+            if field.default is not dataclasses.MISSING:
+                value = f'raw.get({field.name!r}, default_{i})'
+            elif field.default_factory is not dataclasses.MISSING:
+                value = f'raw[{field.name!r}] if {field.name!r} in raw else default_factory_{i}()'
+            else:
+                value = f'raw[{field.name!r}]'
+            arguments.append(_argument(field, value))
+        return _compile('from_dict', [
+            'def from_dict(raw):',
+            '    try:',
+            f'        return cls({", ".join(arguments)})',
+            '    except KeyError as e:',
+            '        raise BoundedContextError(BAD_REQUEST, f"Missing {e} of {name}") from None',
+        ], namespace)
+
+    @classmethod
+    def _compile_encode_binary(
+            cls,
+            fields: list[dataclasses.Field],
+            field_types: list[type | None],
+            fixed: list[int],
+            variable: list[int],
+            namespace: dict[str, Any],
+    ) -> Callable[[Message], bytes]:
+        source = ['def encode_binary(message):', '    nulls = 0']
+        for i, field in enumerate(fields):
+            field_type = field_types[i]
+            empty = {bool: 'False', int: '0', float: '0.0'}.get(field_type, "b''")
+            if field_type is str:
+                encode = f'v{i}.encode()'
+            elif field_type is bytes or field_type in _FIXED_FORMATS:
+                encode = f'v{i}'
+            else:
+                encode = f'json_encode(v{i}).encode()'
+            source += [
+                f'    v{i} = message.{field.name}',
+                f'    if v{i} is None:',
+                f'        nulls |= {1 << i}',
+                f'        v{i} = {empty}',
+            ]
+            if encode != f'v{i}':
+                source += ['    else:', f'        v{i} = {encode}']
+        values = ['nulls'] + [f'v{i}' for i in fixed] + [f'len(v{i})' for i in variable]
+        parts = ['prefix', f'pack({", ".join(values)})'] + [f'v{i}' for i in variable]
+        source.append(f'    return b"".join(({", ".join(parts)},))')
+        return _compile('encode_binary', source, namespace)
+
+    @classmethod
+    def _compile_decode_binary(
+            cls,
+            fields: list[dataclasses.Field],
+            field_types: list[type | None],
+            fixed: list[int],
+            variable: list[int],
+            namespace: dict[str, Any],
+    ) -> Callable[[memoryview, int], Message]:
+        names = ['nulls'] + [f'v{i}' for i in fixed] + [f'n{i}' for i in variable]
+        source = [
+            'def decode_binary(data, offset):',
+            f'    {", ".join(names)}, = unpack_from(data, offset)',
+            '    offset += size',
+        ]
+        if variable:
+            lengths = ' + '.join(f'n{i}' for i in variable)
+            source += [
+                f'    if offset + {lengths} > len(data):',
+                '        raise ValueError("truncated data")',
+            ]
+        for i in variable:
+            field_type = field_types[i]
+            if field_type is str:
+                decode = f"str(data[offset:offset + n{i}], 'utf-8')"
+            elif field_type is bytes:
+                decode = f'bytes(data[offset:offset + n{i}])'
+            else:
+                # A None value is encoded as no bytes, which are not JSON
+                decode = f"json_decode(str(data[offset:offset + n{i}], 'utf-8')) if n{i} else None"
+            source += [f'    v{i} = {decode}', f'    offset += n{i}']
+        arguments = [_argument(field, f'None if nulls & {1 << i} else v{i}') for i, field in enumerate(fields)]
+        source.append(f'    return cls({", ".join(arguments)})')
+        return _compile('decode_binary', source, namespace)
+
+
+class CodecRegistry:
+    def __init__(self, type_field: str = 'type'):
+        """
+        Encodes & decodes the registered commands and events, by their name, to & from dicts
+        (e.g. of a ddd.CommandDecoder), JSON and a compact binary format (see MessageCodec).
+        """
+        self._type_field = type_field
+        self._codecs_by_type: dict[type, MessageCodec] = {}
+        self._codecs_by_name: dict[str, MessageCodec] = {}
+        self._codecs_by_binary_name: dict[bytes, MessageCodec] = {}
+
+    def register(self, message_type: type) -> type:
+        """Compiles the codec of the dataclass message_type, which is returned (so that it may decorate it)."""
+        name = _message_name(message_type)
+        if name in self._codecs_by_name:
+            raise ValueError(f'A codec was already registered for "{name}"')
+        codec = MessageCodec(message_type, self._type_field)
+        self._codecs_by_type[message_type] = codec
+        self._codecs_by_name[name] = codec
+        self._codecs_by_binary_name[name.encode()] = codec
+        return message_type
+
+    def get(self, message_type: type | str) -> MessageCodec:
+        codec = (self._codecs_by_name if isinstance(message_type, str) else self._codecs_by_type).get(message_type)
+        if codec is None:
+            raise BoundedContextError(BAD_REQUEST, f'Unknown message type: "{message_type}"')
+        return codec
+
+    def to_dict(self, message: Message) -> dict:
+        return self.get(type(message)).to_dict(message)
+
+    def from_dict(self, raw: dict) -> Message:
+        return self.get(raw.get(self._type_field)).from_dict(raw)
+
+    def encode_json(self, message: Message) -> bytes:
+        return _json_encode(self.get(type(message)).to_dict(message)).encode()
+
+    def decode_json(self, data: Buffer | str) -> Message:
+        try:
+            raw = _json_decode(data if isinstance(data, str) else str(data, 'utf-8'))
+        except ValueError as e:
+            raise BoundedContextError(BAD_REQUEST, f'Invalid JSON: {e}') from None
+        if not isinstance(raw, dict):
+            raise BoundedContextError(BAD_REQUEST, 'Invalid JSON: not an object')
+        return self.from_dict(raw)
+
+    def encode_binary(self, message: Message) -> bytes:
+        return self.get(type(message)).encode_binary(message)
+
+    def decode_binary(self, data: Buffer) -> Message:
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        if not view:
+            raise BoundedContextError(BAD_REQUEST, 'Invalid message: no data')
+        end = 1 + view[0]
+        name = bytes(view[1:end])
+        codec = self._codecs_by_binary_name.get(name)
+        if codec is None:
+            raise BoundedContextError(BAD_REQUEST, f'Unknown message type: {name!r}')
+        return codec.decode_binary(view, end)
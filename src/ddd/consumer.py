@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import queue
+import threading
+import time
+from collections.abc import AsyncIterable, Iterable
+from typing import Any, Awaitable, Callable, List
+
+from ddd.bootstrapper import Bootstrapper
+from ddd.error import BoundedContextError, BAD_REQUEST
+from ddd.model import AbstractCommand
+
+_logger = logging.getLogger(__name__)
+
+RawMessage = dict
+DecodeCommand = Callable[[RawMessage], AbstractCommand]
+Ack = Callable[[List[RawMessage]], Any]
+AsyncAck = Callable[[List[RawMessage]], Awaitable[Any]]
+OnError = Callable[[RawMessage, Exception], Any]
+
+# Tells a worker that no more messages will be buffered
+_DRAINED = object()
+
+
+class CommandDecoder:
+    def __init__(self, type_field: str = 'type'):
+        """Decodes raw messages into commands, by the decoder registered to their type_field's value."""
+        self._type_field = type_field
+        self._decoders: dict[str, DecodeCommand] = {}
+
+    def register(self, type_name: str, decode: DecodeCommand) -> None:
+        if type_name in self._decoders:
+            raise ValueError(f'A decoder was already registered for "{type_name}"')
+        self._decoders[type_name] = decode
+
+    def decode(self, raw: RawMessage) -> AbstractCommand:
+        type_name = raw.get(self._type_field)
+        decode = self._decoders.get(type_name)
+        if decode is None:
+            raise BoundedContextError(BAD_REQUEST, f'Unknown message type: "{type_name}"')
+        return decode(raw)
+
+
+@dataclasses.dataclass
+class ConsumerStats:
+    received: int = 0
+    handled: int = 0
+    failed: int = 0
+    acked: int = 0
+
+
+def _log_error(raw: RawMessage, error: Exception) -> None:
+    _logger.error('Failed handling the message %r', raw, exc_info=error)
+
+
+class _AbstractConsumer:
+    def __init__(
+            self,
+            bootstrapper: Bootstrapper,
+            decoder: CommandDecoder,
+            prefetch: int = 100,
+            concurrency: int = 1,
+            ack_batch_size: int = 100,
+            ack_interval: float = 1.0,
+            on_error: OnError = _log_error,
+    ):
+        """
+        Buffers up to prefetch messages ahead of concurrency workers, which decode them into commands and handle them.
+        The messages whose command was handled (i.e. committed) are acknowledged in batches of ack_batch_size,
+        or once the oldest one waited ack_interval seconds. Failed messages are passed to on_error and not acknowledged.
+        Failures of ack and of on_error are logged, leaving the messages of a failed ack to be redelivered.
+        Commands are handled in order only when concurrency is 1.
+        """
+        if prefetch < 1 or concurrency < 1 or ack_batch_size < 1:
+            raise ValueError('prefetch, concurrency & ack_batch_size must be positive')
+        self._bootstrapper = bootstrapper
+        self._decoder = decoder
+        self._prefetch = prefetch
+        self._concurrency = concurrency
+        self._ack_batch_size = ack_batch_size
+        self._ack_interval = ack_interval
+        self._on_error = on_error
+        self._stopping = False
+        self._unacked: list[RawMessage] = []
+        self._unacked_since = 0.0
+        self.stats = ConsumerStats()
+
+    def stop(self) -> None:
+        """Stops receiving messages: the buffered ones are still handled (and acknowledged) before run returns."""
+        self._stopping = True
+
+    def _add_unacked(self, raw: RawMessage) -> list[RawMessage] | None:
+        """Returns the batch of messages to acknowledge, once due."""
+        if not self._unacked:
+            self._unacked_since = time.monotonic()
+        self._unacked.append(raw)
+        if len(self._unacked) >= self._ack_batch_size:
+            return self._take_unacked()
+        return None
+
+    def _take_unacked(self, only_if_due: bool = False) -> list[RawMessage] | None:
+        if not self._unacked:
+            return None
+        if only_if_due and time.monotonic() - self._unacked_since < self._ack_interval:
+            return None
+        batch = self._unacked
+        self._unacked = []
+        return batch
+
+    def _report_error(self, raw: RawMessage, error: Exception) -> None:
+        # A failing on_error must not stop the worker, which would leave the buffer full and run blocked
+        try:
+            self._on_error(raw, error)
+        except Exception:
+            _logger.exception('Failed reporting the failure of the message %r', raw)
+
+
+def _log_ack_error(batch: list[RawMessage]) -> None:
+    _logger.exception('Failed acknowledging %s messages, which will be redelivered', len(batch))
+
+
+class Consumer(_AbstractConsumer):
+    """Consumes the messages of a regular pubsub client, on concurrency worker threads."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def run(self, messages: Iterable[RawMessage], ack: Ack) -> ConsumerStats:
+        """Consumes the messages until they are exhausted or the consumer is stopped, and drains the buffer."""
+        self._stopping = False
+        buffer: queue.Queue = queue.Queue(self._prefetch)
+        workers = [
+            threading.Thread(target=self._work, args=(buffer, ack), name=f'ddd-consumer-{i}')
+            for i in range(self._concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for raw in messages:
+                if self._stopping:
+                    break
+                buffer.put(raw)
+                self.stats.received += 1
+        finally:
+            for _ in workers:
+                buffer.put(_DRAINED)
+            for worker in workers:
+                worker.join()
+            with self._lock:
+                batch = self._take_unacked()
+            if batch:
+                self._ack(ack, batch)
+        return self.stats
+
+    def _ack(self, ack: Ack, batch: list[RawMessage]) -> None:
+        try:
+            ack(batch)
+        except Exception:
+            _log_ack_error(batch)
+            return
+        with self._lock:
+            self.stats.acked += len(batch)
+
+    def _work(self, buffer: queue.Queue, ack: Ack) -> None:
+        while True:
+            try:
+                raw = buffer.get(timeout=self._ack_interval)
+            except queue.Empty:
+                with self._lock:
+                    batch = self._take_unacked(only_if_due=True)
+                if batch:
+                    self._ack(ack, batch)
+                continue
+            if raw is _DRAINED:
+                return
+            try:
+                self._bootstrapper.handle_command(self._decoder.decode(raw))
+            except Exception as e:
+                with self._lock:
+                    self.stats.failed += 1
+                self._report_error(raw, e)
+                continue
+            with self._lock:
+                self.stats.handled += 1
+                batch = self._add_unacked(raw) or self._take_unacked(only_if_due=True)
+            if batch:
+                self._ack(ack, batch)
+
+
+class AsyncConsumer(_AbstractConsumer):
+    """Consumes the messages of an async pubsub client, on concurrency worker tasks."""
+
+    async def run(self, messages: AsyncIterable[RawMessage], ack: AsyncAck) -> ConsumerStats:
+        """Consumes the messages until they are exhausted or the consumer is stopped, and drains the buffer."""
+        self._stopping = False
+        buffer: asyncio.Queue = asyncio.Queue(self._prefetch)
+        workers = [asyncio.ensure_future(self._work(buffer, ack)) for _ in range(self._concurrency)]
+        try:
+            async for raw in messages:
+                if self._stopping:
+                    break
+                await buffer.put(raw)
+                self.stats.received += 1
+        finally:
+            for _ in workers:
+                await buffer.put(_DRAINED)
+            await asyncio.gather(*workers)
+            batch = self._take_unacked()
+            if batch:
+                await self._ack(ack, batch)
+        return self.stats
+
+    async def _ack(self, ack: AsyncAck, batch: list[RawMessage]) -> None:
+        try:
+            await ack(batch)
+        except Exception:
+            _log_ack_error(batch)
+            return
+        self.stats.acked += len(batch)
+
+    async def _work(self, buffer: asyncio.Queue, ack: AsyncAck) -> None:
+        while True:
+            try:
+                raw = await asyncio.wait_for(buffer.get(), self._ack_interval)
+            except asyncio.TimeoutError:
+                batch = self._take_unacked(only_if_due=True)
+                if batch:
+                    await self._ack(ack, batch)
+                continue
+            if raw is _DRAINED:
+                return
+            try:
+                await self._bootstrapper.async_handle_command(self._decoder.decode(raw))
+            except Exception as e:
+                self.stats.failed += 1
+                self._report_error(raw, e)
+                continue
+            self.stats.handled += 1
+            batch = self._add_unacked(raw) or self._take_unacked(only_if_due=True)
+            if batch:
+                await self._ack(ack, batch)
@@ -3,6 +3,7 @@ from __future__ import annotations
 NOT_FOUND = 'not_found'
 BAD_REQUEST = 'bad_request'
 SERVER_ERROR = 'server_error'
+CONFLICT = 'conflict'
 
 
 class BoundedContextError(Exception):
@@ -18,3 +19,33 @@ class BoundedContextError(Exception):
     def status_code(self) -> str | None:
         return self._status_code
 
+
+class ConflictError(BoundedContextError):
+    """Raised on commit when an entity was changed concurrently, since the version it was loaded at."""
+
+    def __init__(self, *args):
+        super().__init__(CONFLICT, *args)
+
+
+class ValidationError(BoundedContextError):
+    """Raised when a command violates the constraints of its fields, with all its violations."""
+
+    def __init__(self, violations: list[str]):
+        super().__init__(BAD_REQUEST, '; '.join(violations))
+        self._violations = list(violations)
+
+    @property
+    def violations(self) -> list[str]:
+        return list(self._violations)
+
+
+class EventHandlersError(BoundedContextError):
+    """Raised when several event handlers that ran concurrently failed, in the order they were registered."""
+
+    def __init__(self, errors: list[Exception]):
+        super().__init__(SERVER_ERROR, f'{len(errors)} event handlers failed: {", ".join(map(str, errors))}')
+        self._errors = list(errors)
+
+    @property
+    def errors(self) -> list[Exception]:
+        return list(self._errors)
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import array
+import copy
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import zlib
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from ddd.error import BoundedContextError, ConflictError, NOT_FOUND
+from ddd.model import AbstractEntity, AbstractEvent
+from ddd.repository import RollbackCommitter
+
+# A record is its header, followed by its stream id (utf-8) and its serialized event.
+# The header holds the crc32 of the rest of the record, the lengths of the payload and of the stream id,
+# the record's flags and its version within the stream.
+_CRC = struct.Struct('<I')
+_HEADER_REST = struct.Struct('<IHBQ')
+_HEADER = struct.Struct('<IIHBQ')
+# Flags the last record of an appended batch, so that a batch appended partially is truncated on recovery
+_END_OF_BATCH = 1
+_SEGMENT_SUFFIX = '.segment'
+_SNAPSHOTS_DIRECTORY = 'snapshots'
+# The offset index holds a record's segment number in the high bits, and its position in the segment in the low bits
+_POSITION_BITS = 40
+_POSITION_MASK = (1 << _POSITION_BITS) - 1
+
+
+class FileEventStore:
+    def __init__(
+            self,
+            directory: str,
+            serializer: Any = pickle,
+            segment_size: int = 64 * 1024 * 1024,
+            fsync: bool = False,
+    ):
+        """
+        An append-only log of the events of many streams (e.g. of aggregates, by their ids), stored in the directory
+        as segment files of about segment_size bytes, and serialized by the serializer's dumps & loads.
+        The events are read straight from the memory mapped segments, through an in memory index of the offsets
+        of each stream's records, which is rebuilt when the store is opened.
+        With fsync, appends and snapshots are flushed to the disk before they return.
+        """
+        if not 0 < segment_size <= _POSITION_MASK:
+            raise ValueError(f'segment_size must be positive and up to {_POSITION_MASK}, got {segment_size}')
+        self._directory = directory
+        self._serializer = serializer
+        self._segment_size = segment_size
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._index: dict[str, array.array] = {}
+        self._maps: dict[int, mmap.mmap] = {}
+        os.makedirs(os.path.join(directory, _SNAPSHOTS_DIRECTORY), exist_ok=True)
+        self._segments = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(_SEGMENT_SUFFIX)
+        )
+        for number in range(len(self._segments)):
+            self._recover_segment(number)
+        if not self._segments:
+            self._segments.append(self._segment_path(0))
+        self._writer = open(self._segments[-1], 'ab')
+        self._position = self._writer.tell()
+
+    def append(self, stream_id: str, events: Iterable[AbstractEvent], expected_version: int | None = None) -> int:
+        """
+        Appends the events to the stream, all or none of them, returning the stream's version (its number of events).
+        Raises a ConflictError when expected_version is given, and the stream is at another version.
+        """
+        payloads = [self._serializer.dumps(event) for event in events]
+        stream = stream_id.encode()
+        with self._lock:
+            locations = self._index.get(stream_id)
+            version = 0 if locations is None else len(locations)
+            if expected_version is not None and expected_version != version:
+                raise ConflictError(f'Stream "{stream_id}" is at version {version}, not at {expected_version}')
+            if not payloads:
+                return version
+            if self._position >= self._segment_size:
+                self._roll_segment()
+            records = bytearray()
+            positions = []
+            for i, payload in enumerate(payloads):
+                positions.append(self._position + len(records))
+                flags = _END_OF_BATCH if i == len(payloads) - 1 else 0
+                rest = _HEADER_REST.pack(len(payload), len(stream), flags, version + i + 1)
+                records += _CRC.pack(zlib.crc32(payload, zlib.crc32(stream, zlib.crc32(rest))))
+                records += rest
+                records += stream
+                records += payload
+            try:
+                self._writer.write(records)
+                self._writer.flush()
+                if self._fsync:
+                    os.fsync(self._writer.fileno())
+            except Exception:
+                self._writer.truncate(self._position)
+                raise
+            self._position += len(records)
+            if locations is None:
+                locations = self._index[stream_id] = array.array('Q')
+            segment = (len(self._segments) - 1) << _POSITION_BITS
+            locations.extend(segment | position for position in positions)
+            return version + len(payloads)
+
+    def load(self, stream_id: str, after_version: int = 0) -> list[AbstractEvent]:
+        """The events of the stream whose version is greater than after_version, in order."""
+        loads = self._serializer.loads
+        events = []
+        with self._lock:
+            locations = self._index.get(stream_id)
+            if locations is None:
+                return events
+            for i in range(after_version, len(locations)):
+                number, position = locations[i] >> _POSITION_BITS, locations[i] & _POSITION_MASK
+                segment = self._map(number, position + _HEADER.size)
+                _, payload_length, stream_length, _, _ = _HEADER.unpack_from(segment, position)
+                start = position + _HEADER.size + stream_length
+                segment = self._map(number, start + payload_length)
+                with memoryview(segment) as view, view[start:start + payload_length] as payload:
+                    events.append(loads(payload))
+        return events
+
+    def get_version(self, stream_id: str) -> int:
+        with self._lock:
+            locations = self._index.get(stream_id)
+            return 0 if locations is None else len(locations)
+
+    def save_snapshot(self, stream_id: str, version: int, state: Any) -> None:
+        """Stores the state of the stream at version (e.g. of its aggregate), replacing its previous snapshot."""
+        path = self._snapshot_path(stream_id)
+        data = self._serializer.dumps((stream_id, version, state))
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with open(descriptor, 'wb') as f:
+            f.write(data)
+            if self._fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+
+    def load_snapshot(self, stream_id: str) -> tuple[int, Any] | None:
+        """The version and state of the stream's latest snapshot, if any."""
+        try:
+            with open(self._snapshot_path(stream_id), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        snapshot_stream_id, version, state = self._serializer.loads(data)
+        # A snapshot may be ahead of its stream, if the stream's last batch was truncated on recovery
+        if snapshot_stream_id != stream_id or version > self.get_version(stream_id):
+            return None
+        return version, state
+
+    def close(self) -> None:
+        with self._lock:
+            self._writer.close()
+            for segment in self._maps.values():
+                segment.close()
+            self._maps.clear()
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self._directory, f'{number:010d}{_SEGMENT_SUFFIX}')
+
+    def _snapshot_path(self, stream_id: str) -> str:
+        name = hashlib.sha1(stream_id.encode()).hexdigest()
+        return os.path.join(self._directory, _SNAPSHOTS_DIRECTORY, name)
+
+    def _roll_segment(self) -> None:
+        self._writer.close()
+        self._segments.append(self._segment_path(len(self._segments)))
+        self._writer = open(self._segments[-1], 'ab')
+        self._position = 0
+
+    def _map(self, number: int, end: int) -> mmap.mmap:
+        """The segment mapped up to at least end, remapped if it grew since it was mapped."""
+        segment = self._maps.get(number)
+        if segment is None or len(segment) < end:
+            if segment is not None:
+                segment.close()
+            with open(self._segments[number], 'rb') as f:
+                segment = self._maps[number] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return segment
+
+    def _recover_segment(self, number: int) -> None:
+        """Indexes the segment's records, truncating the last segment after its last complete batch."""
+        path = self._segments[number]
+        size = os.path.getsize(path)
+        end_of_batches = 0
+        if size:
+            batch: list[str] = []
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as segment, \
+                    memoryview(segment) as view:
+                position = 0
+                while position + _HEADER.size <= size:
+                    crc, payload_length, stream_length, flags, version = _HEADER.unpack_from(segment, position)
+                    start = position + _HEADER.size
+                    end = start + stream_length + payload_length
+                    if end > size or zlib.crc32(view[position + _CRC.size:end]) != crc:
+                        break
+                    stream_id = str(view[start:start + stream_length], 'utf-8')
+                    locations = self._index.setdefault(stream_id, array.array('Q'))
+                    if version != len(locations) + 1:
+                        break
+                    locations.append(number << _POSITION_BITS | position)
+                    batch.append(stream_id)
+                    position = end
+                    if flags & _END_OF_BATCH:
+                        batch.clear()
+                        end_of_batches = position
+                # Drops the records of the incomplete batch from the index
+                for stream_id in batch:
+                    self._index[stream_id].pop()
+                    if not self._index[stream_id]:
+                        del self._index[stream_id]
+        if end_of_batches < size:
+            if number != len(self._segments) - 1:
+                raise ValueError(f'Corrupted record at position {end_of_batches} of {path}')
+            with open(path, 'r+b') as f:
+                f.truncate(end_of_batches)
+
+
+class EventSourcedRepository(RollbackCommitter):
+    def __init__(
+            self,
+            store: FileEventStore,
+            create: Callable[[str], AbstractEntity],
+            apply: Callable[[AbstractEntity, AbstractEvent], None],
+            snapshot_every: int | None = 100,
+    ):
+        """
+        Stores the entities as the streams of their events, by their ids.
+        An entity is rehydrated by create(id_), followed by apply(entity, event) of each of its events -
+        or from its latest snapshot, followed by the events after it. An entity is snapshot on commit,
+        whenever its version crosses a multiple of snapshot_every.
+        """
+        if snapshot_every is not None and snapshot_every < 1:
+            raise ValueError(f'snapshot_every must be positive, got {snapshot_every}')
+        self._store = store
+        self._create = create
+        self._apply = apply
+        self._snapshot_every = snapshot_every
+        self._staged: dict[str, tuple[AbstractEntity, list[AbstractEvent]]] = {}
+
+    def get_by_id(self, id_: str) -> AbstractEntity:
+        snapshot = self._store.load_snapshot(id_)
+        if snapshot is None:
+            version, entity = 0, self._create(id_)
+        else:
+            version, entity = snapshot
+        events = self._store.load(id_, after_version=version)
+        if snapshot is None and not events:
+            raise BoundedContextError(NOT_FOUND, f'Entity with ID "{id_}" does not exist')
+        for event in events:
+            self._apply(entity, event)
+        entity.set_version(version + len(events))
+        return entity
+
+    def save(self, entity: AbstractEntity) -> None:
+        """
+        Stages the events pending on the entity, to be appended to its stream on commit.
+        As its handler pulls these events afterwards, an entity should be saved once per unit of work.
+        """
+        self._staged[entity.get_id()] = (entity, entity.events)
+
+    def commit(self) -> None:
+        """
+        Appends the staged events of each entity atomically (though not of all the entities at once),
+        raising a ConflictError if its stream was appended to since the entity was loaded.
+        """
+        staged, self._staged = self._staged, {}
+        for id_, (entity, events) in staged.items():
+            loaded_version = entity.get_version()
+            version = self._store.append(id_, events, expected_version=loaded_version)
+            entity.set_version(version)
+            every = self._snapshot_every
+            if every is not None and version // every > loaded_version // every:
+                snapshot = copy.copy(entity)
+                snapshot.pull_events()
+                self._store.save_snapshot(id_, version, snapshot)
+
+    def rollback(self) -> None:
+        self._staged.clear()
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import abc
-import collections
-from typing import Generic, TypeVar, Union
+from types import MappingProxyType
+from typing import Generic, Sequence, Type, TypeVar, Union
 
 from ddd.handlers import AbstractCommandHandler, AbstractEventHandler, CreateCommandHandler, CreateEventHandler, \
     AbstractAsyncCommandHandler, CreateAsyncCommandHandler, CreateAsyncEventHandler, AbstractAsyncEventHandler
+from ddd.model import AbstractCommand, AbstractEvent
+from ddd.scopes import HandlerProvider, HandlerScope, TRANSIENT
 
 TCreateCommandHandler = TypeVar('TCreateCommandHandler', bound=Union[CreateCommandHandler, CreateAsyncCommandHandler])
 TAbstractCommandHandler = TypeVar(
@@ -17,18 +19,123 @@ TAbstractEventHandler = TypeVar(
 )
 
 
-class _AbstractCommandHandlerFactory(Generic[TCreateCommandHandler, TAbstractCommandHandler], abc.ABC):
+CommandKey = Union[str, Type[AbstractCommand]]
+EventKey = Union[str, Type[AbstractEvent]]
+
+
+def _key_name(key: CommandKey | EventKey) -> str:
+    return key if isinstance(key, str) else key.__name__
+
+
+def _named_subclasses(base: type) -> dict[type, str]:
+    """The names of base and of its loaded subclasses, for those whose name is a class attribute (e.g. ddd.Command)."""
+    names: dict[type, str] = {}
+    seen = {base}
+    pending = [base]
+    while pending:
+        cls = pending.pop()
+        name = getattr(cls, 'name', None)
+        if isinstance(name, str):
+            names[cls] = name
+        for subclass in cls.__subclasses__():
+            if subclass not in seen:
+                seen.add(subclass)
+                pending.append(subclass)
+    return names
+
+
+class _FreezableFactory(abc.ABC):
     def __init__(self):
-        self._handler_factories: dict[str, TCreateCommandHandler] = {}
+        self._frozen = False
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
 
-    def register(self, command_name: str, factory: TCreateCommandHandler) -> None:
-        self._handler_factories[command_name] = factory
+    def freeze(self) -> None:
+        """Compiles the registrations into read-only lookup tables and rejects any further registration."""
+        if not self._frozen:
+            self._compile()
+            self._frozen = True
 
-    def create_handler(self, command_name: str) -> TAbstractCommandHandler:
-        factory = self._handler_factories.get(command_name)
-        if not factory:
-            raise ValueError(f'Handler factory was not registered for command: "{command_name}"')
-        return factory()
+    @abc.abstractmethod
+    def _compile(self) -> None:
+        raise NotImplementedError
+
+    def _validate_not_frozen(self, key: CommandKey | EventKey) -> None:
+        if self._frozen:
+            raise ValueError(
+                f'Cannot register a handler factory for "{_key_name(key)}" after the factory was frozen'
+            )
+
+
+class _AbstractCommandHandlerFactory(
+    Generic[TCreateCommandHandler, TAbstractCommandHandler], _FreezableFactory, abc.ABC
+):
+    """
+    Handler factories are registered either by command name or by command class.
+    A command is handled by the factory registered for its name, or else for the most specific class in its MRO.
+    The resolution is cached per command class, assuming that all the instances of a class share the same name.
+    Once frozen, the resolutions of the loaded command classes named by a class attribute are compiled into a
+    read-only table, while the others (e.g. named by a property, or loaded since) are resolved on their first command.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._handler_providers: dict[CommandKey, HandlerProvider[TAbstractCommandHandler]] = {}
+        self._resolved: dict[type, tuple[str, HandlerProvider[TAbstractCommandHandler]]] = {}
+        self._late_resolved: dict[type, tuple[str, HandlerProvider[TAbstractCommandHandler]]] = self._resolved
+
+    def register(
+            self, command_name: CommandKey, factory: TCreateCommandHandler, scope: HandlerScope = TRANSIENT
+    ) -> None:
+        self._validate_not_frozen(command_name)
+        self._handler_providers[command_name] = scope.create_provider(factory)
+        self._resolved.clear()
+
+    def create_handler(self, command: AbstractCommand | str) -> TAbstractCommandHandler:
+        return self._get_provider(command).acquire()
+
+    def release_handler(self, command: AbstractCommand | str, handler: TAbstractCommandHandler) -> None:
+        self._get_provider(command).release(handler)
+
+    def _get_provider(self, command: AbstractCommand | str) -> HandlerProvider[TAbstractCommandHandler]:
+        if isinstance(command, str):
+            provider = self._handler_providers.get(command)
+            if not provider:
+                raise ValueError(f'Handler factory was not registered for command: "{command}"')
+            return provider
+        command_type = type(command)
+        name = command.name
+        resolved = self._resolved.get(command_type) or self._late_resolved.get(command_type)
+        if resolved is not None and resolved[0] == name:
+            return resolved[1]
+        provider = self._resolve(command_type, name)
+        if provider is None:
+            raise ValueError(f'Handler factory was not registered for command: "{name}"')
+        self._late_resolved[command_type] = (name, provider)
+        return provider
+
+    def _resolve(self, command_type: type, name: str) -> HandlerProvider[TAbstractCommandHandler] | None:
+        provider = self._handler_providers.get(name)
+        if provider:
+            return provider
+        for cls in command_type.__mro__:
+            provider = self._handler_providers.get(cls)
+            if provider:
+                return provider
+        return None
+
+    def _compile(self) -> None:
+        self._handler_providers = MappingProxyType(dict(self._handler_providers))
+        resolved = {}
+        for command_type, name in _named_subclasses(AbstractCommand).items():
+            provider = self._resolve(command_type, name)
+            if provider is not None:
+                resolved[command_type] = (name, provider)
+        self._resolved = MappingProxyType(resolved)
+        # The classes missing from the compiled table are cached apart from it, once resolved
+        self._late_resolved = {}
 
 
 class CommandHandlerFactory(_AbstractCommandHandlerFactory[CreateCommandHandler, AbstractCommandHandler]):
@@ -41,20 +148,65 @@ class AsyncCommandHandlerFactory(
     """AsyncCommandHandlerFactory"""
 
 
-class _AbstractEventHandlersFactory(Generic[TCreateEventHandler, TAbstractEventHandler], abc.ABC):
+class _AbstractEventHandlersFactory(Generic[TCreateEventHandler, TAbstractEventHandler], _FreezableFactory, abc.ABC):
+    """
+    Handler factories are registered either by event name or by event class - including base classes,
+    where AbstractEvent subscribes to all events.
+    An event is handled by the factories registered for its name or for any class in its MRO, in registration order.
+    The resolution is cached per event class, assuming that all the instances of a class share the same name.
+    Once frozen, the resolutions of the loaded event classes named by a class attribute are compiled into a
+    read-only table, while the others (e.g. named by a property, or loaded since) are resolved on their first event.
+    """
+
     def __init__(self):
-        self._handler_factories: dict[str, [TCreateEventHandler]] = collections.defaultdict(list)
-
-    def register(self, event_name: str, factory: TCreateEventHandler) -> None:
-        self._handler_factories[event_name].append(factory)
-
-    def create_handlers(self, event_name: str) -> list[TAbstractEventHandler]:
-        factories = self._handler_factories[event_name]
-        result = []
-        for factory in factories:
-            handler = factory()
-            result.append(handler)
-        return result
+        super().__init__()
+        self._registrations: Sequence[tuple[EventKey, HandlerProvider[TAbstractEventHandler]]] = []
+        self._handler_providers: dict[str, Sequence[HandlerProvider[TAbstractEventHandler]]] = {}
+        self._resolved: dict[type, tuple[str, Sequence[HandlerProvider[TAbstractEventHandler]]]] = {}
+        self._late_resolved: dict[type, tuple[str, Sequence[HandlerProvider[TAbstractEventHandler]]]] = self._resolved
+
+    def register(self, event_name: EventKey, factory: TCreateEventHandler, scope: HandlerScope = TRANSIENT) -> None:
+        self._validate_not_frozen(event_name)
+        provider = scope.create_provider(factory)
+        self._registrations.append((event_name, provider))
+        if isinstance(event_name, str):
+            self._handler_providers.setdefault(event_name, []).append(provider)
+        self._resolved.clear()
+
+    def create_handlers(self, event: AbstractEvent | str) -> list[TAbstractEventHandler]:
+        return [provider.acquire() for provider in self._get_providers(event)]
+
+    def release_handlers(self, event: AbstractEvent | str, handlers: list[TAbstractEventHandler]) -> None:
+        for provider, handler in zip(self._get_providers(event), handlers):
+            provider.release(handler)
+
+    def _get_providers(self, event: AbstractEvent | str) -> Sequence[HandlerProvider[TAbstractEventHandler]]:
+        if isinstance(event, str):
+            return self._handler_providers.get(event, ())
+        event_type = type(event)
+        name = event.name
+        resolved = self._resolved.get(event_type) or self._late_resolved.get(event_type)
+        if resolved is not None and resolved[0] == name:
+            return resolved[1]
+        providers = self._resolve(event_type, name)
+        self._late_resolved[event_type] = (name, providers)
+        return providers
+
+    def _resolve(self, event_type: type, name: str) -> Sequence[HandlerProvider[TAbstractEventHandler]]:
+        mro = set(event_type.__mro__)
+        return tuple(provider for key, provider in self._registrations if key == name or key in mro)
+
+    def _compile(self) -> None:
+        self._registrations = tuple(self._registrations)
+        self._handler_providers = MappingProxyType({
+            event_name: tuple(providers) for event_name, providers in self._handler_providers.items()
+        })
+        self._resolved = MappingProxyType({
+            event_type: (name, self._resolve(event_type, name))
+            for event_type, name in _named_subclasses(AbstractEvent).items()
+        })
+        # The classes missing from the compiled table are cached apart from it, once resolved
+        self._late_resolved = {}
 
 
 class EventHandlersFactory(_AbstractEventHandlersFactory[CreateEventHandler, AbstractEventHandler]):
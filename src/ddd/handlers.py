@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import abc
-from typing import TypeVar, Generic, Callable
+from typing import TypeVar, Generic, Callable, Sequence, Union
 
+from ddd.batch import CommandBatch
 from ddd.model import AbstractCommand, AbstractEvent
 from ddd.repository import RollbackCommitter, AsyncRollbackCommitter
 
@@ -17,25 +18,96 @@ class _EventsReporter(abc.ABC):
     def events(self) -> list[AbstractEvent]:
         raise NotImplementedError
 
+    def pull_events(self) -> list[AbstractEvent]:
+        """
+        Hands over the events raised since the last pull and forgets them, which the message bus calls once per
+        handled message. Handlers should override it to hand over their events without copying them
+        (see AbstractEntity.pull_events); it falls back to the events property otherwise.
+        """
+        return self.events
 
-class AbstractCommandHandler(Generic[TCommand, THandleCommandResult], _EventsReporter, RollbackCommitter, abc.ABC):
+
+class _ResourcesReporter(abc.ABC):
+    @property
+    def resources(self) -> Sequence[Union[RollbackCommitter, AsyncRollbackCommitter]]:
+        """
+        The committers this handler writes to.
+        Declaring them allows the message bus to commit a shared committer once for many handlers,
+        in which case the bus commits and rolls back the resources instead of calling the handler's own
+        commit and rollback.
+        """
+        return ()
+
+
+class _Resettable(abc.ABC):
+    def reset(self) -> None:
+        """Clears the state left by the previous message, before a singleton or pooled handler is reused."""
+
+
+class AbstractCommandHandler(
+    Generic[TCommand, THandleCommandResult],
+    _EventsReporter,
+    _ResourcesReporter,
+    _Resettable,
+    RollbackCommitter,
+    abc.ABC,
+):
     def handle(self, command: TCommand) -> THandleCommandResult:
         raise NotImplementedError
 
 
 class AbstractAsyncCommandHandler(
-    Generic[TCommand, THandleCommandResult], _EventsReporter, AsyncRollbackCommitter, abc.ABC
+    Generic[TCommand, THandleCommandResult],
+    _EventsReporter,
+    _ResourcesReporter,
+    _Resettable,
+    AsyncRollbackCommitter,
+    abc.ABC,
 ):
     async def handle(self, command: TCommand) -> THandleCommandResult:
         raise NotImplementedError
 
 
-class AbstractEventHandler(Generic[TEvent], _EventsReporter, RollbackCommitter, abc.ABC):
+class AbstractBatchCommandHandler(AbstractCommandHandler[TCommand, THandleCommandResult], abc.ABC):
+    @abc.abstractmethod
+    def handle_batch(self, batch: CommandBatch[TCommand]) -> Sequence[THandleCommandResult | Exception]:
+        """
+        Handles the commands of the batch at once, e.g. by loading & saving all their entities in one round trip,
+        returning a result per command - or the error of a command that was rejected (and left no changes).
+        MessageBus.publish_batch hands over all the commands of its batch of the type in a single batch.
+        """
+        raise NotImplementedError
+
+    def handle(self, command: TCommand) -> THandleCommandResult:
+        result = self.handle_batch(CommandBatch([command]))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class AbstractAsyncBatchCommandHandler(AbstractAsyncCommandHandler[TCommand, THandleCommandResult], abc.ABC):
+    @abc.abstractmethod
+    async def handle_batch(self, batch: CommandBatch[TCommand]) -> Sequence[THandleCommandResult | Exception]:
+        """The async counterpart of AbstractBatchCommandHandler.handle_batch."""
+        raise NotImplementedError
+
+    async def handle(self, command: TCommand) -> THandleCommandResult:
+        result = (await self.handle_batch(CommandBatch([command])))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class AbstractEventHandler(
+    Generic[TEvent], _EventsReporter, _ResourcesReporter, _Resettable, RollbackCommitter, abc.ABC
+):
     def handle(self, event: TEvent) -> None:
         raise NotImplementedError
 
 
-class AbstractAsyncEventHandler(Generic[TEvent], _EventsReporter, RollbackCommitter, abc.ABC):
+class AbstractAsyncEventHandler(
+    Generic[TEvent], _EventsReporter, _ResourcesReporter, _Resettable, RollbackCommitter, abc.ABC
+):
     async def handle(self, event: TEvent) -> None:
         raise NotImplementedError
 
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from typing import Any, Generic, TypeVar
+
+TKey = TypeVar('TKey', bound=Hashable)
+TValue = TypeVar('TValue')
+
+
+class AsyncBatchLoader(Generic[TKey, TValue]):
+    def __init__(
+            self,
+            load_many: Callable[[list[TKey]], Awaitable[Mapping[TKey, TValue]]],
+            max_batch_size: int | None = None,
+    ):
+        """
+        Coalesces the loads requested during the same event loop iteration into calls of load_many(keys),
+        each of up to max_batch_size distinct keys, which returns the found values by key.
+        Loads of the same key share its value - which is None when the key was not found.
+        """
+        if max_batch_size is not None and max_batch_size < 1:
+            raise ValueError(f'max_batch_size must be positive, got {max_batch_size}')
+        self._load_many = load_many
+        self._max_batch_size = max_batch_size
+        self._pending: dict[TKey, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.loads = 0
+        self.batches = 0
+
+    async def load(self, key: TKey) -> TValue | None:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+        self.loads += 1
+        # Shielded, so that a cancelled load does not cancel the other loads of the same key
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        keys = list(pending)
+        size = self._max_batch_size or len(keys)
+        for i in range(0, len(keys), size):
+            task = asyncio.create_task(self._load_batch({key: pending[key] for key in keys[i:i + size]}))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, futures: dict[TKey, asyncio.Future]) -> None:
+        self.batches += 1
+        try:
+            values: Mapping[TKey, Any] = await self._load_many(list(futures))
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(values.get(key))
@@ -1,61 +1,831 @@
 from __future__ import annotations
 
+import asyncio
 import collections
+import concurrent.futures
+import dataclasses
+import functools
+from collections.abc import Awaitable, Callable, Iterable, Sequence
 from typing import Deque, Any
 
+from ddd.batch import CommandBatch
+from ddd.error import EventHandlersError
 from ddd.factories import CommandHandlerFactory, EventHandlersFactory, AsyncCommandHandlerFactory, \
     AsyncEventHandlersFactory
+from ddd.handlers import AbstractCommandHandler, AbstractAsyncCommandHandler, AbstractAsyncEventHandler, \
+    AbstractBatchCommandHandler, AbstractAsyncBatchCommandHandler
+from ddd.middleware import Interceptor, Stage
+from ddd.outbox import AbstractOutbox, OutboxWriter
 from ddd.model import AbstractEvent, AbstractCommand
-from ddd.unit_of_work import CommandUnitOfWork, EventUnitOfWork, AsyncCommandUnitOfWork, AsyncEventUnitOfWork
+from ddd.repository import SavepointRollbackCommitter, AsyncSavepointRollbackCommitter
+from ddd.retry import RetryPolicy
+from ddd.tracing import Trace, Tracer
+from ddd.unit_of_work import CommandUnitOfWork, EventUnitOfWork, AsyncCommandUnitOfWork, AsyncEventUnitOfWork, \
+    Handler, AsyncHandler, Message, CommitGroup, AsyncCommitGroup, GroupCommitEventUnitOfWork, \
+    AsyncGroupCommitEventUnitOfWork, AbstractUnitOfWork, AbstractAsyncUnitOfWork, CommandBatchUnitOfWork, \
+    AsyncCommandBatchUnitOfWork
+from ddd.validation import validate_batch
+
+
+@dataclasses.dataclass
+class CommandResult:
+    command: AbstractCommand
+    result: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _set_batch_results(group: list[CommandResult], batch_results: Sequence[Any]) -> None:
+    """Reports the results of a CommandBatch, in which an error is the rejection of its command."""
+    if len(batch_results) != len(group):
+        raise ValueError(f'Expected {len(group)} results of the command batch, got {len(batch_results)}')
+    for command_result, batch_result in zip(group, batch_results):
+        if isinstance(batch_result, Exception):
+            command_result.error = batch_result
+        else:
+            command_result.result = batch_result
+
+
+def _supports_savepoints(resources: list, savepoint_type: type) -> bool:
+    """Whether the handler's resources can all be rolled back to savepoints, so that they are committed in batch."""
+    return bool(resources) and all(isinstance(resource, savepoint_type) for resource in resources)
+
+
+def _stage_in_outbox(handler: Handler | AsyncHandler, events: list[AbstractEvent]) -> None:
+    """Stages the events on the OutboxWriter the handler writes to, which appends them to the outbox on commit."""
+    if not events:
+        return
+    for resource in handler.resources:
+        if isinstance(resource, OutboxWriter):
+            resource.stage_events(events)
+            return
+    raise ValueError(
+        f'None of the resources of {type(handler).__name__} is an OutboxWriter, to append its events to the outbox'
+    )
 
 
 class MessageBus:
-    def __init__(self, command_handler_factory: CommandHandlerFactory, event_handlers_factory: EventHandlersFactory):
+    def __init__(
+            self,
+            command_handler_factory: CommandHandlerFactory,
+            event_handlers_factory: EventHandlersFactory,
+            intercept: Interceptor | None = None,
+            tracer: Tracer | None = None,
+            executor: concurrent.futures.Executor | None = None,
+            group_commit: bool = False,
+            checkpoint_every: int | None = None,
+            outbox: AbstractOutbox | None = None,
+            retry_policy: RetryPolicy | None = None,
+    ):
+        """
+        intercept is the compiled middlewares chain (see ddd.middleware.compile_middlewares), if any.
+        The tracer, if any, records a span per handler invocation of the sampled commands.
+        When an executor is given, the handlers of an event run concurrently on it (each within its own unit of work),
+        so that the handlers not failing commit even if others fail.
+        The events raised by the handlers are queued in registration order either way.
+        With group_commit, the resources declared by the event handlers of a cascade are committed once,
+        after its last event (and after every checkpoint_every handled events, if set).
+        Once any event handler fails, all the resources not committed yet are rolled back.
+        With an outbox, the events raised by a command handler are staged on the OutboxWriter among its resources
+        (e.g. a repository sharing the outbox's database), which appends them within the transaction of its commit,
+        to be dispatched later (see ddd.outbox) instead of being handled right away.
+        With a retry_policy, the unit of work of a published command (but not its event cascade) is retried
+        on the errors of the policy, e.g. on a ConflictError raised by an optimistic concurrency check.
+        """
         self._command_handler_factory = command_handler_factory
         self._event_handlers_factory = event_handlers_factory
         self._events: Deque[AbstractEvent] = collections.deque()
+        self._intercept = intercept
+        self._tracer = tracer
+        self._trace: Trace | None = None
+        self._executor = executor
+        self._commit_group = CommitGroup() if group_commit else None
+        self._checkpoint_every = checkpoint_every if group_commit else None
+        self._events_since_checkpoint = 0
+        self._event_unit_of_work_type: Callable[..., AbstractUnitOfWork] = EventUnitOfWork
+        if group_commit:
+            self._event_unit_of_work_type = functools.partial(GroupCommitEventUnitOfWork, group=self._commit_group)
+        self._outbox = outbox
+        self._retry_policy = retry_policy
 
     def publish(self, command: AbstractCommand) -> Any:
-        command.validate()
-        handler = self._command_handler_factory.create_handler(command.name)
-        with CommandUnitOfWork(handler) as uow:
-            result = uow.handle(command)
-            self._events.extend(handler.events)
+        if self._tracer is not None:
+            self._trace = self._tracer.start_trace()
+        if self._intercept is None:
+            return self._publish(command)
+        return self._intercept(Stage.COMMAND, command, self._publish, command)
+
+    def _publish(self, command: AbstractCommand) -> Any:
+        if self._retry_policy is None:
+            result, events = self._handle_command(command)
+        else:
+            result, events = self._retry_policy.call(self._handle_command, command)
+        if self._outbox is None:
+            self._events.extend(events)
         self._handle_events()
         return result
 
+    def _handle_command(self, command: AbstractCommand) -> tuple[Any, list[AbstractEvent]]:
+        handler = self._create_command_handler(command)
+        try:
+            return self._handle_in_unit_of_work(
+                CommandUnitOfWork, command, handler, stage_events=self._outbox is not None
+            )
+        finally:
+            self._command_handler_factory.release_handler(command, handler)
+
+    def publish_events(self, events: Iterable[AbstractEvent]) -> None:
+        """Handles the events (e.g. dispatched from an outbox) along with the events they raise."""
+        if self._tracer is not None:
+            self._trace = self._tracer.start_trace()
+        self._events.extend(events)
+        self._handle_events()
+
+    def _handle_in_unit_of_work(
+            self,
+            unit_of_work_type: Callable[..., AbstractUnitOfWork],
+            message: Message,
+            handler: Handler,
+            parent_id: int | None = None,
+            stage_events: bool = False,
+    ) -> tuple[Any, list[AbstractEvent]]:
+        """
+        Handles the message within a unit of work, returning the handler's result and raised events -
+        which are staged in the outbox before the commit, with stage_events.
+        """
+        trace = self._trace
+        if trace is None:
+            with unit_of_work_type(handler, self._intercept) as uow:
+                result = uow.handle(message)
+                events = handler.pull_events()
+                if stage_events:
+                    _stage_in_outbox(handler, events)
+            return result, events
+        span = trace.start_span(message, handler, parent_id)
+        try:
+            with unit_of_work_type(handler, self._intercept) as uow:
+                result = uow.handle(message)
+                events = handler.pull_events()
+                if stage_events:
+                    _stage_in_outbox(handler, events)
+                trace.handled(span, events)
+        except Exception as e:
+            trace.end_span(span, e)
+            raise
+        trace.end_span(span)
+        return result, events
+
+    def _create_command_handler(self, command: AbstractCommand, validated: bool = False) -> AbstractCommandHandler:
+        if self._intercept is None:
+            if not validated:
+                command.validate()
+            return self._command_handler_factory.create_handler(command)
+        self._intercept(Stage.VALIDATE, command, command.validate)
+        return self._intercept(Stage.CREATE_HANDLER, command, self._command_handler_factory.create_handler, command)
+
+    def publish_batch(self, commands: Iterable[AbstractCommand]) -> list[CommandResult]:
+        """
+        Handles every command within its own unit of work and reports a CommandResult per command.
+        Handlers whose resources all support savepoints are not committed one by one:
+        a failing command only rolls back to the savepoints taken before it was handled,
+        and each shared resource is committed once after the last command.
+        Events are handled after that commit, in the order of the commands that raised them.
+        The commands are validated at once beforehand (see ddd.validate_batch).
+        The commands handled by an AbstractBatchCommandHandler are instead handed over to it in a single
+        CommandBatch per type, in place of the first of them, and their events are handled together.
+        """
+        commands = list(commands)
+        # Validated at once, unless the validation is intercepted by the middlewares
+        validated = self._intercept is None
+        errors = validate_batch(commands) if validated else [None] * len(commands)
+        results = [CommandResult(command, error=error) for command, error in zip(commands, errors)]
+        handled = [error is not None for error in errors]
+        resources = CommitGroup()
+        pending: list[CommandResult] = []
+        events_by_results = []
+        for i in range(len(results)):
+            if not handled[i]:
+                events_by_results.append(self._handle_in_batch(results, handled, i, validated, resources, pending))
+        self._commit_batch(resources, pending)
+        # With an outbox, the events were appended to it by the commits
+        if self._outbox is None:
+            self._handle_batch_events(events_by_results)
+        return results
+
+    def _handle_in_batch(
+            self,
+            results: list[CommandResult],
+            handled: list[bool],
+            i: int,
+            validated: bool,
+            resources: CommitGroup,
+            pending: list[CommandResult],
+    ) -> tuple[list[CommandResult], list[AbstractEvent], Trace | None]:
+        """
+        Handles the command at i - along with the following commands of its type, by an AbstractBatchCommandHandler -
+        returning their results and events, and the trace they were handled in.
+        """
+        command_result = results[i]
+        command = command_result.command
+        group = [command_result]
+        events: list[AbstractEvent] = []
+        if self._tracer is not None:
+            self._trace = self._tracer.start_trace()
+        try:
+            handler = self._create_command_handler(command, validated)
+            try:
+                if isinstance(handler, AbstractBatchCommandHandler):
+                    group = self._group_commands(results, handled, i, validated)
+                    events = self._handle_command_batch(group, handler, resources, pending)
+                else:
+                    events = self._handle_batched_command(command_result, handler, resources, pending)
+            finally:
+                self._command_handler_factory.release_handler(command, handler)
+        except Exception as e:
+            for grouped_result in group:
+                grouped_result.error = e
+        return group, events, self._trace
+
+    def _handle_batch_events(
+            self, events_by_results: list[tuple[list[CommandResult], list[AbstractEvent], Trace | None]]
+    ) -> None:
+        """Handles the events of the committed commands, in order, reporting their failure on these commands."""
+        for group, events, trace in events_by_results:
+            committed = [command_result for command_result in group if command_result.ok]
+            if not committed:
+                continue
+            self._trace = trace
+            self._events.extend(events)
+            try:
+                self._handle_events()
+            except Exception as e:
+                self._events.clear()
+                for command_result in committed:
+                    command_result.error = e
+
+    def _group_commands(
+            self, results: list[CommandResult], handled: list[bool], start: int, validated: bool
+    ) -> list[CommandResult]:
+        """The results of the commands of the type of the command at start, not handled yet - which now are."""
+        command_type = type(results[start].command)
+        group = []
+        for i in range(start, len(results)):
+            command_result = results[i]
+            if handled[i] or type(command_result.command) is not command_type:
+                continue
+            handled[i] = True
+            if not validated and i != start:
+                command = command_result.command
+                try:
+                    self._intercept(Stage.VALIDATE, command, command.validate)
+                except Exception as e:
+                    command_result.error = e
+                    continue
+            group.append(command_result)
+        return group
+
+    def _handle_command_batch(
+            self,
+            group: list[CommandResult],
+            handler: AbstractBatchCommandHandler,
+            resources: CommitGroup,
+            pending: list[CommandResult],
+    ) -> list[AbstractEvent]:
+        batch = CommandBatch([command_result.command for command_result in group])
+        if _supports_savepoints(handler.resources, SavepointRollbackCommitter):
+            def handle() -> None:
+                _set_batch_results(group, self._intercept_handle(handler.handle_batch, batch))
+
+            events = self._handle_at_savepoints(batch, handler, handle)
+            resources.add(handler.resources)
+            pending.extend(command_result for command_result in group if command_result.ok)
+            return events
+        # The handler may share resources with the pending commands, which must not be rolled back
+        self._commit_batch(resources, pending)
+        batch_results, events = self._handle_in_unit_of_work(
+            CommandBatchUnitOfWork, batch, handler, stage_events=self._outbox is not None
+        )
+        _set_batch_results(group, batch_results)
+        return events
+
+    def _handle_batched_command(
+            self,
+            command_result: CommandResult,
+            handler: AbstractCommandHandler,
+            resources: CommitGroup,
+            pending: list[CommandResult],
+    ) -> list[AbstractEvent]:
+        if _supports_savepoints(handler.resources, SavepointRollbackCommitter):
+            def handle() -> None:
+                command_result.result = self._intercept_handle(handler.handle, command_result.command)
+
+            events = self._handle_at_savepoints(command_result.command, handler, handle)
+            resources.add(handler.resources)
+            pending.append(command_result)
+            return events
+        # The handler may share resources with the pending commands, which must not be rolled back
+        self._commit_batch(resources, pending)
+        command_result.result, events = self._handle_in_unit_of_work(
+            CommandUnitOfWork, command_result.command, handler, stage_events=self._outbox is not None
+        )
+        return events
+
+    def _handle_at_savepoints(
+            self, message: Message, handler: Handler | AbstractBatchCommandHandler, handle: Callable[[], None]
+    ) -> list[AbstractEvent]:
+        """
+        Handles the message by handle() without committing the handler's resources, which are committed along with
+        the whole batch - returning the raised events, or rolling the resources back to their savepoints on failure.
+        The span of the message thus ends once it is handled.
+        """
+        savepoints = [(resource, resource.savepoint()) for resource in handler.resources]
+        span = None if self._trace is None else self._trace.start_span(message, handler, None)
+        try:
+            handle()
+            events = handler.pull_events()
+            if self._outbox is not None:
+                _stage_in_outbox(handler, events)
+        except Exception as e:
+            for resource, savepoint in reversed(savepoints):
+                resource.rollback_to_savepoint(savepoint)
+            if span is not None:
+                self._trace.end_span(span, e)
+            raise
+        if span is not None:
+            self._trace.handled(span, events)
+            self._trace.end_span(span)
+        return events
+
+    def _intercept_handle(self, handle: Callable[[Message], Any], message: Message) -> Any:
+        if self._intercept is None:
+            return handle(message)
+        return self._intercept(Stage.HANDLE, message, handle, message)
+
+    @classmethod
+    def _commit_batch(cls, resources: CommitGroup, pending: list[CommandResult]) -> None:
+        try:
+            resources.commit()
+        except Exception as e:
+            for command_result in pending:
+                command_result.error = e
+        finally:
+            pending.clear()
+
     def _handle_events(self) -> None:
+        if self._commit_group is None:
+            self._dispatch_events()
+            return
+        try:
+            self._dispatch_events()
+        except Exception:
+            self._commit_group.rollback()
+            raise
+        self._commit_group.commit()
+
+    def _dispatch_events(self) -> None:
         while self._events:
             event = self._events.popleft()
-            handlers = self._event_handlers_factory.create_handlers(event.name)
-            for handler in handlers:
-                with EventUnitOfWork(handler) as uow:
-                    uow.handle(event)
-                    self._events.extend(handler.events)
+            if self._intercept is None:
+                self._handle_event(event)
+            else:
+                self._intercept(Stage.EVENT, event, self._handle_event, event)
+            if self._checkpoint_every:
+                self._checkpoint(1)
+
+    def _checkpoint(self, handled_events: int) -> None:
+        self._events_since_checkpoint += handled_events
+        if self._events_since_checkpoint >= self._checkpoint_every:
+            self._events_since_checkpoint = 0
+            self._commit_group.commit()
+
+    def _handle_event(self, event: AbstractEvent) -> None:
+        if self._intercept is None:
+            handlers = self._event_handlers_factory.create_handlers(event)
+        else:
+            handlers = self._intercept(Stage.CREATE_HANDLER, event, self._event_handlers_factory.create_handlers, event)
+        parent_id = None if self._trace is None else self._trace.parent_of(event)
+        try:
+            if self._executor is None or len(handlers) < 2:
+                for handler in handlers:
+                    _, events = self._handle_in_unit_of_work(self._event_unit_of_work_type, event, handler, parent_id)
+                    self._events.extend(events)
+            else:
+                self._handle_event_concurrently(event, handlers, parent_id)
+        finally:
+            self._event_handlers_factory.release_handlers(event, handlers)
+
+    def _handle_event_concurrently(
+            self, event: AbstractEvent, handlers: list[Handler], parent_id: int | None
+    ) -> None:
+        futures = [
+            self._executor.submit(
+                self._handle_in_unit_of_work, self._event_unit_of_work_type, event, handler, parent_id
+            )
+            for handler in handlers
+        ]
+        concurrent.futures.wait(futures)
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if len(errors) == 1:
+            raise errors[0]
+        if errors:
+            raise EventHandlersError(errors)
+        for future in futures:
+            _, events = future.result()
+            self._events.extend(events)
 
 
 class AsyncMessageBus:
     def __init__(
-            self, command_handler_factory: AsyncCommandHandlerFactory, event_handlers_factory: AsyncEventHandlersFactory
+            self,
+            command_handler_factory: AsyncCommandHandlerFactory,
+            event_handlers_factory: AsyncEventHandlersFactory,
+            concurrent_events: bool = False,
+            max_concurrency: int | None = None,
+            concurrent_cascade_levels: bool = False,
+            intercept: Interceptor | None = None,
+            tracer: Tracer | None = None,
+            group_commit: bool = False,
+            checkpoint_every: int | None = None,
+            outbox: AbstractOutbox | None = None,
+            retry_policy: RetryPolicy | None = None,
     ):
+        """
+        When concurrent_events is set, the handlers of an event run concurrently (each within its own unit of work),
+        at most max_concurrency at a time. With concurrent_cascade_levels, all the events of a cascade level are
+        handled together. The events raised by the handlers are queued in registration order either way.
+        intercept is the compiled async middlewares chain (see ddd.middleware.compile_async_middlewares), if any;
+        the event stage is not intercepted when the events are handled concurrently.
+        The tracer, if any, records a span per handler invocation of the sampled commands.
+        With group_commit, the resources declared by the event handlers of a cascade are committed once,
+        after its last event (and after every checkpoint_every handled events, if set).
+        Once any event handler fails, all the resources not committed yet are rolled back.
+        With an outbox, the events raised by a command handler are staged on the OutboxWriter among its resources
+        (e.g. a repository sharing the outbox's database), which appends them within the transaction of its commit,
+        to be dispatched later (see ddd.outbox) instead of being handled right away.
+        With a retry_policy, the unit of work of a published command (but not its event cascade) is retried
+        on the errors of the policy.
+        """
         self._command_handler_factory = command_handler_factory
         self._event_handlers_factory = event_handlers_factory
         self._events: Deque[AbstractEvent] = collections.deque()
+        self._concurrent_events = concurrent_events or concurrent_cascade_levels
+        self._max_concurrency = max_concurrency
+        self._concurrent_cascade_levels = concurrent_cascade_levels
+        self._intercept = intercept
+        self._tracer = tracer
+        self._trace: Trace | None = None
+        self._commit_group = AsyncCommitGroup() if group_commit else None
+        self._checkpoint_every = checkpoint_every if group_commit else None
+        self._events_since_checkpoint = 0
+        self._event_unit_of_work_type: Callable[..., AbstractAsyncUnitOfWork] = AsyncEventUnitOfWork
+        if group_commit:
+            self._event_unit_of_work_type = functools.partial(
+                AsyncGroupCommitEventUnitOfWork, group=self._commit_group
+            )
+        self._outbox = outbox
+        self._retry_policy = retry_policy
 
     async def publish(self, command: AbstractCommand) -> Any:
-        command.validate()
-        handler = self._command_handler_factory.create_handler(command.name)
-        async with AsyncCommandUnitOfWork(handler) as uow:
-            result = await uow.handle(command)
-            self._events.extend(handler.events)
+        if self._tracer is not None:
+            self._trace = self._tracer.start_trace()
+        if self._intercept is None:
+            return await self._publish(command)
+        return await self._intercept(Stage.COMMAND, command, self._publish, command)
+
+    async def _publish(self, command: AbstractCommand) -> Any:
+        if self._retry_policy is None:
+            result, events = await self._handle_command(command)
+        else:
+            result, events = await self._retry_policy.async_call(self._handle_command, command)
+        if self._outbox is None:
+            self._events.extend(events)
         await self._handle_events()
         return result
 
+    async def _handle_command(self, command: AbstractCommand) -> tuple[Any, list[AbstractEvent]]:
+        handler = await self._create_command_handler(command)
+        try:
+            return await self._handle_in_unit_of_work(
+                AsyncCommandUnitOfWork, command, handler, stage_events=self._outbox is not None
+            )
+        finally:
+            self._command_handler_factory.release_handler(command, handler)
+
+    async def publish_events(self, events: Iterable[AbstractEvent]) -> None:
+        """The async counterpart of MessageBus.publish_events."""
+        if self._tracer is not None:
+            self._trace = self._tracer.start_trace()
+        self._events.extend(events)
+        await self._handle_events()
+
+    async def _handle_in_unit_of_work(
+            self,
+            unit_of_work_type: Callable[..., AbstractAsyncUnitOfWork],
+            message: Message,
+            handler: AsyncHandler,
+            parent_id: int | None = None,
+            stage_events: bool = False,
+    ) -> tuple[Any, list[AbstractEvent]]:
+        """
+        Handles the message within a unit of work, returning the handler's result and raised events -
+        which are staged in the outbox before the commit, with stage_events.
+        """
+        trace = self._trace
+        if trace is None:
+            async with unit_of_work_type(handler, self._intercept) as uow:
+                result = await uow.handle(message)
+                events = handler.pull_events()
+                if stage_events:
+                    _stage_in_outbox(handler, events)
+            return result, events
+        span = trace.start_span(message, handler, parent_id)
+        try:
+            async with unit_of_work_type(handler, self._intercept) as uow:
+                result = await uow.handle(message)
+                events = handler.pull_events()
+                if stage_events:
+                    _stage_in_outbox(handler, events)
+                trace.handled(span, events)
+        except Exception as e:
+            trace.end_span(span, e)
+            raise
+        trace.end_span(span)
+        return result, events
+
+    async def _create_command_handler(
+            self, command: AbstractCommand, validated: bool = False
+    ) -> AbstractAsyncCommandHandler:
+        if self._intercept is None:
+            if not validated:
+                command.validate()
+            return self._command_handler_factory.create_handler(command)
+        await self._intercept(Stage.VALIDATE, command, command.validate)
+        return await self._intercept(
+            Stage.CREATE_HANDLER, command, self._command_handler_factory.create_handler, command
+        )
+
+    async def _create_event_handlers(self, event: AbstractEvent) -> list[AbstractAsyncEventHandler]:
+        if self._intercept is None:
+            return self._event_handlers_factory.create_handlers(event)
+        return await self._intercept(Stage.CREATE_HANDLER, event, self._event_handlers_factory.create_handlers, event)
+
+    async def publish_batch(self, commands: Iterable[AbstractCommand]) -> list[CommandResult]:
+        """The async counterpart of MessageBus.publish_batch."""
+        commands = list(commands)
+        # Validated at once, unless the validation is intercepted by the middlewares
+        validated = self._intercept is None
+        errors = validate_batch(commands) if validated else [None] * len(commands)
+        results = [CommandResult(command, error=error) for command, error in zip(commands, errors)]
+        handled = [error is not None for error in errors]
+        resources = AsyncCommitGroup()
+        pending: list[CommandResult] = []
+        events_by_results = []
+        for i in range(len(results)):
+            if not handled[i]:
+                events_by_results.append(
+                    await self._handle_in_batch(results, handled, i, validated, resources, pending)
+                )
+        await self._commit_batch(resources, pending)
+        # With an outbox, the events were appended to it by the commits
+        if self._outbox is None:
+            await self._handle_batch_events(events_by_results)
+        return results
+
+    async def _handle_in_batch(
+            self,
+            results: list[CommandResult],
+            handled: list[bool],
+            i: int,
+            validated: bool,
+            resources: AsyncCommitGroup,
+            pending: list[CommandResult],
+    ) -> tuple[list[CommandResult], list[AbstractEvent], Trace | None]:
+        command_result = results[i]
+        command = command_result.command
+        group = [command_result]
+        events: list[AbstractEvent] = []
+        if self._tracer is not None:
+            self._trace = self._tracer.start_trace()
+        try:
+            handler = await self._create_command_handler(command, validated)
+            try:
+                if isinstance(handler, AbstractAsyncBatchCommandHandler):
+                    group = await self._group_commands(results, handled, i, validated)
+                    events = await self._handle_command_batch(group, handler, resources, pending)
+                else:
+                    events = await self._handle_batched_command(command_result, handler, resources, pending)
+            finally:
+                self._command_handler_factory.release_handler(command, handler)
+        except Exception as e:
+            for grouped_result in group:
+                grouped_result.error = e
+        return group, events, self._trace
+
+    async def _handle_batch_events(
+            self, events_by_results: list[tuple[list[CommandResult], list[AbstractEvent], Trace | None]]
+    ) -> None:
+        for group, events, trace in events_by_results:
+            committed = [command_result for command_result in group if command_result.ok]
+            if not committed:
+                continue
+            self._trace = trace
+            self._events.extend(events)
+            try:
+                await self._handle_events()
+            except Exception as e:
+                self._events.clear()
+                for command_result in committed:
+                    command_result.error = e
+
+    async def _group_commands(
+            self, results: list[CommandResult], handled: list[bool], start: int, validated: bool
+    ) -> list[CommandResult]:
+        command_type = type(results[start].command)
+        group = []
+        for i in range(start, len(results)):
+            command_result = results[i]
+            if handled[i] or type(command_result.command) is not command_type:
+                continue
+            handled[i] = True
+            if not validated and i != start:
+                command = command_result.command
+                try:
+                    await self._intercept(Stage.VALIDATE, command, command.validate)
+                except Exception as e:
+                    command_result.error = e
+                    continue
+            group.append(command_result)
+        return group
+
+    async def _handle_command_batch(
+            self,
+            group: list[CommandResult],
+            handler: AbstractAsyncBatchCommandHandler,
+            resources: AsyncCommitGroup,
+            pending: list[CommandResult],
+    ) -> list[AbstractEvent]:
+        batch = CommandBatch([command_result.command for command_result in group])
+        if _supports_savepoints(handler.resources, AsyncSavepointRollbackCommitter):
+            async def handle() -> None:
+                _set_batch_results(group, await self._intercept_handle(handler.handle_batch, batch))
+
+            events = await self._handle_at_savepoints(batch, handler, handle)
+            resources.add(handler.resources)
+            pending.extend(command_result for command_result in group if command_result.ok)
+            return events
+        # The handler may share resources with the pending commands, which must not be rolled back
+        await self._commit_batch(resources, pending)
+        batch_results, events = await self._handle_in_unit_of_work(
+            AsyncCommandBatchUnitOfWork, batch, handler, stage_events=self._outbox is not None
+        )
+        _set_batch_results(group, batch_results)
+        return events
+
+    async def _handle_batched_command(
+            self,
+            command_result: CommandResult,
+            handler: AbstractAsyncCommandHandler,
+            resources: AsyncCommitGroup,
+            pending: list[CommandResult],
+    ) -> list[AbstractEvent]:
+        if _supports_savepoints(handler.resources, AsyncSavepointRollbackCommitter):
+            async def handle() -> None:
+                command_result.result = await self._intercept_handle(handler.handle, command_result.command)
+
+            events = await self._handle_at_savepoints(command_result.command, handler, handle)
+            resources.add(handler.resources)
+            pending.append(command_result)
+            return events
+        # The handler may share resources with the pending commands, which must not be rolled back
+        await self._commit_batch(resources, pending)
+        command_result.result, events = await self._handle_in_unit_of_work(
+            AsyncCommandUnitOfWork, command_result.command, handler, stage_events=self._outbox is not None
+        )
+        return events
+
+    async def _handle_at_savepoints(
+            self,
+            message: Message,
+            handler: AsyncHandler | AbstractAsyncBatchCommandHandler,
+            handle: Callable[[], Awaitable[None]],
+    ) -> list[AbstractEvent]:
+        """The async counterpart of MessageBus._handle_at_savepoints."""
+        savepoints = [(resource, await resource.savepoint()) for resource in handler.resources]
+        span = None if self._trace is None else self._trace.start_span(message, handler, None)
+        try:
+            await handle()
+            events = handler.pull_events()
+            if self._outbox is not None:
+                _stage_in_outbox(handler, events)
+        except Exception as e:
+            for resource, savepoint in reversed(savepoints):
+                await resource.rollback_to_savepoint(savepoint)
+            if span is not None:
+                self._trace.end_span(span, e)
+            raise
+        if span is not None:
+            self._trace.handled(span, events)
+            self._trace.end_span(span)
+        return events
+
+    async def _intercept_handle(self, handle: Callable[[Message], Awaitable[Any]], message: Message) -> Any:
+        if self._intercept is None:
+            return await handle(message)
+        return await self._intercept(Stage.HANDLE, message, handle, message)
+
+    @classmethod
+    async def _commit_batch(cls, resources: AsyncCommitGroup, pending: list[CommandResult]) -> None:
+        try:
+            await resources.commit()
+        except Exception as e:
+            for command_result in pending:
+                command_result.error = e
+        finally:
+            pending.clear()
+
     async def _handle_events(self) -> None:
+        if self._commit_group is None:
+            await self._dispatch_events()
+            return
+        try:
+            await self._dispatch_events()
+        except Exception:
+            await self._commit_group.rollback()
+            raise
+        await self._commit_group.commit()
+
+    async def _dispatch_events(self) -> None:
+        if self._concurrent_events:
+            await self._handle_events_concurrently()
+            return
         while self._events:
             event = self._events.popleft()
-            handlers = self._event_handlers_factory.create_handlers(event.name)
+            if self._intercept is None:
+                await self._handle_event_sequentially(event)
+            else:
+                await self._intercept(Stage.EVENT, event, self._handle_event_sequentially, event)
+            if self._checkpoint_every:
+                await self._checkpoint(1)
+
+    async def _checkpoint(self, handled_events: int) -> None:
+        self._events_since_checkpoint += handled_events
+        if self._events_since_checkpoint >= self._checkpoint_every:
+            self._events_since_checkpoint = 0
+            await self._commit_group.commit()
+
+    async def _handle_event_sequentially(self, event: AbstractEvent) -> None:
+        handlers = await self._create_event_handlers(event)
+        parent_id = None if self._trace is None else self._trace.parent_of(event)
+        try:
             for handler in handlers:
-                async with AsyncEventUnitOfWork(handler) as uow:
-                    await uow.handle(event)
-                    self._events.extend(handler.events)
+                _, events = await self._handle_in_unit_of_work(
+                    self._event_unit_of_work_type, event, handler, parent_id
+                )
+                self._events.extend(events)
+        finally:
+            self._event_handlers_factory.release_handlers(event, handlers)
+
+    async def _handle_events_concurrently(self) -> None:
+        semaphore = asyncio.Semaphore(self._max_concurrency) if self._max_concurrency else None
+        while self._events:
+            if self._concurrent_cascade_levels:
+                level = list(self._events)
+                self._events.clear()
+            else:
+                level = [self._events.popleft()]
+            handlers_by_event = [(event, await self._create_event_handlers(event)) for event in level]
+            try:
+                outcomes = await asyncio.gather(
+                    *(
+                        self._handle_event(event, handler, semaphore)
+                        for event, handlers in handlers_by_event
+                        for handler in handlers
+                    ),
+                    return_exceptions=True,
+                )
+            finally:
+                for event, handlers in handlers_by_event:
+                    self._event_handlers_factory.release_handlers(event, handlers)
+            errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+            if len(errors) == 1:
+                raise errors[0]
+            if errors:
+                raise EventHandlersError(errors)
+            for events in outcomes:
+                self._events.extend(events)
+            if self._checkpoint_every:
+                await self._checkpoint(len(level))
+
+    async def _handle_event(
+            self, event: AbstractEvent, handler: AbstractAsyncEventHandler, semaphore: asyncio.Semaphore | None
+    ) -> list[AbstractEvent]:
+        parent_id = None if self._trace is None else self._trace.parent_of(event)
+        if semaphore is None:
+            _, events = await self._handle_in_unit_of_work(self._event_unit_of_work_type, event, handler, parent_id)
+            return events
+        async with semaphore:
+            _, events = await self._handle_in_unit_of_work(self._event_unit_of_work_type, event, handler, parent_id)
+            return events
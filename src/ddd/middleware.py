@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import abc
+import inspect
+import time
+from collections.abc import Awaitable, Sequence
+from typing import Any, Callable, Union
+
+from ddd.model import AbstractCommand, AbstractEvent
+
+Message = Union[AbstractCommand, AbstractEvent]
+Interceptor = Callable[..., Any]
+
+
+class Stage:
+    """The stages of the message bus that middlewares wrap."""
+    # The whole handling of a command, including its event cascade
+    COMMAND = 'command'
+    # The handling of a single event by all of its handlers
+    EVENT = 'event'
+    VALIDATE = 'validate'
+    CREATE_HANDLER = 'create_handler'
+    HANDLE = 'handle'
+    COMMIT = 'commit'
+    ROLLBACK = 'rollback'
+
+
+class Middleware(abc.ABC):
+    @abc.abstractmethod
+    def __call__(self, stage: str, message: Message, call_next: Callable[[], Any]) -> Any:
+        """Wraps a stage of the message bus, which runs by calling call_next (whose result should be returned)."""
+        raise NotImplementedError
+
+
+class AsyncMiddleware(abc.ABC):
+    @abc.abstractmethod
+    async def __call__(self, stage: str, message: Message, call_next: Callable[[], Awaitable[Any]]) -> Any:
+        """Wraps a stage of the async message bus, which runs by awaiting call_next()."""
+        raise NotImplementedError
+
+
+def compile_middlewares(middlewares: Sequence[Middleware]) -> Interceptor | None:
+    """
+    Nests the middlewares (the first one being the outermost) into a single interceptor,
+    called as interceptor(stage, message, func, *args). Returns None when there are no middlewares,
+    so that the message bus can call the stages directly.
+    """
+    if not middlewares:
+        return None
+    innermost = middlewares[-1]
+
+    def intercept(stage: str, message: Message, func: Callable[..., Any], *args: Any) -> Any:
+        return innermost(stage, message, lambda: func(*args))
+
+    for middleware in reversed(middlewares[:-1]):
+        intercept = _wrap(middleware, intercept)
+    return intercept
+
+
+def _wrap(middleware: Middleware, intercept_next: Interceptor) -> Interceptor:
+    def intercept(stage: str, message: Message, func: Callable[..., Any], *args: Any) -> Any:
+        return middleware(stage, message, lambda: intercept_next(stage, message, func, *args))
+
+    return intercept
+
+
+def compile_async_middlewares(middlewares: Sequence[AsyncMiddleware]) -> Interceptor | None:
+    """The async counterpart of compile_middlewares, where the interceptor accepts both sync and async stages."""
+    if not middlewares:
+        return None
+
+    async def intercept(stage: str, message: Message, func: Callable[..., Any], *args: Any) -> Any:
+        result = func(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    for middleware in reversed(middlewares):
+        intercept = _wrap_async(middleware, intercept)
+    return intercept
+
+
+def _wrap_async(middleware: AsyncMiddleware, intercept_next: Interceptor) -> Interceptor:
+    async def intercept(stage: str, message: Message, func: Callable[..., Any], *args: Any) -> Any:
+        return await middleware(stage, message, lambda: intercept_next(stage, message, func, *args))
+
+    return intercept
+
+
+class LatencyHistogram:
+    """Latencies in nanoseconds, bucketed by powers of two."""
+
+    def __init__(self):
+        # Bucket i counts the latencies whose bit length is i, i.e. from 2 ** (i - 1) up to 2 ** i - 1
+        self._buckets = [0] * 65
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+
+    def record(self, latency_ns: int) -> None:
+        self._buckets[latency_ns.bit_length()] += 1
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+        if latency_ns < self.min_ns or not self.count:
+            self.min_ns = latency_ns
+        self.count += 1
+        self.total_ns += latency_ns
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> int:
+        """The upper bound of the bucket in which the given percentile falls, capped by the maximal latency."""
+        rank = percent / 100 * self.count
+        seen = 0
+        for bit_length, count in enumerate(self._buckets):
+            seen += count
+            if count and seen >= rank:
+                return min((1 << bit_length) - 1, self.max_ns)
+        return self.max_ns
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            'count': self.count,
+            'mean_ns': self.mean_ns,
+            'min_ns': self.min_ns,
+            'p50_ns': self.percentile(50),
+            'p90_ns': self.percentile(90),
+            'p99_ns': self.percentile(99),
+            'max_ns': self.max_ns,
+        }
+
+
+class _LatencyRecorder:
+    def __init__(self):
+        self.histograms: dict[tuple[str, str], LatencyHistogram] = {}
+
+    def _get_histogram(self, stage: str, message: Message) -> LatencyHistogram:
+        key = (stage, message.name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        return histogram
+
+    def report(self) -> dict[str, dict[str, dict[str, float]]]:
+        """The latency statistics by message name, then by stage."""
+        result: dict[str, dict[str, dict[str, float]]] = {}
+        for (stage, name), histogram in self.histograms.items():
+            result.setdefault(name, {})[stage] = histogram.to_dict()
+        return result
+
+
+class TimingMiddleware(_LatencyRecorder, Middleware):
+    """Records the latency of every stage in a histogram per stage and message name."""
+
+    def __call__(self, stage: str, message: Message, call_next: Callable[[], Any]) -> Any:
+        histogram = self._get_histogram(stage, message)
+        start = time.perf_counter_ns()
+        try:
+            return call_next()
+        finally:
+            histogram.record(time.perf_counter_ns() - start)
+
+
+class AsyncTimingMiddleware(_LatencyRecorder, AsyncMiddleware):
+    """The async counterpart of TimingMiddleware."""
+
+    async def __call__(self, stage: str, message: Message, call_next: Callable[[], Awaitable[Any]]) -> Any:
+        histogram = self._get_histogram(stage, message)
+        start = time.perf_counter_ns()
+        try:
+            return await call_next()
+        finally:
+            histogram.record(time.perf_counter_ns() - start)
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import abc
+import dataclasses
+from typing import Any, ClassVar
+
+from ddd.validation import validate_fields
 
 
 class AbstractCommand(abc.ABC):
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def name(self) -> str:
@@ -15,15 +21,86 @@ class AbstractCommand(abc.ABC):
 
 
 class AbstractEvent(abc.ABC):
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def name(self) -> str:
         raise NotImplementedError
 
 
+def _is_pseudo_field(annotation: Any) -> bool:
+    """Whether the annotation is of a class variable or an init-only variable, which dataclasses do not make fields."""
+    if isinstance(annotation, str):
+        return annotation.startswith(('ClassVar', 'typing.ClassVar', 'InitVar', 'dataclasses.InitVar'))
+    return annotation is ClassVar or getattr(annotation, '__origin__', None) is ClassVar or \
+        isinstance(annotation, dataclasses.InitVar)
+
+
+class _MessageMeta(abc.ABCMeta):
+    """
+    Makes each subclass a slotted dataclass of its annotated fields - frozen if requested by its frozen class argument
+    (or if its base is frozen) - whose name is its class name, unless it defines a name of its own.
+    """
+
+    def __new__(mcs, name: str, bases: tuple[type, ...], namespace: dict[str, Any], frozen: bool | None = None):
+        if '__slots__' in namespace:
+            return super().__new__(mcs, name, bases, namespace)
+        if frozen is None:
+            frozen = any(getattr(getattr(base, '__dataclass_params__', None), 'frozen', False) for base in bases)
+        namespace.setdefault('name', name)
+        fields = [key for key, value in namespace.get('__annotations__', {}).items() if not _is_pseudo_field(value)]
+        # The fields' defaults are class attributes, which would conflict with slots: they are held back while the
+        # class is created, handed to dataclass() and then replaced back by the slots - creating the class only once
+        defaults = {key: namespace.pop(key) for key in fields if key in namespace}
+        cls = super().__new__(mcs, name, bases, dict(namespace, __slots__=tuple(fields)))
+        slots = {key: cls.__dict__[key] for key in fields}
+        for key, value in defaults.items():
+            setattr(cls, key, value)
+        dataclasses.dataclass(frozen=frozen)(cls)
+        for key, slot in slots.items():
+            setattr(cls, key, slot)
+        return cls
+
+    def __init__(cls, name: str, bases: tuple[type, ...], namespace: dict[str, Any], frozen: bool | None = None):
+        super().__init__(name, bases, namespace)
+
+
+class _Message:
+    __slots__ = ()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {field.name: getattr(self, field.name) for field in dataclasses.fields(self)}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        # Bypasses the __setattr__ of frozen messages
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+
+class Command(_Message, AbstractCommand, metaclass=_MessageMeta):
+    """
+    A base of slotted dataclass commands, whose name is computed once per class.
+    Subclasses declare their fields as annotated class attributes, and are frozen by a frozen=True class argument:
+    class SaveUserCommand(ddd.Command, frozen=True): ...
+    Their validate() reports all the violations of the constraints declared by their fields (see ddd.field).
+    """
+
+    __slots__ = ()
+
+    validate = validate_fields
+
+
+class Event(_Message, AbstractEvent, metaclass=_MessageMeta):
+    """A base of slotted dataclass events, whose name is computed once per class (see Command)."""
+
+    __slots__ = ()
+
+
 class AbstractEntity(abc.ABC):
-    def __init__(self):
+    def __init__(self, version: int = 0):
         self._events: list[AbstractEvent] = []
+        self._version = version
 
     @abc.abstractmethod
     def get_id(self) -> str:
@@ -32,9 +109,21 @@ class AbstractEntity(abc.ABC):
     def set_id(self, value: str) -> str:
         raise NotImplementedError
 
+    def get_version(self) -> int:
+        """The version the entity was loaded at, which repositories compare and increment on commit."""
+        return self._version
+
+    def set_version(self, value: int) -> None:
+        self._version = value
+
     def add_event(self, event: AbstractEvent) -> None:
         self._events.append(event)
 
     @property
     def events(self) -> list[AbstractEvent]:
         return list(self._events)
+
+    def pull_events(self) -> list[AbstractEvent]:
+        """Hands over the events added since the last pull, without copying them, and forgets them."""
+        events, self._events = self._events, []
+        return events
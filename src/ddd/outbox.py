@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import logging
+import pickle
+import sqlite3
+import threading
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from ddd.model import AbstractEvent
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CONSUMER = 'default'
+# The longest backoff (in seconds) of a background dispatcher after its dispatches failed repeatedly
+_MAX_BACKOFF = 30.0
+
+
+class AbstractOutbox(abc.ABC):
+    """A durable log of the events raised by committed commands, consumed by offset."""
+
+    @abc.abstractmethod
+    def append(self, events: Iterable[AbstractEvent]) -> None:
+        """Durably appends the events, all or none of them."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def read(self, after: int, limit: int) -> list[tuple[int, AbstractEvent]]:
+        """Up to limit events whose offset is greater than after, along with their offsets, in order."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_checkpoint(self, consumer: str = DEFAULT_CONSUMER) -> int:
+        """The offset of the last event the consumer handled, or 0."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_checkpoint(self, offset: int, consumer: str = DEFAULT_CONSUMER) -> None:
+        raise NotImplementedError
+
+
+class OutboxWriter(abc.ABC):
+    """
+    A committer (e.g. a repository) writing to the database of the outbox, which appends the events staged by
+    the message bus to the outbox within the transaction of its own commit - so that the events of a command
+    are appended if and only if the command commits. Rolling back (to a savepoint) discards the staged events.
+    """
+
+    @abc.abstractmethod
+    def stage_events(self, events: list[AbstractEvent]) -> None:
+        raise NotImplementedError
+
+
+class SqliteOutbox(AbstractOutbox):
+    def __init__(self, path: str = ':memory:', serializer: Any = pickle, uri: bool = False):
+        """
+        Stores the events in the SQLite database at path (a URI, if uri is set), serialized by the serializer's
+        dumps & loads. The OutboxWriter committers of the same database append the events by insert.
+        """
+        self._serializer = serializer
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, uri=uri)
+        if path != ':memory:':
+            self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, event BLOB NOT NULL)'
+        )
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS outbox_checkpoints (consumer TEXT PRIMARY KEY, event_id INTEGER NOT NULL)'
+        )
+
+    def append(self, events: Iterable[AbstractEvent]) -> None:
+        events = list(events)
+        if not events:
+            return
+        with self._lock:
+            self._connection.execute('BEGIN')
+            try:
+                self.insert(self._connection, events)
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def insert(self, connection: sqlite3.Connection, events: Iterable[AbstractEvent]) -> None:
+        """Inserts the events through a connection to the outbox's database, within its current transaction."""
+        rows = [(self._serializer.dumps(event),) for event in events]
+        if rows:
+            connection.executemany('INSERT INTO outbox (event) VALUES (?)', rows)
+
+    def read(self, after: int, limit: int) -> list[tuple[int, AbstractEvent]]:
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT id, event FROM outbox WHERE id > ? ORDER BY id LIMIT ?', (after, limit)
+            ).fetchall()
+        return [(offset, self._serializer.loads(event)) for offset, event in rows]
+
+    def get_checkpoint(self, consumer: str = DEFAULT_CONSUMER) -> int:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT event_id FROM outbox_checkpoints WHERE consumer = ?', (consumer,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def set_checkpoint(self, offset: int, consumer: str = DEFAULT_CONSUMER) -> None:
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO outbox_checkpoints (consumer, event_id) VALUES (?, ?)', (consumer, offset)
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class _AbstractOutboxDispatcher(abc.ABC):
+    def __init__(
+            self,
+            outbox: AbstractOutbox,
+            batch_size: int = 100,
+            poll_interval: float = 0.05,
+            consumer: str = DEFAULT_CONSUMER,
+            max_attempts: int | None = 10,
+            dead_letter: Callable[[int, AbstractEvent], Any] | None = None,
+    ):
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be positive, got {batch_size}')
+        if max_attempts is not None and max_attempts < 1:
+            raise ValueError(f'max_attempts must be positive, got {max_attempts}')
+        self._outbox = outbox
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._consumer = consumer
+        self._max_attempts = max_attempts
+        self._dead_letter = dead_letter
+        # The offset of the event whose handling failed last, and the number of its consecutive failed attempts
+        self._failed_offset: int | None = None
+        self._failed_attempts = 0
+        # The number of consecutive failed dispatches of the background thread or task (e.g. of reading the outbox)
+        self._failed_dispatches = 0
+
+    def replay(self, from_offset: int = 0) -> None:
+        """Makes the dispatcher handle again all the events whose offset is greater than from_offset."""
+        self._outbox.set_checkpoint(from_offset, self._consumer)
+
+    def _read_batch(self) -> list[tuple[int, AbstractEvent]]:
+        return self._outbox.read(self._outbox.get_checkpoint(self._consumer), self._batch_size)
+
+    def _checkpoint(self, offset: int) -> None:
+        self._outbox.set_checkpoint(offset, self._consumer)
+
+    def _dispatch_failed(self) -> float:
+        """Logs the failure of a background dispatch, returning how long to back off before the next one."""
+        self._failed_dispatches += 1
+        _logger.exception('Failed dispatching the outbox events %s times in a row, retrying', self._failed_dispatches)
+        return min(self._poll_interval * 2 ** self._failed_dispatches, _MAX_BACKOFF)
+
+    def _handled(self, offset: int) -> None:
+        if offset == self._failed_offset:
+            self._failed_offset = None
+
+    def _failed(self, offset: int, event: AbstractEvent) -> bool:
+        """
+        Logs the failure of the event's handling, returning whether it reached max_attempts:
+        the event is then handed over to the dead_letter callback (if any), and skipped.
+        """
+        if offset != self._failed_offset:
+            self._failed_offset = offset
+            self._failed_attempts = 0
+        self._failed_attempts += 1
+        if self._max_attempts is None or self._failed_attempts < self._max_attempts:
+            _logger.exception('Failed handling the outbox event %s at offset %s, retrying later', event.name, offset)
+            return False
+        _logger.exception(
+            'Failed handling the outbox event %s at offset %s %s times, skipping it', event.name, offset,
+            self._failed_attempts
+        )
+        self._failed_offset = None
+        if self._dead_letter is not None:
+            self._dead_letter(offset, event)
+        return True
+
+
+class OutboxDispatcher(_AbstractOutboxDispatcher):
+    def __init__(
+            self,
+            outbox: AbstractOutbox,
+            handle_events: Callable[[list[AbstractEvent]], Any],
+            batch_size: int = 100,
+            poll_interval: float = 0.05,
+            consumer: str = DEFAULT_CONSUMER,
+            max_attempts: int | None = 10,
+            dead_letter: Callable[[int, AbstractEvent], Any] | None = None,
+    ):
+        """
+        Drains the outbox in batches of batch_size events into handle_events (e.g. Bootstrapper.handle_events),
+        one event at a time, on a background thread. The consumer's checkpoint is saved once per batch.
+        Delivery is at least once: a failing event stops its batch and is retried after poll_interval seconds.
+        Other failures of the background thread (e.g. of reading the outbox) are logged, and retried after a backoff.
+        An event failing max_attempts times in a row (unless None) is skipped, so that it does not block the
+        following events, after being handed over with its offset to dead_letter (if given).
+        """
+        super().__init__(outbox, batch_size, poll_interval, consumer, max_attempts, dead_letter)
+        self._handle_events = handle_events
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def dispatch_pending(self) -> int:
+        """Dispatches the events appended since the checkpoint, returning how many were handled."""
+        handled = 0
+        while True:
+            batch = [] if self._stopped.is_set() else self._read_batch()
+            if not batch:
+                return handled
+            last_offset = None
+            try:
+                for offset, event in batch:
+                    try:
+                        self._handle_events([event])
+                    except Exception:
+                        if not self._failed(offset, event):
+                            return handled
+                    else:
+                        self._handled(offset)
+                        handled += 1
+                    last_offset = offset
+            finally:
+                if last_offset is not None:
+                    self._checkpoint(last_offset)
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='ddd-outbox-dispatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the dispatcher, once the event it is handling (if any) was handled."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                handled = self.dispatch_pending()
+            except Exception:
+                self._stopped.wait(self._dispatch_failed())
+                continue
+            self._failed_dispatches = 0
+            if not handled:
+                self._stopped.wait(self._poll_interval)
+
+
+class AsyncOutboxDispatcher(_AbstractOutboxDispatcher):
+    def __init__(
+            self,
+            outbox: AbstractOutbox,
+            handle_events: Callable[[list[AbstractEvent]], Awaitable[Any]],
+            batch_size: int = 100,
+            poll_interval: float = 0.05,
+            consumer: str = DEFAULT_CONSUMER,
+            max_attempts: int | None = 10,
+            dead_letter: Callable[[int, AbstractEvent], Any] | None = None,
+    ):
+        """
+        The async counterpart of OutboxDispatcher (e.g. of Bootstrapper.async_handle_events), as an asyncio task.
+        The outbox is read and checkpointed on the event loop's executor, not to block the loop.
+        """
+        super().__init__(outbox, batch_size, poll_interval, consumer, max_attempts, dead_letter)
+        self._handle_events = handle_events
+        self._task: asyncio.Task | None = None
+
+    async def dispatch_pending(self) -> int:
+        loop = asyncio.get_running_loop()
+        handled = 0
+        while True:
+            batch = await loop.run_in_executor(None, self._read_batch)
+            if not batch:
+                return handled
+            last_offset = None
+            try:
+                for offset, event in batch:
+                    try:
+                        await self._handle_events([event])
+                    except Exception:
+                        if not self._failed(offset, event):
+                            return handled
+                    else:
+                        self._handled(offset)
+                        handled += 1
+                    last_offset = offset
+            finally:
+                if last_offset is not None:
+                    await loop.run_in_executor(None, self._checkpoint, last_offset)
+
+    def start(self) -> None:
+        """Starts the dispatcher's task on the running event loop."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                handled = await self.dispatch_pending()
+            except Exception:
+                await asyncio.sleep(self._dispatch_failed())
+                continue
+            self._failed_dispatches = 0
+            if not handled:
+                await asyncio.sleep(self._poll_interval)
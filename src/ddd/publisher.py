@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, List
+
+from ddd.middleware import LatencyHistogram
+from ddd.repository import RollbackCommitter, AsyncRollbackCommitter
+
+_logger = logging.getLogger(__name__)
+
+PublishBatch = Callable[[str, List[bytes]], Any]
+AsyncPublishBatch = Callable[[str, List[bytes]], Awaitable[Any]]
+
+
+class PublisherMetrics:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.messages = 0
+        self.bytes = 0
+        self.max_batch_messages = 0
+        self.max_batch_bytes = 0
+
+    @property
+    def batches(self) -> int:
+        return self.latency.count
+
+    def record(self, messages: int, size: int, latency_ns: int) -> None:
+        self.latency.record(latency_ns)
+        self.messages += messages
+        self.bytes += size
+        if messages > self.max_batch_messages:
+            self.max_batch_messages = messages
+        if size > self.max_batch_bytes:
+            self.max_batch_bytes = size
+
+    def to_dict(self) -> dict[str, Any]:
+        batches = self.batches or 1
+        return {
+            'batches': self.batches,
+            'messages': self.messages,
+            'bytes': self.bytes,
+            'mean_batch_messages': self.messages / batches,
+            'max_batch_messages': self.max_batch_messages,
+            'mean_batch_bytes': self.bytes / batches,
+            'max_batch_bytes': self.max_batch_bytes,
+            'latency': self.latency.to_dict(),
+        }
+
+
+class _AbstractBufferedPublisher:
+    def __init__(self, max_count: int = 100, max_bytes: int = 1_000_000, max_linger: float = 0.0):
+        if max_count < 1 or max_bytes < 1 or max_linger < 0:
+            raise ValueError('max_count & max_bytes must be positive, and max_linger must not be negative')
+        self._max_count = max_count
+        self._max_bytes = max_bytes
+        self._max_linger = max_linger
+        # The committed messages waiting to be sent, by topic
+        self._ready: dict[str, collections.deque[bytes]] = {}
+        self.metrics = PublisherMetrics()
+
+    def _add_committed(self, messages: list[tuple[str, bytes]]) -> None:
+        for topic, data in messages:
+            self._ready.setdefault(topic, collections.deque()).append(data)
+
+    def _take_batch(self, force: bool) -> tuple[str, list[bytes], int] | None:
+        """The next batch to send - a partial batch is taken only when forced."""
+        for topic, ready in self._ready.items():
+            batch: list[bytes] = []
+            size = 0
+            full = False
+            for data in ready:
+                if batch and (len(batch) == self._max_count or size + len(data) > self._max_bytes):
+                    full = True
+                    break
+                batch.append(data)
+                size += len(data)
+            full = full or len(batch) == self._max_count or size >= self._max_bytes
+            if batch and (full or force):
+                for _ in batch:
+                    ready.popleft()
+                if not ready:
+                    del self._ready[topic]
+                return topic, batch, size
+        return None
+
+    def _restore(self, topic: str, batch: list[bytes]) -> None:
+        self._ready.setdefault(topic, collections.deque()).extendleft(reversed(batch))
+
+
+class PublisherStage(RollbackCommitter):
+    def __init__(self, publisher: BufferedPublisher):
+        """The messages published within a unit of work, handed over to the publisher on commit (see stage())."""
+        self._publisher = publisher
+        self._pending: list[tuple[str, bytes]] = []
+
+    def publish(self, topic: str, data: bytes) -> None:
+        self._pending.append((topic, data))
+
+    def commit(self) -> None:
+        pending, self._pending = self._pending, []
+        self._publisher._send_committed(pending)
+
+    def rollback(self) -> None:
+        self._pending = []
+
+
+class AsyncPublisherStage(AsyncRollbackCommitter):
+    def __init__(self, publisher: AsyncBufferedPublisher):
+        """The async counterpart of PublisherStage."""
+        self._publisher = publisher
+        self._pending: list[tuple[str, bytes]] = []
+
+    def publish(self, topic: str, data: bytes) -> None:
+        self._pending.append((topic, data))
+
+    async def commit(self) -> None:
+        pending, self._pending = self._pending, []
+        await self._publisher._send_committed(pending)
+
+    async def rollback(self) -> None:
+        self._pending = []
+
+
+class BufferedPublisher(_AbstractBufferedPublisher):
+    def __init__(
+            self,
+            publish_batch: PublishBatch,
+            max_count: int = 100,
+            max_bytes: int = 1_000_000,
+            max_linger: float = 0.0,
+    ):
+        """
+        Sends the messages committed by its stages to publish_batch(topic, messages),
+        in batches of up to max_count messages and max_bytes bytes per topic.
+        With a positive max_linger, partial batches wait up to max_linger seconds for the messages of later commits.
+        Batches failing to publish are kept, to be sent again later.
+        """
+        super().__init__(max_count, max_bytes, max_linger)
+        self._publish_batch = publish_batch
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def stage(self) -> PublisherStage:
+        """
+        A new stage, queueing the messages published within a single unit of work until it commits
+        (or discarding them on rollback) - to be declared as a resource of the unit of work's handler.
+        """
+        return PublisherStage(self)
+
+    def _send_committed(self, messages: list[tuple[str, bytes]]) -> None:
+        with self._lock:
+            self._add_committed(messages)
+        self._send(force=not self._max_linger)
+        self._schedule_flush()
+
+    def flush(self) -> None:
+        """Sends all the committed messages now."""
+        self._send(force=True)
+
+    def close(self) -> None:
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+    def _send(self, force: bool) -> None:
+        while True:
+            with self._lock:
+                taken = self._take_batch(force)
+            if taken is None:
+                return
+            topic, batch, size = taken
+            start_ns = time.perf_counter_ns()
+            try:
+                self._publish_batch(topic, batch)
+            except Exception:
+                with self._lock:
+                    self._restore(topic, batch)
+                raise
+            latency_ns = time.perf_counter_ns() - start_ns
+            with self._lock:
+                self.metrics.record(len(batch), size, latency_ns)
+
+    def _schedule_flush(self) -> None:
+        with self._lock:
+            if self._timer is not None or not self._ready:
+                return
+            self._timer = threading.Timer(self._max_linger, self._flush_lingering)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_lingering(self) -> None:
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            _logger.exception('Failed publishing the lingering messages, retrying on the next commit')
+
+
+class AsyncBufferedPublisher(_AbstractBufferedPublisher):
+    def __init__(
+            self,
+            publish_batch: AsyncPublishBatch,
+            max_count: int = 100,
+            max_bytes: int = 1_000_000,
+            max_linger: float = 0.0,
+    ):
+        """The async counterpart of BufferedPublisher, flushing the lingering messages by an asyncio task."""
+        super().__init__(max_count, max_bytes, max_linger)
+        self._publish_batch = publish_batch
+        self._task: asyncio.Task | None = None
+
+    def stage(self) -> AsyncPublisherStage:
+        return AsyncPublisherStage(self)
+
+    async def _send_committed(self, messages: list[tuple[str, bytes]]) -> None:
+        self._add_committed(messages)
+        await self._send(force=not self._max_linger)
+        if self._task is None and self._ready:
+            self._task = asyncio.ensure_future(self._flush_lingering())
+
+    async def flush(self) -> None:
+        await self._send(force=True)
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _send(self, force: bool) -> None:
+        while True:
+            taken = self._take_batch(force)
+            if taken is None:
+                return
+            topic, batch, size = taken
+            start_ns = time.perf_counter_ns()
+            try:
+                await self._publish_batch(topic, batch)
+            except Exception:
+                self._restore(topic, batch)
+                raise
+            self.metrics.record(len(batch), size, time.perf_counter_ns() - start_ns)
+
+    async def _flush_lingering(self) -> None:
+        await asyncio.sleep(self._max_linger)
+        self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            _logger.exception('Failed publishing the lingering messages, retrying on the next commit')
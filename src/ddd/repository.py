@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import abc
+from typing import Any
 
 
 class RollbackCommitter(abc.ABC):
@@ -21,3 +22,27 @@ class AsyncRollbackCommitter(abc.ABC):
     @abc.abstractmethod
     async def rollback(self) -> None:
         raise NotImplementedError
+
+
+class SavepointRollbackCommitter(RollbackCommitter, abc.ABC):
+    """A RollbackCommitter that can discard only the work staged after a savepoint."""
+
+    @abc.abstractmethod
+    def savepoint(self) -> Any:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def rollback_to_savepoint(self, savepoint: Any) -> None:
+        raise NotImplementedError
+
+
+class AsyncSavepointRollbackCommitter(AsyncRollbackCommitter, abc.ABC):
+    """An AsyncRollbackCommitter that can discard only the work staged after a savepoint."""
+
+    @abc.abstractmethod
+    async def savepoint(self) -> Any:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def rollback_to_savepoint(self, savepoint: Any) -> None:
+        raise NotImplementedError
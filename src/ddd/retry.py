@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Type
+
+from ddd.error import ConflictError
+
+
+class RetryPolicy:
+    def __init__(
+            self,
+            attempts: int = 3,
+            backoff: float = 0.01,
+            max_backoff: float = 1.0,
+            retry_on: tuple[Type[Exception], ...] = (ConflictError,),
+    ):
+        """
+        Calls a function up to attempts times while it raises any of the retry_on errors,
+        sleeping between the attempts for a random delay of up to backoff seconds, doubled per attempt
+        and capped by max_backoff (i.e. exponential backoff with full jitter).
+        """
+        if attempts < 1:
+            raise ValueError(f'attempts must be positive, got {attempts}')
+        self.attempts = attempts
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._retry_on = retry_on
+
+    def delay(self, attempt: int) -> float:
+        """The delay before the attempt following the given (zero based) attempt."""
+        return random.uniform(0, min(self._max_backoff, self._backoff * 2 ** attempt))
+
+    def call(self, func: Callable[..., Any], *args: Any) -> Any:
+        for attempt in range(self.attempts - 1):
+            try:
+                return func(*args)
+            except self._retry_on:
+                time.sleep(self.delay(attempt))
+        return func(*args)
+
+    async def async_call(self, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        for attempt in range(self.attempts - 1):
+            try:
+                return await func(*args)
+            except self._retry_on:
+                await asyncio.sleep(self.delay(attempt))
+        return await func(*args)
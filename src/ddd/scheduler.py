@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+from collections.abc import Hashable
+from typing import Any, Callable
+
+from ddd.bootstrapper import Bootstrapper
+from ddd.model import AbstractCommand
+
+AggregateKey = Callable[[AbstractCommand], Hashable]
+
+
+class AsyncKeyedScheduler:
+    def __init__(self, bootstrapper: Bootstrapper, key: AggregateKey, max_concurrency: int | None = None):
+        """
+        Handles the commands of the same key (e.g. the id of the aggregate they change) one at a time, in order,
+        and the commands of different keys concurrently - up to max_concurrency at once, if given.
+        The queue of a key is dropped as soon as it drains, so only the keys with pending commands take memory.
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(f'max_concurrency must be positive, got {max_concurrency}')
+        self._bootstrapper = bootstrapper
+        self._key = key
+        self._max_concurrency = max_concurrency
+        self._semaphore: asyncio.Semaphore | None = None
+        self._queues: dict[Hashable, collections.deque[tuple[AbstractCommand, asyncio.Future]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending_keys(self) -> int:
+        return len(self._queues)
+
+    def submit(self, command: AbstractCommand) -> asyncio.Future:
+        """
+        Queues the command after the pending commands of its key, returning a future of its result.
+        Must be called on the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = self._key(command)
+        queue = self._queues.get(key)
+        if queue is not None:
+            queue.append((command, future))
+            return future
+        queue = self._queues[key] = collections.deque([(command, future)])
+        task = loop.create_task(self._drain(key, queue))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return future
+
+    async def handle_command(self, command: AbstractCommand) -> Any:
+        return await self.submit(command)
+
+    async def join(self) -> None:
+        """Waits until all the queued commands were handled."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def _drain(self, key: Hashable, queue: collections.deque[tuple[AbstractCommand, asyncio.Future]]) -> None:
+        try:
+            while queue:
+                command, future = queue[0]
+                if not future.cancelled():
+                    await self._handle_command(command, future)
+                queue.popleft()
+        finally:
+            del self._queues[key]
+            # The queue is left undrained only if the task was cancelled (or failed): its commands are cancelled,
+            # so that their callers do not wait forever
+            for _, future in queue:
+                future.cancel()
+
+    async def _handle_command(self, command: AbstractCommand, future: asyncio.Future) -> None:
+        if self._max_concurrency is not None and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        try:
+            if self._semaphore is None:
+                result = await self._bootstrapper.async_handle_command(command)
+            else:
+                async with self._semaphore:
+                    result = await self._bootstrapper.async_handle_command(command)
+        except asyncio.CancelledError:
+            # Cancels the drain, rather than failing the command only - as it is an Exception before Python 3.8
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
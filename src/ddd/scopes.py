@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import abc
+import threading
+from typing import Callable, Generic, TypeVar
+
+THandler = TypeVar('THandler')
+
+
+class HandlerProvider(Generic[THandler], abc.ABC):
+    """Hands out the handlers of a single registration and takes them back once their unit of work is over."""
+
+    def __init__(self, factory: Callable[[], THandler]):
+        self._factory = factory
+
+    @abc.abstractmethod
+    def acquire(self) -> THandler:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def release(self, handler: THandler) -> None:
+        raise NotImplementedError
+
+
+class HandlerScope(abc.ABC):
+    @abc.abstractmethod
+    def create_provider(self, factory: Callable[[], THandler]) -> HandlerProvider[THandler]:
+        raise NotImplementedError
+
+
+class _TransientProvider(HandlerProvider[THandler]):
+    def acquire(self) -> THandler:
+        return self._factory()
+
+    def release(self, handler: THandler) -> None:
+        pass
+
+
+class _SingletonProvider(HandlerProvider[THandler]):
+    """
+    Hands out its single handler to one unit of work at a time: the units of work overlapping it (e.g. on other
+    threads, or in other tasks) get handlers of their own, which are dropped on release.
+    """
+
+    def __init__(self, factory: Callable[[], THandler]):
+        super().__init__(factory)
+        self._handler: THandler | None = None
+        # Holds the handler while no unit of work uses it - taken by list.pop, which is atomic
+        self._idle: list[THandler] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> THandler:
+        try:
+            return self._idle.pop()
+        except IndexError:
+            pass
+        with self._lock:
+            if self._handler is None:
+                self._handler = self._factory()
+                return self._handler
+        return self._factory()
+
+    def release(self, handler: THandler) -> None:
+        if handler is self._handler:
+            handler.reset()
+            self._idle.append(handler)
+
+
+class _PooledProvider(HandlerProvider[THandler]):
+    def __init__(self, factory: Callable[[], THandler], size: int):
+        super().__init__(factory)
+        self._size = size
+        self._idle: list[THandler] = []
+
+    def acquire(self) -> THandler:
+        try:
+            return self._idle.pop()
+        except IndexError:
+            return self._factory()
+
+    def release(self, handler: THandler) -> None:
+        handler.reset()
+        if len(self._idle) < self._size:
+            self._idle.append(handler)
+
+
+class _TransientScope(HandlerScope):
+    def create_provider(self, factory: Callable[[], THandler]) -> HandlerProvider[THandler]:
+        return _TransientProvider(factory)
+
+    def __repr__(self) -> str:
+        return 'transient'
+
+
+class _SingletonScope(HandlerScope):
+    def create_provider(self, factory: Callable[[], THandler]) -> HandlerProvider[THandler]:
+        return _SingletonProvider(factory)
+
+    def __repr__(self) -> str:
+        return 'singleton'
+
+
+class _PooledScope(HandlerScope):
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError(f'pool size must be positive, got {size}')
+        self._size = size
+
+    def create_provider(self, factory: Callable[[], THandler]) -> HandlerProvider[THandler]:
+        return _PooledProvider(factory, self._size)
+
+    def __repr__(self) -> str:
+        return f'pooled({self._size})'
+
+
+# A new handler per message (the default).
+TRANSIENT = _TransientScope()
+# A single handler for all messages. It is reset after each unit of work, and is never shared by concurrent units of
+# work: those overlapping the one using it get a handler of their own (as TRANSIENT does).
+SINGLETON = _SingletonScope()
+
+
+def pooled(size: int) -> HandlerScope:
+    """Reuses handlers, keeping up to size idle handlers. Each handler is reset before returning to the pool."""
+    return _PooledScope(size)
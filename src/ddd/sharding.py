@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import os
+from collections.abc import Hashable
+from typing import Any, Callable
+
+from ddd.bootstrapper import Bootstrapper
+from ddd.model import AbstractCommand
+
+CreateBootstrapper = Callable[[], Bootstrapper]
+ShardKey = Callable[[AbstractCommand], Hashable]
+
+# The bootstrapper of the current worker process
+_bootstrapper: Bootstrapper | None = None
+
+
+def _init_worker(create_bootstrapper: CreateBootstrapper) -> None:
+    global _bootstrapper
+    _bootstrapper = create_bootstrapper()
+
+
+def _handle_command(command: AbstractCommand) -> Any:
+    return _bootstrapper.handle_command(command)
+
+
+class ShardedBootstrapper:
+    def __init__(self, create_bootstrapper: CreateBootstrapper, key: ShardKey, shards: int | None = None):
+        """
+        Handles the commands on shards worker processes (defaults to the number of CPUs),
+        each with its own bootstrapper, created by create_bootstrapper (which should hence be picklable).
+        Commands are routed by the hash of their key (e.g. the id of the aggregate they change),
+        and each shard handles its commands one at a time - so that commands of the same key are handled in order.
+        Commands, their results and errors should be picklable as well.
+        """
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError(f'shards must be positive, got {shards}')
+        self._key = key
+        self._shards = [
+            concurrent.futures.ProcessPoolExecutor(1, initializer=_init_worker, initargs=(create_bootstrapper,))
+            for _ in range(shards)
+        ]
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+    def shard_of(self, command: AbstractCommand) -> int:
+        return hash(self._key(command)) % len(self._shards)
+
+    def submit(self, command: AbstractCommand) -> concurrent.futures.Future:
+        """Queues the command on its shard, returning a future of the result of its handling (or of its error)."""
+        return self._shards[self.shard_of(command)].submit(_handle_command, command)
+
+    def handle_command(self, command: AbstractCommand) -> Any:
+        return self.submit(command).result()
+
+    async def async_handle_command(self, command: AbstractCommand) -> Any:
+        """Awaits the handling of the command by its shard, without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(command))
+
+    def shutdown(self, wait: bool = True) -> None:
+        for shard in self._shards:
+            shard.shutdown(wait)
+
+    def __enter__(self) -> ShardedBootstrapper:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
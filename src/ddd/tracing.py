@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import itertools
+import json
+import random
+import time
+from collections.abc import Iterable
+from typing import Any, Union
+
+from ddd.model import AbstractCommand, AbstractEvent
+
+Message = Union[AbstractCommand, AbstractEvent]
+
+
+class Span:
+    """A single handler invocation: its handling, followed by its commit (or rollback)."""
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'handler', 'start_ns', 'handled_ns', 'end_ns', 'error')
+
+    def __init__(self):
+        self.trace_id = 0
+        self.span_id = 0
+        self.parent_id: int | None = None
+        self.name = ''
+        self.handler = ''
+        self.start_ns = 0
+        self.handled_ns = 0
+        self.end_ns = 0
+        self.error: str | None = None
+
+    @property
+    def outcome(self) -> str:
+        return 'ok' if self.error is None else 'error'
+
+    @property
+    def commit_ns(self) -> int:
+        """The duration of the commit, or of the rollback when the handler failed."""
+        return self.end_ns - (self.handled_ns or self.start_ns) if self.end_ns else 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'handler': self.handler,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'commit_ns': self.commit_ns,
+            'outcome': self.outcome,
+            'error': self.error,
+        }
+
+
+class Trace:
+    """The spans of a single command and its event cascade."""
+
+    def __init__(self, tracer: Tracer, trace_id: int):
+        self._tracer = tracer
+        self.trace_id = trace_id
+        # The raised events (kept alive, so that their ids are not reused during the trace) and their spans' ids,
+        # by the events' ids - as equal events raised by different handlers must not share a parent
+        self._parent_ids: dict[int, tuple[AbstractEvent, int]] = {}
+
+    def parent_of(self, event: AbstractEvent) -> int | None:
+        """The id of the span whose handler raised the event."""
+        raised = self._parent_ids.get(id(event))
+        return None if raised is None else raised[1]
+
+    def start_span(self, message: Message, handler: Any, parent_id: int | None) -> Span:
+        span = self._tracer._next_span()
+        span.trace_id = self.trace_id
+        span.parent_id = parent_id
+        span.name = message.name
+        span.handler = type(handler).__name__
+        span.start_ns = time.perf_counter_ns()
+        return span
+
+    def handled(self, span: Span, events: Iterable[AbstractEvent]) -> None:
+        span.handled_ns = time.perf_counter_ns()
+        for event in events:
+            self._parent_ids[id(event)] = (event, span.span_id)
+
+    @classmethod
+    def end_span(cls, span: Span, error: Exception | None = None) -> None:
+        span.end_ns = time.perf_counter_ns()
+        if error is not None:
+            span.error = f'{type(error).__name__}: {error}'
+
+
+class Tracer:
+    def __init__(self, capacity: int = 4096, sample_rate: float = 1.0):
+        """
+        Records the spans of sample_rate of the commands into a ring buffer of the given capacity,
+        whose oldest spans are overwritten once it is full.
+        """
+        if capacity < 1:
+            raise ValueError(f'capacity must be positive, got {capacity}')
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(f'sample_rate must be between 0 and 1, got {sample_rate}')
+        self._spans = [Span() for _ in range(capacity)]
+        self._sample_rate = sample_rate
+        self._span_ids = itertools.count(1)
+        self._trace_ids = itertools.count(1)
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+    def start_trace(self) -> Trace | None:
+        """Starts tracing a command, unless it was not sampled (in which case None is returned)."""
+        if self._sample_rate < 1 and random.random() >= self._sample_rate:
+            return None
+        return Trace(self, next(self._trace_ids))
+
+    def _next_span(self) -> Span:
+        span_id = next(self._span_ids)
+        span = self._spans[span_id % len(self._spans)]
+        span.span_id = span_id
+        span.handled_ns = span.end_ns = 0
+        span.error = None
+        return span
+
+    def spans(self) -> list[dict[str, Any]]:
+        """The recorded spans, oldest first."""
+        return [span.to_dict() for span in sorted(self._spans, key=lambda span: span.span_id) if span.span_id]
+
+    def clear(self) -> None:
+        for span in self._spans:
+            span.span_id = 0
+
+    def export_json(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.spans(), f)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Exports the spans in the Chrome trace event format, viewable by chrome://tracing or Perfetto."""
+        spans = self.spans()
+        origin_ns = min((span['start_ns'] for span in spans), default=0)
+        trace_events = [
+            {
+                'name': span['name'],
+                'cat': span['handler'],
+                'ph': 'X',
+                'ts': (span['start_ns'] - origin_ns) / 1000,
+                'dur': (span['end_ns'] - span['start_ns']) / 1000,
+                'pid': 1,
+                'tid': span['trace_id'],
+                'args': span,
+            }
+            for span in spans
+            if span['end_ns']
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ns'}, f)
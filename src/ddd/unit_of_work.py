@@ -1,16 +1,25 @@
 from __future__ import annotations
 
 import abc
+import logging
+from collections.abc import Iterable, Sequence
 from types import TracebackType
 from typing import Any, Generic, Type, TypeVar, Union
 
+from ddd.batch import CommandBatch
 from ddd.handlers import (
+    AbstractBatchCommandHandler,
+    AbstractAsyncBatchCommandHandler,
     AbstractCommandHandler,
     AbstractEventHandler,
     AbstractAsyncCommandHandler,
     AbstractAsyncEventHandler,
 )
+from ddd.middleware import Interceptor, Stage
 from ddd.model import AbstractCommand, AbstractEvent
+from ddd.repository import RollbackCommitter, AsyncRollbackCommitter
+
+_logger = logging.getLogger(__name__)
 
 Message = Union[AbstractCommand, AbstractEvent]
 TMessage = TypeVar('TMessage', bound=Message)
@@ -21,38 +30,60 @@ TAsyncHandler = TypeVar('TAsyncHandler', bound=AsyncHandler)
 
 
 class AbstractUnitOfWork(Generic[TMessage, THandler], abc.ABC):
-    def __init__(self, handler: THandler):
+    def __init__(self, handler: THandler, intercept: Interceptor | None = None):
         self._handler = handler
+        self._intercept = intercept
+        self._message: TMessage | None = None
 
     def __enter__(self) -> AbstractUnitOfWork:
         return self
 
     def __exit__(self, exc_type: Type, exc_val: Exception, exc_tb: TracebackType) -> bool | None:
-        if exc_val:
-            self._handler.rollback()
+        if self._intercept is None:
+            if exc_val:
+                self._handler.rollback()
+            else:
+                self._handler.commit()
+        elif exc_val:
+            self._intercept(Stage.ROLLBACK, self._message, self._handler.rollback)
         else:
-            self._handler.commit()
+            self._intercept(Stage.COMMIT, self._message, self._handler.commit)
 
     def handle(self, message: TMessage) -> Any:
-        result = self._handler.handle(message)
+        if self._intercept is None:
+            result = self._handler.handle(message)
+        else:
+            self._message = message
+            result = self._intercept(Stage.HANDLE, message, self._handler.handle, message)
         return result
 
 
 class AbstractAsyncUnitOfWork(Generic[TMessage, TAsyncHandler], abc.ABC):
-    def __init__(self, handler: TAsyncHandler):
+    def __init__(self, handler: TAsyncHandler, intercept: Interceptor | None = None):
         self._handler = handler
+        self._intercept = intercept
+        self._message: TMessage | None = None
 
     async def __aenter__(self) -> AbstractAsyncUnitOfWork:
         return self
 
     async def __aexit__(self, exc_type: Type, exc_val: Exception, exc_tb: TracebackType) -> bool | None:
-        if exc_val:
-            await self._handler.rollback()
+        if self._intercept is None:
+            if exc_val:
+                await self._handler.rollback()
+            else:
+                await self._handler.commit()
+        elif exc_val:
+            await self._intercept(Stage.ROLLBACK, self._message, self._handler.rollback)
         else:
-            await self._handler.commit()
+            await self._intercept(Stage.COMMIT, self._message, self._handler.commit)
 
     async def handle(self, message: TMessage) -> Any:
-        result = await self._handler.handle(message)
+        if self._intercept is None:
+            result = await self._handler.handle(message)
+        else:
+            self._message = message
+            result = await self._intercept(Stage.HANDLE, message, self._handler.handle, message)
         return result
 
 
@@ -64,9 +95,166 @@ class AsyncCommandUnitOfWork(AbstractAsyncUnitOfWork[AbstractCommand, AbstractAs
     """CommandUnitOfWork"""
 
 
+def _check_batch_results(batch: CommandBatch, results: Sequence[Any]) -> Sequence[Any]:
+    if len(results) != len(batch):
+        raise ValueError(f'Expected {len(batch)} results of the command batch, got {len(results)}')
+    return results
+
+
+class CommandBatchUnitOfWork(AbstractUnitOfWork[CommandBatch, AbstractBatchCommandHandler]):
+    """Handles a batch of commands by the handle_batch method of the handler, which returns a result per command."""
+
+    def handle(self, message: CommandBatch) -> Any:
+        if self._intercept is None:
+            return _check_batch_results(message, self._handler.handle_batch(message))
+        self._message = message
+        return _check_batch_results(
+            message, self._intercept(Stage.HANDLE, message, self._handler.handle_batch, message)
+        )
+
+
+class AsyncCommandBatchUnitOfWork(AbstractAsyncUnitOfWork[CommandBatch, AbstractAsyncBatchCommandHandler]):
+    """The async counterpart of CommandBatchUnitOfWork."""
+
+    async def handle(self, message: CommandBatch) -> Any:
+        if self._intercept is None:
+            return _check_batch_results(message, await self._handler.handle_batch(message))
+        self._message = message
+        return _check_batch_results(
+            message, await self._intercept(Stage.HANDLE, message, self._handler.handle_batch, message)
+        )
+
+
 class EventUnitOfWork(AbstractUnitOfWork[AbstractEvent, AbstractEventHandler]):
     """EventUnitOfWork"""
 
 
 class AsyncEventUnitOfWork(AbstractAsyncUnitOfWork[AbstractEvent, AbstractAsyncEventHandler]):
     """AsyncEventUnitOfWork"""
+
+
+def _rollback_all(committers: Iterable[RollbackCommitter]) -> Exception | None:
+    """Rolls back all the committers, returning the first rollback error (if any)."""
+    error = None
+    for committer in committers:
+        try:
+            committer.rollback()
+        except Exception as e:
+            error = error or e
+    return error
+
+
+async def _async_rollback_all(committers: Iterable[AsyncRollbackCommitter]) -> Exception | None:
+    error = None
+    for committer in committers:
+        try:
+            await committer.rollback()
+        except Exception as e:
+            error = error or e
+    return error
+
+
+def _log_rollback_error(error: Exception | None) -> None:
+    if error is not None:
+        _logger.error('Failed rolling back the committers of a failed commit', exc_info=error)
+
+
+class CommitGroup:
+    """Committers shared by several handlers, which are committed (or rolled back) once for all of them."""
+
+    def __init__(self):
+        self._committers: dict[int, RollbackCommitter] = {}
+
+    def __len__(self) -> int:
+        return len(self._committers)
+
+    def add(self, committers: Iterable[RollbackCommitter]) -> None:
+        for committer in committers:
+            self._committers.setdefault(id(committer), committer)
+
+    def commit(self) -> None:
+        """
+        Commits the committers in the order they were added. Once a commit fails, the failing committer and the rest
+        are all rolled back, and only then is the commit error raised - while the first rollback error (if any),
+        which followed it, is logged.
+        """
+        committers = list(self._committers.values())
+        self._committers.clear()
+        for i, committer in enumerate(committers):
+            try:
+                committer.commit()
+            except Exception:
+                _log_rollback_error(_rollback_all(committers[i:]))
+                raise
+
+    def rollback(self) -> None:
+        """Rolls back all the committers, and only then raises the first rollback error (if any)."""
+        committers = list(self._committers.values())
+        self._committers.clear()
+        error = _rollback_all(committers)
+        if error is not None:
+            raise error
+
+
+class AsyncCommitGroup:
+    """The async counterpart of CommitGroup."""
+
+    def __init__(self):
+        self._committers: dict[int, AsyncRollbackCommitter] = {}
+
+    def __len__(self) -> int:
+        return len(self._committers)
+
+    def add(self, committers: Iterable[AsyncRollbackCommitter]) -> None:
+        for committer in committers:
+            self._committers.setdefault(id(committer), committer)
+
+    async def commit(self) -> None:
+        committers = list(self._committers.values())
+        self._committers.clear()
+        for i, committer in enumerate(committers):
+            try:
+                await committer.commit()
+            except Exception:
+                _log_rollback_error(await _async_rollback_all(committers[i:]))
+                raise
+
+    async def rollback(self) -> None:
+        committers = list(self._committers.values())
+        self._committers.clear()
+        error = await _async_rollback_all(committers)
+        if error is not None:
+            raise error
+
+
+class GroupCommitEventUnitOfWork(EventUnitOfWork):
+    """
+    Adds the resources of the handler (if it declares any) to the group, instead of committing or rolling it back.
+    The group is then either committed, or rolled back as the error propagates, by the message bus.
+    """
+
+    def __init__(self, handler: AbstractEventHandler, intercept: Interceptor | None = None, *, group: CommitGroup):
+        super().__init__(handler, intercept)
+        self._group = group
+
+    def __exit__(self, exc_type: Type, exc_val: Exception, exc_tb: TracebackType) -> bool | None:
+        resources = self._handler.resources
+        if not resources:
+            return super().__exit__(exc_type, exc_val, exc_tb)
+        self._group.add(resources)
+
+
+class AsyncGroupCommitEventUnitOfWork(AsyncEventUnitOfWork):
+    """The async counterpart of GroupCommitEventUnitOfWork."""
+
+    def __init__(
+            self, handler: AbstractAsyncEventHandler, intercept: Interceptor | None = None, *, group: AsyncCommitGroup
+    ):
+        super().__init__(handler, intercept)
+        self._group = group
+
+    async def __aexit__(self, exc_type: Type, exc_val: Exception, exc_tb: TracebackType) -> bool | None:
+        resources = self._handler.resources
+        if not resources:
+            return await super().__aexit__(exc_type, exc_val, exc_tb)
+        self._group.add(resources)
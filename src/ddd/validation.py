@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import dataclasses
+import re
+from collections.abc import Iterable
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from ddd.error import ValidationError
+
+# The key of the constraints in the metadata of the fields
+_CONSTRAINTS = 'ddd.constraints'
+
+Violations = Callable[[Any], List[str]]
+ViolationsOfMany = Callable[[Sequence[Any]], List[Tuple[int, List[str]]]]
+
+
+@dataclasses.dataclass(frozen=True)
+class Constraints:
+    required: bool = False
+    pattern: str | None = None
+    min_length: int | None = None
+    max_length: int | None = None
+    min_value: Any = None
+    max_value: Any = None
+    check: Callable[[Any], bool] | None = None
+    message: str | None = None
+
+
+# The source of a constraint's check, given the index and the name of its field, and the namespace to compile it in
+_CheckSource = Callable[[int, str, Constraints, Dict[str, Any]], Tuple[str, str]]
+
+
+def field(
+        *,
+        required: bool = False,
+        pattern: str | None = None,
+        min_length: int | None = None,
+        max_length: int | None = None,
+        min_value: Any = None,
+        max_value: Any = None,
+        check: Callable[[Any], bool] | None = None,
+        message: str | None = None,
+        default: Any = None,
+        **kwargs: Any,
+) -> Any:
+    """
+    A dataclasses.field (whose default is None, unless given) validated by the validate() of ddd.Command:
+    a required value must not be None nor empty, and a value that is not None must fully match the regular
+    expression pattern, be of a length (and a value) within the given bounds, and pass check(value) -
+    whose violation is reported by message.
+    """
+    if default is not None or 'default_factory' not in kwargs:
+        kwargs['default'] = default
+    constraints = Constraints(required, pattern, min_length, max_length, min_value, max_value, check, message)
+    return dataclasses.field(metadata={_CONSTRAINTS: constraints}, **kwargs)
+
+
+def _pattern_check(i: int, name: str, constraints: Constraints, namespace: dict[str, Any]) -> tuple[str, str]:
+    namespace[f'match_{i}'] = re.compile(constraints.pattern).fullmatch
+    return f'match_{i}(v) is None', f'Invalid {name}: does not match {constraints.pattern}'
+
+
+def _min_length_check(i: int, name: str, constraints: Constraints, namespace: dict[str, Any]) -> tuple[str, str]:
+    return f'len(v) < {constraints.min_length:d}', f'Invalid {name}: shorter than {constraints.min_length}'
+
+
+def _max_length_check(i: int, name: str, constraints: Constraints, namespace: dict[str, Any]) -> tuple[str, str]:
+    return f'len(v) > {constraints.max_length:d}', f'Invalid {name}: longer than {constraints.max_length}'
+
+
+def _min_value_check(i: int, name: str, constraints: Constraints, namespace: dict[str, Any]) -> tuple[str, str]:
+    namespace[f'min_value_{i}'] = constraints.min_value
+    return f'v < min_value_{i}', f'Invalid {name}: less than {constraints.min_value}'
+
+
+def _max_value_check(i: int, name: str, constraints: Constraints, namespace: dict[str, Any]) -> tuple[str, str]:
+    namespace[f'max_value_{i}'] = constraints.max_value
+    return f'v > max_value_{i}', f'Invalid {name}: greater than {constraints.max_value}'
+
+
+def _check_check(i: int, name: str, constraints: Constraints, namespace: dict[str, Any]) -> tuple[str, str]:
+    namespace[f'check_{i}'] = constraints.check
+    return f'not check_{i}(v)', constraints.message or f'Invalid {name}'
+
+
+# The (condition, violation) source of the check of each constraint that is set, in the order they are checked
+_CHECKS: list[tuple[str, _CheckSource]] = [
+    ('pattern', _pattern_check),
+    ('min_length', _min_length_check),
+    ('max_length', _max_length_check),
+    ('min_value', _min_value_check),
+    ('max_value', _max_value_check),
+    ('check', _check_check),
+]
+
+
+def _field_source(i: int, field_: dataclasses.Field, constraints: Constraints, namespace: dict[str, Any]) -> list[str]:
+    """The statements appending the violations of the field's value to errors."""
+    name = field_.name
+    checks = [
+        check_source(i, name, constraints, namespace)
+        for attribute, check_source in _CHECKS if getattr(constraints, attribute) is not None
+    ]
+    source = [f'v = command.{name}']
+    if constraints.required:
+        source += ["if v is None or v == '':", f'    errors.append({f"Missing {name}"!r})']
+        if checks:
+            source.append('else:')
+    elif checks:
+        source.append('if v is not None:')
+    if checks:
+        source.append('    try:')
+        for condition, violation in checks:
+            source += [f'        if {condition}:', f'            errors.append({violation!r})']
+        type_violation = f'Invalid {name}: of type '
+        source += ['    except TypeError:', f'        errors.append({type_violation!r} + type(v).__name__)']
+    return source
+
+
+def _compile(message_type: type) -> tuple[Violations, ViolationsOfMany]:
+    namespace: dict[str, Any] = {}
+    body = []
+    for i, field_ in enumerate(dataclasses.fields(message_type) if dataclasses.is_dataclass(message_type) else ()):
+        constraints = field_.metadata.get(_CONSTRAINTS)
+        if constraints is not None:
+            body += _field_source(i, field_, constraints, namespace)
+    source = ['def violations(command):', '    errors = []']
+    source += ['    ' + line for line in body]
+    source += ['    return errors', '', 'def violations_of_many(commands):', '    result = []']
+    source += ['    for index, command in enumerate(commands):', '        errors = []']
+    source += ['        ' + line for line in body]
+    source += ['        if errors:', '            result.append((index, errors))', '    return result']
+    exec('\n'.join(source), namespace)
+    return namespace['violations'], namespace['violations_of_many']
+
+
+_compiled: dict[type, tuple[Violations, ViolationsOfMany]] = {}
+
+
+def _compiled_of(message_type: type) -> tuple[Violations, ViolationsOfMany]:
+    compiled = _compiled.get(message_type)
+    if compiled is None:
+        compiled = _compiled[message_type] = _compile(message_type)
+    return compiled
+
+
+def get_violations(command: Any) -> list[str]:
+    """The violations of the constraints of the command's fields (see field), by a function compiled per class."""
+    return _compiled_of(type(command))[0](command)
+
+
+def validate_fields(command: Any) -> None:
+    """Raises a ValidationError of all the violations of the constraints of the command's fields, if any."""
+    violations = _compiled_of(type(command))[0](command)
+    if violations:
+        raise ValidationError(violations)
+
+
+def validate_batch(commands: Iterable[Any]) -> list[Exception | None]:
+    """
+    Validates the commands, returning the error raised by the validation of each one, or None.
+    The commands whose validate() is validate_fields (e.g. of ddd.Command) are validated by a loop compiled per class.
+    """
+    commands = list(commands)
+    errors: list[Exception | None] = [None] * len(commands)
+    indices_by_type: dict[type, list[int]] = {}
+    for i, command in enumerate(commands):
+        indices_by_type.setdefault(type(command), []).append(i)
+    for command_type, indices in indices_by_type.items():
+        if getattr(command_type, 'validate', None) is validate_fields:
+            violations_of_many = _compiled_of(command_type)[1]
+            for position, violations in violations_of_many([commands[i] for i in indices]):
+                errors[indices[position]] = ValidationError(violations)
+            continue
+        for i in indices:
+            try:
+                commands[i].validate()
+            except Exception as e:
+                errors[i] = e
+    return errors
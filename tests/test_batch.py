@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import pytest
+
+import ddd
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class _MiscountingHandler(ddd.AbstractBatchCommandHandler[SaveUserCommand, str]):
+    def __init__(self, user_repository: ddd.SavepointRollbackCommitter):
+        self._user_repository = user_repository
+
+    def handle_batch(self, batch: ddd.CommandBatch[SaveUserCommand]) -> list[str]:
+        for user_id in batch.column('user_id'):
+            self._user_repository.save(User('changed@mail.com', user_id))
+        return []
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return []
+
+    @property
+    def resources(self) -> list[ddd.RollbackCommitter]:
+        return [self._user_repository]
+
+    def commit(self) -> None:
+        self._user_repository.commit()
+
+    def rollback(self) -> None:
+        self._user_repository.rollback()
+
+
+class TestCommandBatch:
+    def test_columns(self):
+        batch = ddd.CommandBatch([SaveUserCommand('1', 'a@mail.com'), SaveUserCommand('2', 'b@mail.com')])
+
+        assert batch.name == 'SaveUserCommand'
+        assert len(batch) == 2
+        assert batch.column('user_id') == ['1', '2']
+        assert batch.column('user_id') is batch.column('user_id')
+        assert list(batch.array('email')) == ['a@mail.com', 'b@mail.com']
+        assert batch.changed('email', ['a@mail.com', None]) == [1]
+        with pytest.raises(ValueError):
+            batch.changed('email', ['a@mail.com'])
+        with pytest.raises(ValueError):
+            ddd.CommandBatch([])
+
+    def test_arrays_of_native_dtypes(self, monkeypatch):
+        numpy = pytest.importorskip('numpy')
+        monkeypatch.setattr(ddd.batch, '_numpy', numpy)
+        batch = ddd.CommandBatch([SaveUserCommand('1', 'a@mail.com'), SaveUserCommand('2', None)])
+
+        assert batch.array('user_id').dtype.kind == 'U'
+        assert batch.array('email').dtype == object
+        assert batch.changed('email', ['b@mail.com', None]) == [0]
+
+
+class TestBatchHandlers:
+    @pytest.fixture
+    def bootstrapper(self) -> DemoBootstrapper:
+        bootstrapper = DemoBootstrapper(batch_handlers=True)
+        for id_ in ('1', '2', '3'):
+            bootstrapper.user_repository.users_by_id[id_] = User(f'{id_}@mail.com', id_)
+            bootstrapper.async_user_repository.users_by_id[id_] = User(f'{id_}@mail.com', id_)
+        return bootstrapper
+
+    def test_commands_of_a_type_are_handled_at_once(self, bootstrapper, monkeypatch):
+        get_many_calls = []
+        get_many = bootstrapper.user_repository.get_many
+        monkeypatch.setattr(
+            bootstrapper.user_repository, 'get_many', lambda ids: get_many_calls.append(ids) or get_many(ids)
+        )
+        commands = [
+            SaveUserCommand('1', 'new@mail.com'),
+            SaveUserCommand('2', ''),
+            SaveUserCommand('missing', 'new@mail.com'),
+            SaveUserCommand('3', '3@mail.com'),
+        ]
+
+        results = bootstrapper.handle_commands(commands)
+
+        assert [result.result for result in results] == ['1', None, None, '3']
+        assert results[1].error.status_code == ddd.BAD_REQUEST
+        assert results[2].error.status_code == ddd.NOT_FOUND
+        assert get_many_calls == [['1', 'missing', '3']]
+        assert bootstrapper.user_repository.commit_count == 1
+        assert bootstrapper.user_repository.users_by_id['1'].email == 'new@mail.com'
+        assert bootstrapper.user_repository.users_by_id['3'].get_version() == 0
+        assert bootstrapper.pubsub_client.notify_email_set_new_email == 'new@mail.com'
+
+    def test_commands_of_the_same_entity_apply_in_order(self, bootstrapper):
+        commands = [SaveUserCommand('1', 'new@mail.com'), SaveUserCommand('1', '1@mail.com')]
+
+        results = bootstrapper.handle_commands(commands)
+
+        assert all(result.ok for result in results)
+        assert bootstrapper.user_repository.users_by_id['1'].email == '1@mail.com'
+
+    def test_single_command_is_handled_by_handle(self, bootstrapper):
+        assert bootstrapper.handle_command(SaveUserCommand('1', 'new@mail.com')) == '1'
+        with pytest.raises(ddd.BoundedContextError):
+            bootstrapper.handle_command(SaveUserCommand('missing', 'new@mail.com'))
+
+    def test_miscounted_results_roll_back_the_batch(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository.users_by_id['1'] = User('1@mail.com', '1')
+        factory = ddd.CommandHandlerFactory()
+        factory.register('SaveUserCommand', lambda: _MiscountingHandler(bootstrapper.user_repository))
+        bus = ddd.MessageBus(factory, ddd.EventHandlersFactory())
+
+        results = bus.publish_batch([SaveUserCommand('1', 'new@mail.com')])
+
+        assert isinstance(results[0].error, ValueError)
+        assert bootstrapper.user_repository.users_by_id['1'].email == '1@mail.com'
+
+    @pytest.mark.asyncio
+    async def test_async_commands_of_a_type_are_handled_at_once(self, bootstrapper):
+        commands = [SaveUserCommand('1', 'new@mail.com'), SaveUserCommand('missing', 'new@mail.com')]
+
+        results = await bootstrapper.async_handle_commands(commands)
+
+        assert results[0].result == '1'
+        assert results[1].error.status_code == ddd.NOT_FOUND
+        assert bootstrapper.async_user_repository.get_many_calls == [['1', 'missing']]
+        assert bootstrapper.async_user_repository.commit_count == 1
+        assert bootstrapper.async_pubsub_client.kpi_event_sent
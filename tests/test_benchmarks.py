@@ -0,0 +1,24 @@
+from benchmarks.cases import CASES, Params
+from benchmarks.runner import compare, run
+
+
+class TestBenchmarks:
+    def test_run_all_cases(self):
+        results = run(sorted(CASES), Params(depth=2, fan_out=2), number=3, repeat=1)
+
+        assert set(results['results']) == set(CASES)
+        assert all(result['ns_per_op'] > 0 for result in results['results'].values())
+
+    def test_compare_flags_regressions_above_threshold(self):
+        baseline = {'results': {'fast': {'min_ns_per_op': 100.0}, 'slow': {'min_ns_per_op': 100.0}}}
+        current = {
+            'results': {
+                'fast': {'min_ns_per_op': 105.0},
+                'slow': {'min_ns_per_op': 125.0},
+                'new': {'min_ns_per_op': 1.0},
+            }
+        }
+
+        comparison = compare(baseline, current, threshold=0.1)
+
+        assert {row['name']: row['regressed'] for row in comparison} == {'fast': False, 'slow': True}
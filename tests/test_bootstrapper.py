@@ -1,6 +1,7 @@
 import pytest
 
 import ddd
+from ddd.unit_of_work import CommitGroup, AsyncCommitGroup
 from demo.domain.command_model.save_user_command import SaveUserCommand
 from demo.domain.command_model.user import User
 from demo.entrypoints.bootstrapper import DemoBootstrapper
@@ -202,6 +203,54 @@ class TestBootstrapper:
         assert not bootstrapper.async_pubsub_client.commit_called
         assert bootstrapper.async_pubsub_client.rollback_called
 
+    def test_handle_commands(self, bootstrapper):
+        self._fill_user_in_repo(bootstrapper)
+        commands = [
+            SaveUserCommand(self.USER_ID, self.NEW_EMAIL),
+            SaveUserCommand(self.USER_ID, email=''),
+            SaveUserCommand('not-existing-user-id', self.NEW_EMAIL),
+        ]
+
+        results = bootstrapper.handle_commands(commands)
+
+        assert [result.command for result in results] == commands
+        assert results[0].ok
+        assert results[0].result == self.USER_ID
+        assert results[1].error.status_code == ddd.error.BAD_REQUEST
+        assert results[2].error.status_code == ddd.error.NOT_FOUND
+        assert bootstrapper.user_repository.commit_count == 1
+        assert not bootstrapper.user_repository.rollback_called
+        assert bootstrapper.user_repository.users_by_id[self.USER_ID].email == self.NEW_EMAIL
+        assert bootstrapper.pubsub_client.notify_email_set_new_email == self.NEW_EMAIL
+        assert bootstrapper.pubsub_client.kpi_event_sent
+
+    def test_handle_commands_commit_raises(self, bootstrapper):
+        self._fill_user_in_repo(bootstrapper)
+        bootstrapper.user_repository.commit_should_fail = True
+        commands = [SaveUserCommand(self.USER_ID, self.NEW_EMAIL), SaveUserCommand(self.USER_ID, self.OLD_EMAIL)]
+
+        results = bootstrapper.handle_commands(commands)
+
+        assert all(self.COMMIT_FAILED in str(result.error).lower() for result in results)
+        assert bootstrapper.user_repository.commit_count == 1
+        assert not bootstrapper.pubsub_client.commit_called
+
+    @pytest.mark.asyncio
+    async def test_async_handle_commands(self, bootstrapper):
+        self._fill_user_in_repo(bootstrapper)
+        commands = [
+            SaveUserCommand(self.USER_ID, self.NEW_EMAIL),
+            SaveUserCommand('not-existing-user-id', self.NEW_EMAIL),
+        ]
+
+        results = await bootstrapper.async_handle_commands(commands)
+
+        assert results[0].result == self.USER_ID
+        assert results[1].error.status_code == ddd.error.NOT_FOUND
+        assert bootstrapper.async_user_repository.commit_count == 1
+        assert not bootstrapper.async_user_repository.rollback_called
+        assert bootstrapper.async_pubsub_client.kpi_event_sent
+
     def test_register_async_command_handler_factory_with_non_async_callable(self, bootstrapper):
         with pytest.raises(ValueError):
             bootstrapper.register_async_command_handler_factory(
@@ -235,3 +284,134 @@ class TestBootstrapper:
         bs.user_repository.users_by_id[cls.USER_ID] = User(email=cls.OLD_EMAIL, id_=cls.USER_ID)
         bs.async_user_repository.users_by_id[cls.USER_ID] = User(email=cls.OLD_EMAIL, id_=cls.USER_ID)
 
+
+class TestGroupCommit:
+    USER_ID = 'agent_566'
+    NEW_EMAIL = 'eli.cohen@mossad.gov.il'
+
+    @pytest.fixture
+    def bootstrapper(self) -> DemoBootstrapper:
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        bootstrapper.async_user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        return bootstrapper
+
+    @classmethod
+    def _count_calls(cls, obj, method_name: str) -> list:
+        calls = []
+        method = getattr(obj, method_name)
+
+        def counted():
+            calls.append(method_name)
+            return method()
+
+        setattr(obj, method_name, counted)
+        return calls
+
+    def test_shared_resource_is_committed_once_per_cascade(self, bootstrapper):
+        commits = self._count_calls(bootstrapper.pubsub_client, 'commit')
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+        assert len(commits) == 2
+
+        bootstrapper.enable_group_commit()
+        commits.clear()
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, 'other@mail.com'))
+
+        assert len(commits) == 1
+        assert bootstrapper.pubsub_client.email_sent
+        assert bootstrapper.pubsub_client.kpi_event_sent
+
+    def test_checkpoints(self, bootstrapper):
+        bootstrapper.enable_group_commit(checkpoint_every=1)
+        commits = self._count_calls(bootstrapper.pubsub_client, 'commit')
+
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert len(commits) == 2
+
+    def test_failing_handler_rolls_back_the_group(self, bootstrapper):
+        bootstrapper.enable_group_commit()
+        bootstrapper.pubsub_client.notify_email_set_should_fail = True
+        commits = self._count_calls(bootstrapper.pubsub_client, 'commit')
+        rollbacks = self._count_calls(bootstrapper.pubsub_client, 'rollback')
+
+        with pytest.raises(Exception, match='notify failed'):
+            bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert commits == []
+        assert len(rollbacks) == 1
+
+    class _Committer(ddd.RollbackCommitter):
+        def __init__(self, calls: list, name: str, fail: bool = False):
+            self._calls = calls
+            self._name = name
+            self._fail = fail
+
+        def commit(self) -> None:
+            self._calls.append(f'commit {self._name}')
+            if self._fail:
+                raise RuntimeError(f'commit {self._name} failed')
+
+        def rollback(self) -> None:
+            self._calls.append(f'rollback {self._name}')
+            if self._fail:
+                raise RuntimeError(f'rollback {self._name} failed')
+
+    class _AsyncCommitter(ddd.AsyncRollbackCommitter):
+        def __init__(self, committer: ddd.RollbackCommitter):
+            self._committer = committer
+
+        async def commit(self) -> None:
+            self._committer.commit()
+
+        async def rollback(self) -> None:
+            self._committer.rollback()
+
+    def test_failing_commit_rolls_back_the_failing_and_remaining_committers(self, caplog):
+        calls = []
+        group = CommitGroup()
+        group.add([self._Committer(calls, 'a'), self._Committer(calls, 'b', fail=True), self._Committer(calls, 'c')])
+
+        with pytest.raises(RuntimeError, match='commit b failed') as e:
+            group.commit()
+
+        assert calls == ['commit a', 'commit b', 'rollback b', 'rollback c']
+        assert e.value.__cause__ is None
+        assert str(caplog.records[-1].exc_info[1]) == 'rollback b failed'
+        assert len(group) == 0
+
+    @pytest.mark.asyncio
+    async def test_async_failing_commit_rolls_back_the_failing_and_remaining_committers(self, caplog):
+        calls = []
+        group = AsyncCommitGroup()
+        group.add([
+            self._AsyncCommitter(self._Committer(calls, name, fail=name == 'b')) for name in ('a', 'b', 'c')
+        ])
+
+        with pytest.raises(RuntimeError, match='commit b failed') as e:
+            await group.commit()
+
+        assert calls == ['commit a', 'commit b', 'rollback b', 'rollback c']
+        assert e.value.__cause__ is None
+        assert str(caplog.records[-1].exc_info[1]) == 'rollback b failed'
+
+    def test_checkpoint_every_must_be_positive(self, bootstrapper):
+        with pytest.raises(ValueError):
+            bootstrapper.enable_group_commit(checkpoint_every=0)
+
+    @pytest.mark.asyncio
+    async def test_async_group_commit(self, bootstrapper):
+        bootstrapper.enable_group_commit()
+        commits = []
+        commit = bootstrapper.async_pubsub_client.commit
+
+        async def counted_commit():
+            commits.append('commit')
+            await commit()
+
+        bootstrapper.async_pubsub_client.commit = counted_commit
+
+        await bootstrapper.async_handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert len(commits) == 1
+        assert bootstrapper.async_pubsub_client.kpi_event_sent
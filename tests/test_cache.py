@@ -0,0 +1,153 @@
+import pytest
+
+import ddd
+from demo.adapters.repositories.user_repository import InMemoryUserRepository, AsyncInMemoryUserRepository
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCachedRepository:
+    @pytest.fixture
+    def repository(self) -> InMemoryUserRepository:
+        repository = InMemoryUserRepository()
+        for id_ in ['1', '2', '3']:
+            repository.users_by_id[id_] = User(email='old@mail.com', id_=id_)
+        return repository
+
+    def test_identity_map_and_cache(self, repository):
+        cached = ddd.cached_repository(repository, ddd.EntityCache())
+
+        assert isinstance(cached, ddd.CachedSavepointRepository)
+        user = cached.get_by_id('1')
+        assert cached.get_by_id('1') is user
+        cached.commit()
+        cached_user = cached.get_by_id('1')
+        assert cached_user is not user and cached_user.email == user.email
+
+        assert cached.stats == ddd.CacheStats(identity_map_hits=1, cache_hits=1, misses=1)
+        assert cached.stats.hits == 2
+
+    def test_without_cache_entities_are_reloaded_by_unit_of_work(self, repository):
+        cached = ddd.CachedRepository(repository)
+        cached.get_by_id('1')
+        cached.get_by_id('1')
+        cached.rollback()
+        cached.get_by_id('1')
+
+        assert cached.stats == ddd.CacheStats(identity_map_hits=1, cache_hits=0, misses=2)
+
+    def test_saved_entities_are_invalidated_on_commit(self, repository):
+        cache = ddd.EntityCache()
+        cached = ddd.cached_repository(repository, cache)
+        cached.get_by_id('1')
+        cached.get_by_id('2')
+        cached.save(User(email='new@mail.com', id_='2'))
+        cached.commit()
+
+        assert cache.get('1') is not None and cache.get('2') is None
+        assert cached.get_by_id('2').email == 'new@mail.com'
+
+    def test_loaded_entities_are_invalidated_on_rollback(self, repository):
+        cache = ddd.EntityCache()
+        cached = ddd.cached_repository(repository, cache)
+        cached.get_by_id('1')
+        cached.rollback()
+
+        assert len(cache) == 0
+
+    def test_units_of_work_do_not_share_the_cached_entities(self, repository):
+        cache = ddd.EntityCache()
+        first, second = ddd.cached_repository(repository, cache), ddd.cached_repository(repository, cache)
+        first.get_by_id('1')
+        first.commit()
+
+        user = first.get_by_id('1')
+        user.set_email('uncommitted@mail.com')
+
+        assert second.get_by_id('1').email == 'old@mail.com'
+        assert cache.get('1').email == 'old@mail.com'
+
+    def test_entity_invalidated_while_loaded_is_not_cached(self, repository, monkeypatch):
+        cache = ddd.EntityCache()
+        cached = ddd.cached_repository(repository, cache)
+        get_by_id = repository.get_by_id
+
+        def get_by_id_and_commit_concurrently(id_: str) -> User:
+            user = get_by_id(id_)
+            other = ddd.cached_repository(repository, cache)
+            other.save(User(email='new@mail.com', id_=id_))
+            other.commit()
+            return user
+
+        monkeypatch.setattr(repository, 'get_by_id', get_by_id_and_commit_concurrently)
+
+        assert cached.get_by_id('1').email == 'old@mail.com'
+        assert cache.get('1') is None
+
+    def test_put_is_skipped_once_invalidated_since_its_generation(self):
+        cache = ddd.EntityCache()
+        generation = cache.generation
+        cache.invalidate(['2'])
+        cache.put('1', User(id_='1'), generation)
+
+        assert cache.get('1') is None
+        cache.put('1', User(id_='1'), cache.generation)
+        assert cache.get('1') is not None
+
+    def test_lru_and_ttl(self):
+        clock = FakeClock()
+        cache = ddd.EntityCache(max_size=2, ttl=10, clock=clock)
+        users = {id_: User(id_=id_) for id_ in ['1', '2', '3']}
+        cache.put('1', users['1'])
+        cache.put('2', users['2'])
+        cache.get('1')
+        cache.put('3', users['3'])
+
+        assert cache.get('2') is None
+        assert cache.get('1').get_id() == '1'
+
+        clock.now = 10
+        assert cache.get('1') is None and cache.get('3') is None
+
+    def test_commands_of_a_batch_load_the_user_once(self, repository, monkeypatch):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository = ddd.cached_repository(repository, ddd.EntityCache())
+        loads = []
+        get_by_id = repository._get_by_id
+        monkeypatch.setattr(repository, '_get_by_id', lambda id_: loads.append(id_) or get_by_id(id_))
+
+        results = bootstrapper.handle_commands(
+            [SaveUserCommand('1', 'a@mail.com'), SaveUserCommand('1', 'b@mail.com'), SaveUserCommand('4', 'c@mail.com')]
+        )
+
+        assert [result.ok for result in results] == [True, True, False]
+        assert loads == ['1', '4']
+        assert repository.users_by_id['1'].email == 'b@mail.com'
+
+        bootstrapper.handle_command(SaveUserCommand('1', 'd@mail.com'))
+
+        assert loads == ['1', '4', '1']
+
+    @pytest.mark.asyncio
+    async def test_async_cached_repository(self):
+        repository = AsyncInMemoryUserRepository()
+        repository.users_by_id['1'] = User(email='old@mail.com', id_='1')
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.async_user_repository = ddd.cached_repository(repository, ddd.EntityCache())
+
+        assert isinstance(bootstrapper.async_user_repository, ddd.AsyncCachedSavepointRepository)
+        await bootstrapper.async_handle_commands(
+            [SaveUserCommand('1', 'a@mail.com'), SaveUserCommand('1', 'b@mail.com')]
+        )
+
+        assert bootstrapper.async_user_repository.stats == ddd.CacheStats(identity_map_hits=1, misses=1)
+        assert repository.users_by_id['1'].email == 'b@mail.com'
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import dataclasses
+
+import pytest
+
+import ddd
+from demo.adapters.message_codecs import MESSAGE_CODECS
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.save_user_command import SaveUserCommand
+
+
+@dataclasses.dataclass
+class _TypedEvent(ddd.AbstractEvent):
+    count: int = 0
+    ratio: float | None = None
+    flag: bool = False
+    data: bytes = b''
+    tags: list[str] = dataclasses.field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+
+class TestCodecRegistry:
+    @pytest.fixture
+    def codecs(self) -> ddd.CodecRegistry:
+        codecs = ddd.CodecRegistry()
+        codecs.register(SaveUserCommand)
+        codecs.register(_TypedEvent)
+        return codecs
+
+    def test_dicts_and_json(self, codecs):
+        command = SaveUserCommand('1', 'user@mail.com')
+
+        assert codecs.to_dict(command) == {'type': 'SaveUserCommand', 'user_id': '1', 'email': 'user@mail.com'}
+        assert codecs.from_dict({'type': 'SaveUserCommand', 'user_id': '1'}) == SaveUserCommand('1')
+        assert codecs.decode_json(memoryview(codecs.encode_json(command))) == command
+        assert codecs.from_dict({'type': '_TypedEvent'}) == _TypedEvent()
+
+    def test_binary_round_trips_every_field_type(self, codecs):
+        events = [
+            _TypedEvent(-3, 0.5, True, b'\x00\xff', ['a', 'b']),
+            _TypedEvent(ratio=None, data=None, tags=None),
+        ]
+        for event in events:
+            data = codecs.encode_binary(event)
+
+            assert codecs.decode_binary(data) == event
+            assert codecs.decode_binary(memoryview(bytearray(b'__' + data))[2:]) == event
+
+    def test_binary_is_smaller_than_json(self):
+        event = EmailSetEvent(user_id='1', new_email='new@mail.com', old_email=None)
+
+        assert len(MESSAGE_CODECS.encode_binary(event)) < len(MESSAGE_CODECS.encode_json(event))
+        assert MESSAGE_CODECS.decode_binary(MESSAGE_CODECS.encode_binary(event)) == event
+
+    @pytest.mark.parametrize('decode, data', [
+        ('decode_binary', b'\x05other'),
+        ('decode_binary', b'\x0fSaveUserCommand\x00\x01\x00\x00\x00\x05\x00\x00\x001a@b'),
+        ('decode_json', b'{"type": "SaveUserCommand"'),
+        ('decode_json', b'[]'),
+    ])
+    def test_invalid_data_is_a_bad_request(self, codecs, decode, data):
+        with pytest.raises(ddd.BoundedContextError) as e:
+            getattr(codecs, decode)(data)
+
+        assert e.value.status_code == ddd.BAD_REQUEST
+
+    def test_registration(self, codecs):
+        with pytest.raises(ValueError):
+            codecs.register(SaveUserCommand)
+        with pytest.raises(ValueError):
+            codecs.register(ddd.AbstractEvent)
+        with pytest.raises(ddd.BoundedContextError):
+            codecs.from_dict({'type': 'unknown'})
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import ddd
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+from demo.entrypoints.pubsub.main import create_decoder
+
+
+class TestConsumer:
+    USER_IDS = [f'agent_{i}' for i in range(10)]
+    NEW_EMAIL = 'eli.cohen@mossad.gov.il'
+
+    @pytest.fixture
+    def bootstrapper(self) -> DemoBootstrapper:
+        bootstrapper = DemoBootstrapper()
+        for user_id in self.USER_IDS:
+            bootstrapper.user_repository.users_by_id[user_id] = User(email='old@mail.com', id_=user_id)
+            bootstrapper.async_user_repository.users_by_id[user_id] = User(email='old@mail.com', id_=user_id)
+        return bootstrapper
+
+    def _messages(self, user_ids: list[str]) -> list[dict]:
+        return [{'type': 'SaveUserCommand', 'user_id': user_id, 'email': self.NEW_EMAIL} for user_id in user_ids]
+
+    def test_handled_messages_are_acked_in_batches(self, bootstrapper):
+        pubsub_client = bootstrapper.pubsub_client
+        pubsub_client.commands = self._messages(self.USER_IDS)
+        ack_batches = []
+
+        def ack(messages: list[dict]) -> None:
+            ack_batches.append(len(messages))
+            pubsub_client.ack_save_user_messages(messages)
+
+        consumer = ddd.Consumer(bootstrapper, create_decoder(), prefetch=2, concurrency=3, ack_batch_size=4)
+        stats = consumer.run(pubsub_client.get_save_user_messages(), ack)
+
+        assert stats == ddd.ConsumerStats(received=10, handled=10, failed=0, acked=10)
+        assert sum(ack_batches) == 10 and max(ack_batches) <= 4
+        assert sorted(m['user_id'] for m in pubsub_client.acked_commands) == sorted(self.USER_IDS)
+        assert all(bootstrapper.user_repository.users_by_id[user_id].email == self.NEW_EMAIL
+                   for user_id in self.USER_IDS)
+
+    def test_failed_messages_are_not_acked(self, bootstrapper):
+        pubsub_client = bootstrapper.pubsub_client
+        pubsub_client.commands = self._messages(['agent_0', 'not-existing-user-id']) + [{'type': 'Unknown'}]
+        errors = []
+
+        consumer = ddd.Consumer(bootstrapper, create_decoder(), on_error=lambda raw, e: errors.append(e))
+        stats = consumer.run(pubsub_client.get_save_user_messages(), pubsub_client.ack_save_user_messages)
+
+        assert stats == ddd.ConsumerStats(received=3, handled=1, failed=2, acked=1)
+        assert [m['user_id'] for m in pubsub_client.acked_commands] == ['agent_0']
+        assert [e.status_code for e in errors] == [ddd.NOT_FOUND, ddd.BAD_REQUEST]
+
+    def test_stop_drains_the_prefetched_messages(self, bootstrapper):
+        consumer = ddd.Consumer(bootstrapper, create_decoder(), prefetch=3)
+
+        def messages():
+            for message in self._messages(self.USER_IDS):
+                if message['user_id'] == 'agent_5':
+                    consumer.stop()
+                yield message
+
+        stats = consumer.run(messages(), bootstrapper.pubsub_client.ack_save_user_messages)
+
+        assert stats.received == stats.handled == stats.acked == 5
+
+    def test_failing_ack_and_on_error_do_not_stop_the_workers(self, bootstrapper):
+        pubsub_client = bootstrapper.pubsub_client
+        pubsub_client.commands = self._messages(['agent_0', 'not-existing-user-id'] + self.USER_IDS[1:])
+
+        def ack(messages: list[dict]) -> None:
+            raise RuntimeError('Ack failed')
+
+        def on_error(raw: dict, error: Exception) -> None:
+            raise RuntimeError('on_error failed')
+
+        consumer = ddd.Consumer(bootstrapper, create_decoder(), prefetch=2, ack_batch_size=1, on_error=on_error)
+        stats = consumer.run(pubsub_client.get_save_user_messages(), ack)
+
+        assert stats == ddd.ConsumerStats(received=11, handled=10, failed=1, acked=0)
+
+    def test_decoder_rejects_duplicates(self):
+        decoder = create_decoder()
+
+        with pytest.raises(ValueError):
+            decoder.register('SaveUserCommand', lambda raw: None)
+
+    @pytest.mark.asyncio
+    async def test_async_consumer(self, bootstrapper):
+        pubsub_client = bootstrapper.async_pubsub_client
+        pubsub_client.commands = self._messages(self.USER_IDS) + self._messages(['not-existing-user-id'])
+
+        consumer = ddd.AsyncConsumer(
+            bootstrapper, create_decoder(), prefetch=2, concurrency=4, ack_batch_size=3, on_error=lambda *args: None
+        )
+        stats = await consumer.run(pubsub_client.get_save_user_messages(), pubsub_client.ack_save_user_messages)
+
+        assert stats == ddd.ConsumerStats(received=11, handled=10, failed=1, acked=10)
+        assert len(pubsub_client.acked_commands) == 10
+        assert all(bootstrapper.async_user_repository.users_by_id[user_id].email == self.NEW_EMAIL
+                   for user_id in self.USER_IDS)
+
+    @pytest.mark.asyncio
+    async def test_async_consumer_survives_a_failing_ack(self, bootstrapper):
+        pubsub_client = bootstrapper.async_pubsub_client
+        pubsub_client.commands = self._messages(self.USER_IDS)
+        acks = []
+
+        async def ack(messages: list[dict]) -> None:
+            acks.append(messages)
+            if len(acks) == 1:
+                raise RuntimeError('Ack failed')
+
+        consumer = ddd.AsyncConsumer(bootstrapper, create_decoder(), prefetch=2, ack_batch_size=1)
+        stats = await asyncio.wait_for(consumer.run(pubsub_client.get_save_user_messages(), ack), 5)
+
+        assert stats == ddd.ConsumerStats(received=10, handled=10, failed=0, acked=9)
+        assert len(acks) == 10
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+import ddd
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.user import User
+
+USER_ID = '1'
+
+
+def _create_user(id_: str) -> User:
+    return User(id_=id_)
+
+
+def _apply(user: User, event: EmailSetEvent) -> None:
+    user._email = event.new_email
+
+
+def _events(count: int, user_id: str = USER_ID) -> list[EmailSetEvent]:
+    return [EmailSetEvent(user_id=user_id, new_email=f'{i}@mail.com') for i in range(count)]
+
+
+class TestFileEventStore:
+    @pytest.fixture
+    def directory(self, tmp_path) -> str:
+        return str(tmp_path)
+
+    def test_streams_are_appended_and_loaded_in_order(self, directory):
+        store = ddd.FileEventStore(directory, segment_size=256)
+
+        assert store.append(USER_ID, _events(3)) == 3
+        assert store.append('2', _events(2, '2')) == 2
+        assert store.append(USER_ID, _events(2)[1:], expected_version=3) == 4
+
+        assert store.load(USER_ID) == _events(3) + _events(2)[1:]
+        assert store.load(USER_ID, after_version=2) == _events(3)[2:] + _events(2)[1:]
+        assert store.load('2') == _events(2, '2')
+        assert store.load('missing') == []
+        assert len([name for name in os.listdir(directory) if name.endswith('.segment')]) > 1
+        store.close()
+
+    def test_appending_at_another_version_conflicts(self, directory):
+        store = ddd.FileEventStore(directory)
+        store.append(USER_ID, _events(1))
+
+        with pytest.raises(ddd.ConflictError):
+            store.append(USER_ID, _events(1), expected_version=0)
+
+        assert store.get_version(USER_ID) == 1
+        store.close()
+
+    def test_the_index_is_rebuilt_and_a_partial_batch_is_truncated_on_reopen(self, directory):
+        store = ddd.FileEventStore(directory, segment_size=256)
+        store.append(USER_ID, _events(5))
+        store.append('2', _events(2, '2'))
+        store.close()
+        [*_, last_segment] = sorted(name for name in os.listdir(directory) if name.endswith('.segment'))
+        path = os.path.join(directory, last_segment)
+        size = os.path.getsize(path)
+        with open(path, 'r+b') as f:
+            f.truncate(size - 3)
+
+        store = ddd.FileEventStore(directory, segment_size=256)
+
+        assert store.load(USER_ID) == _events(5)
+        assert store.get_version('2') == 0
+        assert store.append('2', _events(1, '2'), expected_version=0) == 1
+        assert store.load('2') == _events(1, '2')
+        store.close()
+
+
+class TestEventSourcedRepository:
+    @pytest.fixture
+    def store(self, tmp_path) -> ddd.FileEventStore:
+        store = ddd.FileEventStore(str(tmp_path))
+        yield store
+        store.close()
+
+    def _change_email(self, repository: ddd.EventSourcedRepository, email: str) -> None:
+        user = repository.get_by_id(USER_ID)
+        user.set_email(email)
+        repository.save(user)
+        user.pull_events()
+        repository.commit()
+
+    def test_entities_are_rehydrated_from_their_latest_snapshot(self, store):
+        repository = ddd.EventSourcedRepository(store, _create_user, _apply, snapshot_every=2)
+        user = User(id_=USER_ID)
+        user.set_email('0@mail.com')
+        repository.save(user)
+        repository.commit()
+        for i in range(1, 5):
+            self._change_email(repository, f'{i}@mail.com')
+
+        version, snapshot = store.load_snapshot(USER_ID)
+        user = repository.get_by_id(USER_ID)
+
+        assert (version, snapshot.email, snapshot.pull_events()) == (4, '3@mail.com', [])
+        assert (user.email, user.get_version()) == ('4@mail.com', 5)
+
+    def test_concurrent_changes_conflict_and_rollback_discards(self, store):
+        repository = ddd.EventSourcedRepository(store, _create_user, _apply)
+        with pytest.raises(ddd.BoundedContextError) as e:
+            repository.get_by_id(USER_ID)
+        assert e.value.status_code == ddd.NOT_FOUND
+        user = User(id_=USER_ID)
+        user.set_email('0@mail.com')
+        repository.save(user)
+        repository.commit()
+
+        stale_user = repository.get_by_id(USER_ID)
+        self._change_email(repository, '1@mail.com')
+        stale_user.set_email('2@mail.com')
+        repository.save(stale_user)
+
+        with pytest.raises(ddd.ConflictError):
+            repository.commit()
+
+        stale_user = repository.get_by_id(USER_ID)
+        stale_user.set_email('3@mail.com')
+        repository.save(stale_user)
+        repository.rollback()
+        repository.commit()
+
+        assert repository.get_by_id(USER_ID).email == '1@mail.com'
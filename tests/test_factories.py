@@ -0,0 +1,220 @@
+import pytest
+
+import ddd
+from demo.adapters.clients.pubsub_client import InMemoryPubSubClient
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.domain.model import ChangeEmailCommand, EmailChangedEvent
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+from demo.service_layer.event_handlers.email_set_event_handler import EmailSetEventHandler
+
+
+class TestHandlerScopes:
+    USER_ID = 'agent_566'
+
+    @pytest.fixture
+    def pubsub_client(self) -> InMemoryPubSubClient:
+        return InMemoryPubSubClient()
+
+    def test_transient_creates_a_handler_per_message(self, pubsub_client):
+        factory = ddd.EventHandlersFactory()
+        factory.register(EmailSetEvent().name, lambda: EmailSetEventHandler(pubsub_client))
+
+        first = factory.create_handlers(EmailSetEvent().name)
+        factory.release_handlers(EmailSetEvent().name, first)
+        second = factory.create_handlers(EmailSetEvent().name)
+
+        assert first[0] is not second[0]
+
+    def test_singleton_is_reset_between_uses(self, pubsub_client):
+        factory = ddd.EventHandlersFactory()
+        factory.register(EmailSetEvent().name, lambda: EmailSetEventHandler(pubsub_client), ddd.SINGLETON)
+
+        [handler] = factory.create_handlers(EmailSetEvent().name)
+        handler.handle(EmailSetEvent(user_id=self.USER_ID))
+        factory.release_handlers(EmailSetEvent().name, [handler])
+
+        assert factory.create_handlers(EmailSetEvent().name) == [handler]
+        assert handler.events == []
+
+    def test_singleton_is_not_shared_by_overlapping_units_of_work(self, pubsub_client):
+        factory = ddd.EventHandlersFactory()
+        factory.register(EmailSetEvent().name, lambda: EmailSetEventHandler(pubsub_client), ddd.SINGLETON)
+
+        [singleton] = factory.create_handlers(EmailSetEvent().name)
+        [overlapping] = factory.create_handlers(EmailSetEvent().name)
+        overlapping.handle(EmailSetEvent(user_id=self.USER_ID))
+        singleton.handle(EmailSetEvent(user_id=self.USER_ID))
+        factory.release_handlers(EmailSetEvent().name, [singleton])
+
+        assert overlapping is not singleton
+        assert len(overlapping.events) == 1
+        factory.release_handlers(EmailSetEvent().name, [overlapping])
+        assert factory.create_handlers(EmailSetEvent().name) == [singleton]
+        assert factory.create_handlers(EmailSetEvent().name) != [overlapping]
+
+    @pytest.mark.asyncio
+    async def test_singleton_event_handlers_run_concurrently(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.register_async_event_handler_factory(
+            EmailSetEvent, bootstrapper.create_async_kpi_event_handler, ddd.SINGLETON
+        )
+        bootstrapper.enable_concurrent_async_events(concurrent_cascade_levels=True)
+
+        await bootstrapper.async_handle_events([EmailSetEvent(user_id='1'), EmailSetEvent(user_id='2')])
+
+        assert bootstrapper.async_pubsub_client.kpi_event_sent
+
+    def test_pooled_reuses_at_most_size_handlers(self, pubsub_client):
+        factory = ddd.EventHandlersFactory()
+        factory.register(EmailSetEvent().name, lambda: EmailSetEventHandler(pubsub_client), ddd.pooled(1))
+
+        [first] = factory.create_handlers(EmailSetEvent().name)
+        [second] = factory.create_handlers(EmailSetEvent().name)
+        factory.release_handlers(EmailSetEvent().name, [first])
+        factory.release_handlers(EmailSetEvent().name, [second])
+
+        assert first is not second
+        assert factory.create_handlers(EmailSetEvent().name) == [first]
+        assert factory.create_handlers(EmailSetEvent().name) != [second]
+
+    def test_pooled_size_must_be_positive(self):
+        with pytest.raises(ValueError):
+            ddd.pooled(0)
+
+    def test_pooled_command_handler_is_returned_after_its_unit_of_work(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.register_command_handler_factory(
+            SaveUserCommand().name, bootstrapper.create_save_user_command_handler, ddd.pooled(1)
+        )
+        bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, 'new@mail.com'))
+        handler = bootstrapper._command_handler_factory.create_handler(SaveUserCommand().name)
+
+        assert handler.events == []
+        assert bootstrapper.pubsub_client.kpi_event_sent
+
+
+class TestFreeze:
+    USER_ID = 'agent_566'
+
+    def test_unregistered_event_does_not_leak_registrations(self):
+        factory = ddd.EventHandlersFactory()
+
+        assert factory.create_handlers('UnknownEvent') == []
+        assert 'UnknownEvent' not in factory._handler_providers
+
+    def test_register_after_freeze_raises(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.freeze()
+
+        with pytest.raises(ValueError):
+            bootstrapper.register_event_handler_factory(
+                EmailSetEvent().name, bootstrapper.create_email_changed_event_handler
+            )
+
+    def test_frozen_bootstrapper_handles_commands(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.freeze()
+        bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+
+        result = bootstrapper.handle_command(SaveUserCommand(self.USER_ID, 'new@mail.com'))
+
+        assert result == self.USER_ID
+        assert bootstrapper.pubsub_client.kpi_event_sent
+        assert bootstrapper._event_handlers_factory.create_handlers('UnknownEvent') == []
+        assert 'UnknownEvent' not in bootstrapper._event_handlers_factory._handler_providers
+
+    def test_frozen_factories_resolve_from_a_compiled_table(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.register_event_handler_factory(ddd.AbstractEvent, bootstrapper.create_kpi_event_handler)
+        bootstrapper.freeze()
+        command_factory = bootstrapper._command_handler_factory
+        event_factory = bootstrapper._event_handlers_factory
+
+        class LateEvent(ddd.Event):
+            pass
+
+        assert command_factory._resolved[SaveUserCommand][0] == 'SaveUserCommand'
+        assert len(event_factory._resolved[EmailSetEvent][1]) == 2
+        assert len(event_factory.create_handlers(LateEvent())) == 1
+        assert LateEvent not in event_factory._resolved
+        with pytest.raises(TypeError):
+            event_factory._resolved[LateEvent] = ('LateEvent', ())
+
+    def test_frozen_factories_cache_messages_named_by_a_property(self, monkeypatch):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.register_command_handler_factory(ChangeEmailCommand, bootstrapper.create_save_user_command_handler)
+        bootstrapper.register_event_handler_factory(EmailChangedEvent, bootstrapper.create_kpi_event_handler)
+        bootstrapper.freeze()
+        command_factory = bootstrapper._command_handler_factory
+        event_factory = bootstrapper._event_handlers_factory
+
+        command_factory.create_handler(ChangeEmailCommand())
+        event_factory.create_handlers(EmailChangedEvent())
+        monkeypatch.setattr(command_factory, '_resolve', None)
+        monkeypatch.setattr(event_factory, '_resolve', None)
+
+        assert command_factory.create_handler(ChangeEmailCommand()) is not None
+        assert len(event_factory.create_handlers(EmailChangedEvent())) == 1
+        assert ChangeEmailCommand not in command_factory._resolved
+        assert EmailChangedEvent not in event_factory._resolved
+
+
+class TestTypeDispatch:
+    USER_ID = 'agent_566'
+
+    @pytest.fixture
+    def bootstrapper(self) -> DemoBootstrapper:
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        return bootstrapper
+
+    def test_register_command_handler_by_class(self):
+        bootstrapper = DemoBootstrapper()
+        factory = ddd.CommandHandlerFactory()
+        factory.register(ddd.AbstractCommand, bootstrapper.create_save_user_command_handler)
+
+        handler = factory.create_handler(SaveUserCommand(self.USER_ID))
+
+        assert handler is not None
+        with pytest.raises(ValueError):
+            factory.create_handler(SaveUserCommand().name)
+
+    def test_catch_all_and_base_class_subscribers_in_registration_order(self, bootstrapper):
+        audited = []
+
+        class AuditHandler(EmailSetEventHandler):
+            def handle(self, event: ddd.TEvent) -> None:
+                audited.append((self.label, event.name))
+
+        def create_audit_handler(label):
+            handler = AuditHandler(bootstrapper.pubsub_client)
+            handler.label = label
+            return handler
+
+        bootstrapper.register_event_handler_factory(ddd.AbstractEvent, lambda: create_audit_handler('all'))
+        bootstrapper.register_event_handler_factory(EmailSetEvent, lambda: create_audit_handler('email set'))
+
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, 'new@mail.com'))
+
+        assert audited == [('all', 'EmailSetEvent'), ('email set', 'EmailSetEvent'), ('all', 'KpiEvent')]
+
+    def test_resolution_is_cached_per_class(self, bootstrapper):
+        factory = bootstrapper._event_handlers_factory
+
+        first = factory.create_handlers(EmailSetEvent(user_id='1'))
+        second = factory.create_handlers(EmailSetEvent(user_id='2'))
+
+        assert len(first) == len(second) == 1
+        assert list(factory._resolved) == [EmailSetEvent]
+
+    def test_registration_invalidates_the_cache(self, bootstrapper):
+        factory = bootstrapper._event_handlers_factory
+        factory.create_handlers(EmailSetEvent())
+
+        bootstrapper.register_event_handler_factory(ddd.AbstractEvent, bootstrapper.create_kpi_event_handler)
+
+        assert len(factory.create_handlers(EmailSetEvent())) == 2
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import ddd
+from demo.adapters.repositories.sqlite_user_repository import SqliteConnectionPool, AsyncSqliteUserRepository
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class TestAsyncBatchLoader:
+    @pytest.mark.asyncio
+    async def test_loads_of_the_same_iteration_are_coalesced_and_deduplicated(self):
+        calls = []
+
+        async def load_many(keys: list[int]) -> dict[int, str]:
+            calls.append(keys)
+            return {key: str(key) for key in keys if key != 3}
+
+        loader = ddd.AsyncBatchLoader(load_many, max_batch_size=2)
+
+        values = await asyncio.gather(*(loader.load(key) for key in [1, 2, 1, 3]))
+
+        assert values == ['1', '2', '1', None]
+        assert calls == [[1, 2], [3]]
+        assert (loader.loads, loader.batches) == (4, 2)
+
+        assert await loader.load(1) == '1'
+        assert calls[-1] == [1]
+
+    @pytest.mark.asyncio
+    async def test_errors_are_raised_by_all_the_loads_of_the_batch(self):
+        async def load_many(keys: list[int]) -> dict[int, str]:
+            raise ValueError('load failed')
+
+        loader = ddd.AsyncBatchLoader(load_many)
+
+        results = await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_commands_load_their_users_at_once(self):
+        bootstrapper = DemoBootstrapper()
+        repository = bootstrapper.async_user_repository
+        user_ids = [str(i) for i in range(10)]
+        for user_id in user_ids:
+            repository.users_by_id[user_id] = User(email='old@mail.com', id_=user_id)
+        repository.enable_batch_loading()
+
+        commands = [SaveUserCommand(user_id, f'{user_id}@mail.com') for user_id in user_ids + ['missing']]
+
+        results = await asyncio.gather(
+            *(bootstrapper.async_handle_command(command) for command in commands), return_exceptions=True
+        )
+
+        assert results[:-1] == user_ids
+        assert results[-1].status_code == ddd.NOT_FOUND
+        assert repository.get_many_calls == [user_ids + ['missing']]
+        assert all(repository.users_by_id[user_id].email == f'{user_id}@mail.com' for user_id in user_ids)
+
+    @pytest.mark.asyncio
+    async def test_sqlite_get_many(self):
+        pool = SqliteConnectionPool()
+        repository = AsyncSqliteUserRepository(pool)
+        for user_id in ['1', '2']:
+            await repository.save(User(email='old@mail.com', id_=user_id))
+        await repository.commit()
+        repository.enable_batch_loading()
+
+        users = await asyncio.gather(repository.get_by_id('1'), repository.get_by_id('2'))
+
+        assert [user.get_id() for user in users] == ['1', '2']
+        assert list(await repository.get_many(['2', '3'])) == ['2']
+        pool.close()
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import threading
+import time
+
+import pytest
+
+import ddd
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+@dataclasses.dataclass
+class SlowEvent(ddd.AbstractEvent):
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+
+class SlowCommand(ddd.AbstractCommand):
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    def validate(self) -> None:
+        pass
+
+
+class SlowCommandHandler(ddd.AbstractAsyncCommandHandler[SlowCommand, None]):
+    async def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
+        return None
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return [SlowEvent()]
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+class SlowEventHandler(ddd.AbstractAsyncEventHandler[SlowEvent]):
+    running = 0
+    max_running = 0
+
+    def __init__(self, error: Exception | None = None):
+        super().__init__()
+        self._error = error
+        self.committed = False
+        self.rolled_back = False
+
+    async def handle(self, event: ddd.TEvent) -> None:
+        cls = type(self)
+        cls.running += 1
+        cls.max_running = max(cls.max_running, cls.running)
+        await asyncio.sleep(0.01)
+        cls.running -= 1
+        if self._error:
+            raise self._error
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return []
+
+    async def commit(self) -> None:
+        self.committed = True
+
+    async def rollback(self) -> None:
+        self.rolled_back = True
+
+
+@dataclasses.dataclass
+class RaisedEvent(ddd.AbstractEvent):
+    label: str = ''
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+
+class SyncSlowCommandHandler(ddd.AbstractCommandHandler[SlowCommand, None]):
+    def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
+        return None
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return [SlowEvent()]
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+class SyncSlowEventHandler(ddd.AbstractEventHandler[SlowEvent]):
+    def __init__(
+            self, label: str, delay: float, error: Exception | None = None, barrier: threading.Barrier | None = None
+    ):
+        super().__init__()
+        self._label = label
+        self._delay = delay
+        self._error = error
+        self._barrier = barrier
+        self.thread_name = ''
+        self.committed = False
+        self.rolled_back = False
+
+    def handle(self, event: ddd.TEvent) -> None:
+        self.thread_name = threading.current_thread().name
+        if self._barrier is not None:
+            # Passed only once all the handlers run at the same time
+            self._barrier.wait(timeout=5)
+        time.sleep(self._delay)
+        if self._error:
+            raise self._error
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return [RaisedEvent(self._label)]
+
+    def commit(self) -> None:
+        self.committed = True
+
+    def rollback(self) -> None:
+        self.rolled_back = True
+
+
+class RaisedEventHandler(ddd.AbstractEventHandler[RaisedEvent]):
+    def __init__(self, labels: list[str]):
+        super().__init__()
+        self._labels = labels
+
+    def handle(self, event: ddd.TEvent) -> None:
+        self._labels.append(event.label)
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return []
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+class TestMessageBus:
+    @pytest.fixture
+    def bootstrapper(self) -> ddd.Bootstrapper:
+        bootstrapper = ddd.Bootstrapper()
+        bootstrapper.register_command_handler_factory(SlowCommand().name, SyncSlowCommandHandler)
+        yield bootstrapper
+        bootstrapper.shutdown()
+
+    def test_concurrent_events_merge_raised_events_in_registration_order(self, bootstrapper):
+        bootstrapper.enable_concurrent_events(max_workers=3)
+        barrier = threading.Barrier(3)
+        handlers = [SyncSlowEventHandler(str(i), delay=0.03 - i * 0.01, barrier=barrier) for i in range(3)]
+        for handler in handlers:
+            bootstrapper.register_event_handler_factory(SlowEvent().name, lambda h=handler: h)
+        labels = []
+        bootstrapper.register_event_handler_factory(RaisedEvent().name, lambda: RaisedEventHandler(labels))
+
+        bootstrapper.handle_command(SlowCommand())
+
+        assert not barrier.broken
+        assert labels == ['0', '1', '2']
+        assert all(handler.committed for handler in handlers)
+        assert all(handler.thread_name.startswith('ddd-event-handlers') for handler in handlers)
+
+    def test_concurrent_events_aggregate_errors(self, bootstrapper):
+        bootstrapper.enable_concurrent_events()
+        first, second = Exception('first failed'), Exception('second failed')
+        handlers = [
+            SyncSlowEventHandler('0', 0.01, first), SyncSlowEventHandler('1', 0), SyncSlowEventHandler('2', 0, second)
+        ]
+        for handler in handlers:
+            bootstrapper.register_event_handler_factory(SlowEvent().name, lambda h=handler: h)
+
+        with pytest.raises(ddd.EventHandlersError) as e:
+            bootstrapper.handle_command(SlowCommand())
+
+        assert e.value.errors == [first, second]
+        assert [handler.rolled_back for handler in handlers] == [True, False, True]
+        assert [handler.committed for handler in handlers] == [False, True, False]
+
+    def test_shutdown_handles_the_events_sequentially(self, bootstrapper):
+        bootstrapper.enable_concurrent_events()
+        handler = SyncSlowEventHandler('0', 0)
+        bootstrapper.register_event_handler_factory(SlowEvent().name, lambda: handler)
+        bootstrapper.register_event_handler_factory(SlowEvent().name, lambda: SyncSlowEventHandler('1', 0))
+        bootstrapper.register_event_handler_factory(RaisedEvent().name, lambda: RaisedEventHandler([]))
+
+        bootstrapper.shutdown()
+        bootstrapper.handle_command(SlowCommand())
+
+        assert handler.thread_name == threading.current_thread().name
+
+    def test_concurrent_events_keep_demo_semantics(self):
+        with DemoBootstrapper() as bootstrapper:
+            bootstrapper.enable_concurrent_events()
+            bootstrapper.user_repository.users_by_id['1'] = User(email='old@mail.com', id_='1')
+
+            result = bootstrapper.handle_command(SaveUserCommand('1', 'new@mail.com'))
+
+        assert result == '1'
+        assert bootstrapper.pubsub_client.notify_email_set_new_email == 'new@mail.com'
+        assert bootstrapper.pubsub_client.kpi_event_sent
+
+
+class TestAsyncMessageBus:
+    USER_ID = 'agent_566'
+
+    @pytest.fixture(autouse=True)
+    def reset_counters(self):
+        SlowEventHandler.running = 0
+        SlowEventHandler.max_running = 0
+
+    @pytest.fixture
+    def bootstrapper(self) -> ddd.Bootstrapper:
+        bootstrapper = ddd.Bootstrapper()
+        bootstrapper.register_async_command_handler_factory(SlowCommand().name, SlowCommandHandler)
+        return bootstrapper
+
+    @pytest.mark.asyncio
+    async def test_concurrent_events_bounded_by_max_concurrency(self, bootstrapper):
+        bootstrapper.enable_concurrent_async_events(max_concurrency=2)
+        handlers = [SlowEventHandler() for _ in range(4)]
+        for handler in handlers:
+            bootstrapper.register_async_event_handler_factory(SlowEvent().name, lambda h=handler: h)
+
+        await bootstrapper.async_handle_command(SlowCommand())
+
+        assert SlowEventHandler.max_running == 2
+        assert all(handler.committed for handler in handlers)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_events_aggregates_errors_in_registration_order(self, bootstrapper):
+        bootstrapper.enable_concurrent_async_events()
+        first, second = Exception('first failed'), Exception('second failed')
+        handlers = [SlowEventHandler(first), SlowEventHandler(), SlowEventHandler(second)]
+        for handler in handlers:
+            bootstrapper.register_async_event_handler_factory(SlowEvent().name, lambda h=handler: h)
+
+        with pytest.raises(ddd.EventHandlersError) as e:
+            await bootstrapper.async_handle_command(SlowCommand())
+
+        assert e.value.errors == [first, second]
+        assert e.value.status_code == ddd.SERVER_ERROR
+        assert [handler.rolled_back for handler in handlers] == [True, False, True]
+        assert handlers[1].committed
+
+    @pytest.mark.asyncio
+    async def test_concurrent_cascade_levels_keep_demo_semantics(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.enable_concurrent_async_events(max_concurrency=4, concurrent_cascade_levels=True)
+        bootstrapper.async_user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+
+        result = await bootstrapper.async_handle_command(SaveUserCommand(self.USER_ID, 'new@mail.com'))
+
+        assert result == self.USER_ID
+        assert bootstrapper.async_pubsub_client.email_sent
+        assert bootstrapper.async_pubsub_client.kpi_event_sent
+
+
+class TestPullEvents:
+    USER_ID = '1'
+
+    def test_entity_hands_over_its_events_once(self):
+        user = User(email='old@mail.com', id_=self.USER_ID)
+        user.set_email('new@mail.com')
+
+        [event] = user.pull_events()
+
+        assert event.new_email == 'new@mail.com'
+        assert user.pull_events() == []
+
+    def test_reused_entity_raises_only_its_new_events(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        new_emails = []
+        notify_email_changed = bootstrapper.pubsub_client.notify_email_changed
+
+        def notify(user_id: str, new_email: str, old_email: str) -> None:
+            new_emails.append(new_email)
+            notify_email_changed(user_id, new_email, old_email)
+
+        bootstrapper.pubsub_client.notify_email_changed = notify
+
+        for email in ['first@mail.com', 'second@mail.com', 'second@mail.com']:
+            bootstrapper.handle_command(SaveUserCommand(self.USER_ID, email))
+
+        assert new_emails == ['first@mail.com', 'second@mail.com']
+
+    @pytest.mark.asyncio
+    async def test_async_reused_entity_raises_only_its_new_events(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.async_user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        kpi_events = []
+        notify_kpi_service = bootstrapper.async_pubsub_client.notify_kpi_service
+
+        async def notify(event: ddd.AbstractEvent) -> None:
+            kpi_events.append(event)
+            await notify_kpi_service(event)
+
+        bootstrapper.async_pubsub_client.notify_kpi_service = notify
+
+        for email in ['first@mail.com', 'second@mail.com']:
+            await bootstrapper.async_handle_command(SaveUserCommand(self.USER_ID, email))
+
+        assert len(kpi_events) == 2
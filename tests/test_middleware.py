@@ -0,0 +1,113 @@
+import pytest
+
+import ddd
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class RecordingMiddleware(ddd.Middleware):
+    def __init__(self, label: str, calls: list):
+        self._label = label
+        self._calls = calls
+
+    def __call__(self, stage, message, call_next):
+        self._calls.append((self._label, stage, message.name))
+        return call_next()
+
+
+class AsyncRecordingMiddleware(ddd.AsyncMiddleware):
+    def __init__(self, calls: list):
+        self._calls = calls
+
+    async def __call__(self, stage, message, call_next):
+        self._calls.append((stage, message.name))
+        return await call_next()
+
+
+class TestMiddleware:
+    USER_ID = 'agent_566'
+    NEW_EMAIL = 'eli.cohen@mossad.gov.il'
+
+    @pytest.fixture
+    def bootstrapper(self) -> DemoBootstrapper:
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        bootstrapper.async_user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        return bootstrapper
+
+    def test_no_middlewares_compile_to_none(self):
+        assert ddd.compile_middlewares([]) is None
+        assert ddd.compile_async_middlewares([]) is None
+
+    def test_middlewares_wrap_every_stage_in_order(self, bootstrapper):
+        calls = []
+        bootstrapper.add_middleware(RecordingMiddleware('outer', calls))
+        bootstrapper.add_middleware(RecordingMiddleware('inner', calls))
+
+        result = bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert result == self.USER_ID
+        assert [call for call in calls if call[0] == 'outer'] == [
+            ('outer', ddd.Stage.COMMAND, 'SaveUserCommand'),
+            ('outer', ddd.Stage.VALIDATE, 'SaveUserCommand'),
+            ('outer', ddd.Stage.CREATE_HANDLER, 'SaveUserCommand'),
+            ('outer', ddd.Stage.HANDLE, 'SaveUserCommand'),
+            ('outer', ddd.Stage.COMMIT, 'SaveUserCommand'),
+            ('outer', ddd.Stage.EVENT, 'EmailSetEvent'),
+            ('outer', ddd.Stage.CREATE_HANDLER, 'EmailSetEvent'),
+            ('outer', ddd.Stage.HANDLE, 'EmailSetEvent'),
+            ('outer', ddd.Stage.COMMIT, 'EmailSetEvent'),
+            ('outer', ddd.Stage.EVENT, 'KpiEvent'),
+            ('outer', ddd.Stage.CREATE_HANDLER, 'KpiEvent'),
+            ('outer', ddd.Stage.HANDLE, 'KpiEvent'),
+            ('outer', ddd.Stage.COMMIT, 'KpiEvent'),
+        ]
+        assert calls[:2] == [
+            ('outer', ddd.Stage.COMMAND, 'SaveUserCommand'), ('inner', ddd.Stage.COMMAND, 'SaveUserCommand')
+        ]
+
+    def test_timing_middleware_records_rollbacks(self, bootstrapper):
+        timing = ddd.TimingMiddleware()
+        bootstrapper.add_middleware(timing)
+
+        with pytest.raises(ddd.BoundedContextError):
+            bootstrapper.handle_command(SaveUserCommand('not-existing-user-id', self.NEW_EMAIL))
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        report = timing.report()
+        assert report['SaveUserCommand'][ddd.Stage.COMMAND]['count'] == 2
+        assert report['SaveUserCommand'][ddd.Stage.ROLLBACK]['count'] == 1
+        assert report['SaveUserCommand'][ddd.Stage.COMMIT]['count'] == 1
+        assert report['KpiEvent'][ddd.Stage.HANDLE]['count'] == 1
+
+    def test_latency_histogram(self):
+        histogram = ddd.LatencyHistogram()
+        for latency_ns in [100, 200, 300, 5000]:
+            histogram.record(latency_ns)
+
+        assert histogram.count == 4
+        assert histogram.min_ns == 100
+        assert histogram.max_ns == 5000
+        assert histogram.mean_ns == 1400
+        assert 100 <= histogram.percentile(50) < 512
+        assert histogram.percentile(100) == 5000
+
+    @pytest.mark.asyncio
+    async def test_async_middlewares(self, bootstrapper):
+        calls = []
+        timing = ddd.AsyncTimingMiddleware()
+        bootstrapper.add_async_middleware(AsyncRecordingMiddleware(calls))
+        bootstrapper.add_async_middleware(timing)
+
+        result = await bootstrapper.async_handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert result == self.USER_ID
+        assert calls[:5] == [
+            (ddd.Stage.COMMAND, 'SaveUserCommand'),
+            (ddd.Stage.VALIDATE, 'SaveUserCommand'),
+            (ddd.Stage.CREATE_HANDLER, 'SaveUserCommand'),
+            (ddd.Stage.HANDLE, 'SaveUserCommand'),
+            (ddd.Stage.COMMIT, 'SaveUserCommand'),
+        ]
+        assert timing.report()['EmailSetEvent'][ddd.Stage.EVENT]['count'] == 1
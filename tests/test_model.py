@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import dataclasses
+import pickle
+from typing import ClassVar
+
+import pytest
+
+import ddd
+from demo.domain.command_model.kpi_event import KpiEvent
+from demo.domain.command_model.save_user_command import SaveUserCommand
+
+
+class _Event(ddd.Event):
+    action: str | None = None
+
+
+class _DerivedEvent(_Event):
+    data: str | None = None
+
+
+class _NamedEvent(ddd.Event):
+    name = 'named'
+
+
+class _ValidatedCommand(ddd.Command):
+    email: str = ddd.field(required=True)
+    validated: ClassVar[list] = []
+
+    def validate(self) -> None:
+        super().validate()
+        __class__.validated.append(self)
+
+
+class TestMessages:
+    def test_messages_are_slotted_and_named_by_their_class(self):
+        command = SaveUserCommand('1', 'user@mail.com')
+
+        assert not hasattr(command, '__dict__')
+        assert command.name == 'SaveUserCommand'
+        assert KpiEvent('action', 'data').name == 'KpiEvent'
+        assert _NamedEvent().name == 'named'
+
+    def test_frozen_messages_cannot_be_changed(self):
+        command = SaveUserCommand('1', 'user@mail.com')
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            command.email = 'other@mail.com'
+
+    def test_subclasses_inherit_fields_and_frozen(self):
+        event = _DerivedEvent('action', 'data')
+        event.action = 'other'
+
+        assert not hasattr(event, '__dict__')
+        assert (event.action, event.data, event.name) == ('other', 'data', '_DerivedEvent')
+        assert event == _DerivedEvent('other', 'data')
+
+        class FrozenDerivedEvent(KpiEvent):
+            extra: int = 0
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            FrozenDerivedEvent('action', 'data', 1).extra = 2
+
+    def test_messages_can_be_pickled(self):
+        command = SaveUserCommand('1', 'user@mail.com')
+        event = _DerivedEvent('action', 'data')
+
+        assert pickle.loads(pickle.dumps(command)) == command
+        assert pickle.loads(pickle.dumps(event)) == event
+
+    def test_messages_can_call_super(self):
+        command = _ValidatedCommand('user@mail.com')
+        command.validate()
+
+        assert _ValidatedCommand.validated == [command]
+        assert _ValidatedCommand.__slots__ == ('email',)
+        with pytest.raises(ddd.ValidationError):
+            _ValidatedCommand().validate()
+
+    def test_message_classes_are_created_once(self):
+        subclasses = _Event.__subclasses__()
+
+        assert subclasses == [_DerivedEvent]
+        assert len(ddd.Event.__subclasses__()) == len(set(ddd.Event.__subclasses__()))
@@ -0,0 +1,237 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+import ddd
+from demo.adapters.repositories.sqlite_user_repository import SqliteConnectionPool, SqliteUserRepository, \
+    AsyncSqliteUserRepository
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class TestOutbox:
+    USER_ID = 'agent_566'
+    NEW_EMAIL = 'eli.cohen@mossad.gov.il'
+
+    @pytest.fixture
+    def pool(self, tmp_path) -> SqliteConnectionPool:
+        pool = SqliteConnectionPool(str(tmp_path / 'users.db'), size=2)
+        repository = SqliteUserRepository(pool)
+        repository.save(User(email='old@mail.com', id_=self.USER_ID))
+        repository.commit()
+        yield pool
+        pool.close()
+
+    @pytest.fixture
+    def outbox(self, pool) -> ddd.SqliteOutbox:
+        outbox = ddd.SqliteOutbox(pool.path, uri=pool.uri)
+        yield outbox
+        outbox.close()
+
+    @pytest.fixture
+    def bootstrapper(self, pool, outbox) -> DemoBootstrapper:
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.use_outbox(outbox)
+        bootstrapper.user_repository = SqliteUserRepository(pool, outbox)
+        bootstrapper.async_user_repository = AsyncSqliteUserRepository(pool, outbox)
+        return bootstrapper
+
+    def test_events_are_dispatched_after_the_command_returns(self, bootstrapper, pool, outbox):
+        result = bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert result == self.USER_ID
+        assert SqliteUserRepository(pool).get_by_id(self.USER_ID).email == self.NEW_EMAIL
+        assert not bootstrapper.pubsub_client.notify_email_set_called
+        [(offset, event)] = outbox.read(0, 10)
+        assert isinstance(event, EmailSetEvent)
+
+        dispatcher = ddd.OutboxDispatcher(outbox, bootstrapper.handle_events)
+
+        assert dispatcher.dispatch_pending() == 1
+        assert bootstrapper.pubsub_client.email_sent
+        assert bootstrapper.pubsub_client.kpi_event_sent
+        assert outbox.get_checkpoint() == offset
+        assert dispatcher.dispatch_pending() == 0
+
+    def test_events_are_appended_in_the_transaction_of_the_command(self, bootstrapper, pool, outbox, monkeypatch):
+        get_by_id = bootstrapper.user_repository.get_by_id
+
+        def get_by_id_and_change_concurrently(id_: str) -> User:
+            user = get_by_id(id_)
+            other = SqliteUserRepository(pool)
+            user_of_other = other.get_by_id(id_)
+            user_of_other.set_email('other@mail.com')
+            other.save(user_of_other)
+            other.commit()
+            return user
+
+        monkeypatch.setattr(bootstrapper.user_repository, 'get_by_id', get_by_id_and_change_concurrently)
+
+        with pytest.raises(ddd.ConflictError):
+            bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert outbox.read(0, 10) == []
+        assert SqliteUserRepository(pool).get_by_id(self.USER_ID).email == 'other@mail.com'
+
+    def test_handler_not_writing_to_the_outbox_fails(self, outbox):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.use_outbox(outbox)
+        bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+
+        with pytest.raises(ValueError):
+            bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert bootstrapper.user_repository.commit_count == 0
+        assert outbox.read(0, 10) == []
+
+    def test_repository_without_outbox_cannot_stage_events(self, pool):
+        with pytest.raises(ValueError):
+            SqliteUserRepository(pool).stage_events([EmailSetEvent(user_id=self.USER_ID)])
+
+    def test_failed_event_is_retried_and_replay(self, bootstrapper, outbox):
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+        dispatcher = ddd.OutboxDispatcher(outbox, bootstrapper.handle_events, batch_size=1)
+        bootstrapper.pubsub_client.notify_email_set_should_fail = True
+
+        assert dispatcher.dispatch_pending() == 0
+        assert outbox.get_checkpoint() == 0
+
+        bootstrapper.pubsub_client.notify_email_set_should_fail = False
+        assert dispatcher.dispatch_pending() == 1
+
+        dispatcher.replay()
+        assert dispatcher.dispatch_pending() == 1
+
+    def test_event_failing_max_attempts_is_dead_lettered(self, bootstrapper, outbox):
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, 'other@mail.com'))
+        dead_letters = []
+
+        def handle_events(events: list) -> None:
+            if events[0].new_email == self.NEW_EMAIL:
+                raise RuntimeError('Poison event')
+            bootstrapper.handle_events(events)
+
+        dispatcher = ddd.OutboxDispatcher(
+            outbox, handle_events, max_attempts=2, dead_letter=lambda offset, event: dead_letters.append(offset)
+        )
+
+        assert dispatcher.dispatch_pending() == 0
+        assert outbox.get_checkpoint() == 0
+        assert dispatcher.dispatch_pending() == 1
+        assert dead_letters == [1]
+        assert outbox.get_checkpoint() == 2
+        assert bootstrapper.pubsub_client.kpi_event_sent
+        with pytest.raises(ValueError):
+            ddd.OutboxDispatcher(outbox, handle_events, max_attempts=0)
+
+    def test_events_survive_a_restart(self, tmp_path):
+        path = str(tmp_path / 'outbox.db')
+        outbox = ddd.SqliteOutbox(path)
+        outbox.append([EmailSetEvent(user_id=self.USER_ID), EmailSetEvent(user_id='other')])
+        outbox.set_checkpoint(1)
+        outbox.close()
+
+        outbox = ddd.SqliteOutbox(path)
+
+        assert outbox.get_checkpoint() == 1
+        assert outbox.read(outbox.get_checkpoint(), 10) == [(2, EmailSetEvent(user_id='other'))]
+        outbox.close()
+
+    def test_background_dispatcher(self, bootstrapper, outbox):
+        dispatcher = ddd.OutboxDispatcher(outbox, bootstrapper.handle_events, poll_interval=0.01)
+        dispatcher.start()
+        try:
+            bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+            deadline = time.monotonic() + 5
+            while not bootstrapper.pubsub_client.kpi_event_sent and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            dispatcher.stop()
+
+        assert bootstrapper.pubsub_client.kpi_event_sent
+
+    @pytest.mark.asyncio
+    async def test_async_dispatcher(self, bootstrapper, outbox):
+        await bootstrapper.async_handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+        assert not bootstrapper.async_pubsub_client.notify_email_set_called
+
+        dispatcher = ddd.AsyncOutboxDispatcher(outbox, bootstrapper.async_handle_events)
+
+        assert await dispatcher.dispatch_pending() == 1
+        assert bootstrapper.async_pubsub_client.kpi_event_sent
+
+    def test_batch_appends_the_events_of_committed_commands(self, bootstrapper, outbox):
+        results = bootstrapper.handle_commands(
+            [SaveUserCommand(self.USER_ID, self.NEW_EMAIL), SaveUserCommand('not-existing-user-id', self.NEW_EMAIL)]
+        )
+
+        assert [result.ok for result in results] == [True, False]
+        assert len(outbox.read(0, 10)) == 1
+
+    @pytest.mark.asyncio
+    async def test_async_background_dispatcher(self, bootstrapper, outbox):
+        dispatcher = ddd.AsyncOutboxDispatcher(outbox, bootstrapper.async_handle_events, poll_interval=0.01)
+        dispatcher.start()
+        try:
+            await bootstrapper.async_handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+            deadline = time.monotonic() + 5
+            while not bootstrapper.async_pubsub_client.kpi_event_sent and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+        finally:
+            await dispatcher.stop()
+
+        assert bootstrapper.async_pubsub_client.kpi_event_sent
+
+    def test_background_dispatcher_survives_a_failing_read(self, bootstrapper, outbox, monkeypatch):
+        read = outbox.read
+        reads = []
+
+        def read_failing_once(after: int, limit: int) -> list:
+            reads.append(after)
+            if len(reads) == 1:
+                raise sqlite3.OperationalError('database is locked')
+            return read(after, limit)
+
+        monkeypatch.setattr(outbox, 'read', read_failing_once)
+        dispatcher = ddd.OutboxDispatcher(outbox, bootstrapper.handle_events, poll_interval=0.01)
+        dispatcher.start()
+        try:
+            bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+            deadline = time.monotonic() + 5
+            while not bootstrapper.pubsub_client.kpi_event_sent and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            dispatcher.stop()
+
+        assert bootstrapper.pubsub_client.kpi_event_sent
+        assert len(reads) > 1
+
+    @pytest.mark.asyncio
+    async def test_async_background_dispatcher_survives_a_failing_read(self, bootstrapper, outbox, monkeypatch):
+        read = outbox.read
+        reads = []
+
+        def read_failing_once(after: int, limit: int) -> list:
+            reads.append(after)
+            if len(reads) == 1:
+                raise sqlite3.OperationalError('database is locked')
+            return read(after, limit)
+
+        monkeypatch.setattr(outbox, 'read', read_failing_once)
+        dispatcher = ddd.AsyncOutboxDispatcher(outbox, bootstrapper.async_handle_events, poll_interval=0.01)
+        dispatcher.start()
+        try:
+            await bootstrapper.async_handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+            deadline = time.monotonic() + 5
+            while not bootstrapper.async_pubsub_client.kpi_event_sent and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+        finally:
+            await dispatcher.stop()
+
+        assert bootstrapper.async_pubsub_client.kpi_event_sent
+        assert len(reads) > 1
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+import ddd
+from demo.adapters.clients.pubsub_client import BufferedInMemoryPubSubClient, AsyncBufferedInMemoryPubSubClient, \
+    EMAIL_CHANGED_TOPIC, KPI_TOPIC
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class TestBufferedPublisher:
+    @pytest.fixture
+    def published(self) -> list:
+        return []
+
+    def test_committed_messages_are_sent_in_batches_bounded_by_count_and_bytes(self, published):
+        publisher = ddd.BufferedPublisher(lambda topic, batch: published.append((topic, batch)), 3, 10)
+        stage = publisher.stage()
+        for data in [b'1', b'2', b'3', b'4', b'56789', b'0123456789ab']:
+            stage.publish('a', data)
+        stage.publish('b', b'x')
+
+        assert not published
+
+        stage.commit()
+
+        assert published == [
+            ('a', [b'1', b'2', b'3']), ('a', [b'4', b'56789']), ('a', [b'0123456789ab']), ('b', [b'x'])
+        ]
+        metrics = publisher.metrics.to_dict()
+        assert (metrics['batches'], metrics['messages'], metrics['max_batch_messages']) == (4, 7, 3)
+        assert metrics['max_batch_bytes'] == 12 and metrics['latency']['count'] == 4
+
+    def test_rollback_discards_the_uncommitted_messages(self, published):
+        publisher = ddd.BufferedPublisher(lambda topic, batch: published.append((topic, batch)))
+        stage = publisher.stage()
+        stage.publish('a', b'1')
+        stage.rollback()
+        stage.publish('a', b'2')
+        stage.commit()
+
+        assert published == [('a', [b'2'])]
+
+    def test_units_of_work_stage_their_messages_apart(self, published):
+        publisher = ddd.BufferedPublisher(lambda topic, batch: published.append((topic, batch)))
+        first, second = publisher.stage(), publisher.stage()
+        first.publish('a', b'1')
+        second.publish('a', b'2')
+
+        second.rollback()
+        assert published == []
+
+        first.commit()
+        assert published == [('a', [b'1'])]
+
+    def test_partial_batches_linger(self, published):
+        publisher = ddd.BufferedPublisher(lambda topic, batch: published.append((topic, batch)), 2, max_linger=0.05)
+        stage = publisher.stage()
+        stage.publish('a', b'1')
+        stage.commit()
+        stage.publish('a', b'2')
+        stage.publish('a', b'3')
+        stage.commit()
+
+        assert published == [('a', [b'1', b'2'])]
+
+        deadline = time.monotonic() + 5
+        while len(published) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert published == [('a', [b'1', b'2']), ('a', [b'3'])]
+        publisher.close()
+
+    def test_failed_batches_are_kept(self, published):
+        def publish_batch(topic: str, batch: list[bytes]) -> None:
+            if fail:
+                raise Exception('publish failed')
+            published.append((topic, batch))
+
+        publisher = ddd.BufferedPublisher(publish_batch)
+        stage = publisher.stage()
+        stage.publish('a', b'1')
+        fail = True
+        with pytest.raises(Exception):
+            stage.commit()
+
+        fail = False
+        publisher.flush()
+
+        assert published == [('a', [b'1'])]
+
+    def test_lingering_notifications_of_several_commands_are_published_at_once(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.pubsub_client = BufferedInMemoryPubSubClient(max_linger=60)
+        user_ids = ['1', '2', '3']
+        for user_id in user_ids:
+            bootstrapper.user_repository.users_by_id[user_id] = User(email='old@mail.com', id_=user_id)
+
+        bootstrapper.handle_commands([SaveUserCommand(user_id, 'eli.cohen@mossad.gov.il') for user_id in user_ids])
+        bootstrapper.pubsub_client.publisher.close()
+
+        published = bootstrapper.pubsub_client.published_batches
+        assert [(topic, len(batch)) for topic, batch in published] == [(EMAIL_CHANGED_TOPIC, 3), (KPI_TOPIC, 3)]
+        assert [json.loads(data)['user_id'] for data in published[0][1]] == user_ids
+
+    @pytest.mark.asyncio
+    async def test_async_publisher(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.async_pubsub_client = AsyncBufferedInMemoryPubSubClient(max_linger=0.01)
+        bootstrapper.async_user_repository.users_by_id['1'] = User(email='old@mail.com', id_='1')
+
+        await bootstrapper.async_handle_command(SaveUserCommand('1', 'eli.cohen@mossad.gov.il'))
+        await bootstrapper.async_pubsub_client.publisher.close()
+
+        published = bootstrapper.async_pubsub_client.published_batches
+        assert sorted(topic for topic, _ in published) == [EMAIL_CHANGED_TOPIC, KPI_TOPIC]
+        assert bootstrapper.async_pubsub_client.publisher.metrics.messages == 2
@@ -0,0 +1,69 @@
+import pytest
+
+import ddd
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class TestRetryPolicy:
+    def test_retries_up_to_attempts(self):
+        calls = []
+
+        def conflict() -> None:
+            calls.append(1)
+            raise ddd.ConflictError('conflict')
+
+        with pytest.raises(ddd.ConflictError):
+            ddd.RetryPolicy(attempts=3, backoff=0).call(conflict)
+
+        assert len(calls) == 3
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+
+        def fail() -> None:
+            calls.append(1)
+            raise ddd.BoundedContextError(ddd.NOT_FOUND, 'not found')
+
+        with pytest.raises(ddd.BoundedContextError):
+            ddd.RetryPolicy().call(fail)
+
+        assert len(calls) == 1
+
+    def test_delays_are_jittered_and_capped(self):
+        policy = ddd.RetryPolicy(backoff=0.1, max_backoff=0.3)
+
+        assert all(0 <= policy.delay(attempt) <= 0.1 * 2 ** attempt for attempt in range(2))
+        assert all(policy.delay(10) <= 0.3 for _ in range(100))
+        with pytest.raises(ValueError):
+            ddd.RetryPolicy(attempts=0)
+
+    @pytest.mark.asyncio
+    async def test_conflicting_async_command_is_retried(self, monkeypatch):
+        bootstrapper = DemoBootstrapper()
+        repository = bootstrapper.async_user_repository
+        repository.users_by_id['1'] = User(email='old@mail.com', id_='1')
+        get_by_id = repository._get_by_id
+        loads = []
+
+        async def get_by_id_and_replace_concurrently(id_: str) -> User:
+            user = await get_by_id(id_)
+            loads.append(id_)
+            if len(loads) == 1:
+                repository.users_by_id[id_] = User(email='other@mail.com', id_=id_, version=1)
+            return user
+
+        monkeypatch.setattr(repository, '_get_by_id', get_by_id_and_replace_concurrently)
+
+        with pytest.raises(ddd.ConflictError):
+            await bootstrapper.async_handle_command(SaveUserCommand('1', 'new@mail.com'))
+
+        repository.users_by_id['1'] = User(email='old@mail.com', id_='1')
+        loads.clear()
+        bootstrapper.set_retry_policy(ddd.RetryPolicy(backoff=0))
+
+        assert await bootstrapper.async_handle_command(SaveUserCommand('1', 'new@mail.com')) == '1'
+        assert loads == ['1', '1']
+        assert repository.users_by_id['1'].email == 'new@mail.com'
+        assert repository.users_by_id['1'].get_version() == 2
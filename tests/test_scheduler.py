@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+
+import pytest
+
+import ddd
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+@dataclasses.dataclass
+class SleepCommand(ddd.AbstractCommand):
+    key: str = ''
+    sequence: int = 0
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    def validate(self) -> None:
+        if self.sequence < 0:
+            raise ddd.BoundedContextError(ddd.BAD_REQUEST, 'Negative sequence')
+
+
+class SleepCommandHandler(ddd.AbstractAsyncCommandHandler[SleepCommand, int]):
+    def __init__(self, log: list[tuple[str, str, int]]):
+        super().__init__()
+        self._log = log
+
+    async def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
+        self._log.append(('start', command.key, command.sequence))
+        await asyncio.sleep(0.01)
+        self._log.append(('end', command.key, command.sequence))
+        return command.sequence
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return []
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+class TestAsyncKeyedScheduler:
+    @pytest.fixture
+    def log(self) -> list[tuple[str, str, int]]:
+        return []
+
+    @pytest.fixture
+    def bootstrapper(self, log) -> ddd.Bootstrapper:
+        bootstrapper = ddd.Bootstrapper()
+        bootstrapper.register_async_command_handler_factory(SleepCommand, lambda: SleepCommandHandler(log))
+        return bootstrapper
+
+    @pytest.mark.asyncio
+    async def test_commands_of_a_key_run_in_order_and_keys_in_parallel(self, bootstrapper, log):
+        scheduler = ddd.AsyncKeyedScheduler(bootstrapper, lambda command: command.key)
+
+        commands = [SleepCommand(key, i) for i in range(3) for key in 'ab']
+
+        results = await asyncio.gather(*(scheduler.handle_command(command) for command in commands))
+
+        assert results == [0, 0, 1, 1, 2, 2]
+        for key in 'ab':
+            assert [entry for entry in log if entry[1] == key] == [
+                (stage, key, i) for i in range(3) for stage in ['start', 'end']
+            ]
+        assert log[:2] == [('start', 'a', 0), ('start', 'b', 0)]
+        assert scheduler.pending_keys == 0
+
+    @pytest.mark.asyncio
+    async def test_max_concurrency(self, bootstrapper, log):
+        scheduler = ddd.AsyncKeyedScheduler(bootstrapper, lambda command: command.key, max_concurrency=1)
+
+        await asyncio.gather(*(scheduler.handle_command(SleepCommand(key)) for key in 'abc'))
+
+        assert [stage for stage, _, _ in log] == ['start', 'end'] * 3
+
+    @pytest.mark.asyncio
+    async def test_errors_do_not_stop_the_queue_of_the_key(self, bootstrapper, log):
+        scheduler = ddd.AsyncKeyedScheduler(bootstrapper, lambda command: command.key)
+        failing = scheduler.submit(SleepCommand('a', -1))
+        succeeding = scheduler.submit(SleepCommand('a', 1))
+
+        with pytest.raises(ddd.BoundedContextError):
+            await failing
+        assert await succeeding == 1
+
+        await scheduler.join()
+        assert scheduler.pending_keys == 0
+
+    @pytest.mark.asyncio
+    async def test_commands_left_by_a_cancelled_drain_are_cancelled(self, bootstrapper, log):
+        scheduler = ddd.AsyncKeyedScheduler(bootstrapper, lambda command: command.key)
+        futures = [scheduler.submit(SleepCommand('a', i)) for i in range(3)]
+        await asyncio.sleep(0)
+
+        for task in scheduler._tasks:
+            task.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), 1)
+
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
+        assert log == [('start', 'a', 0)]
+        assert scheduler.pending_keys == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_commands_of_the_same_user(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.async_user_repository.users_by_id['1'] = User(email='old@mail.com', id_='1')
+        scheduler = ddd.AsyncKeyedScheduler(bootstrapper, lambda command: command.user_id)
+
+        await asyncio.gather(*(scheduler.handle_command(SaveUserCommand('1', f'{i}@mail.com')) for i in range(5)))
+
+        assert bootstrapper.async_user_repository.users_by_id['1'].email == '4@mail.com'
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+
+import pytest
+
+import ddd
+
+# The sequence numbers handled by the current worker process, by key
+_handled: dict[str, list[int]] = {}
+
+
+@dataclasses.dataclass
+class RecordCommand(ddd.AbstractCommand):
+    key: str = ''
+    sequence: int = 0
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    def validate(self) -> None:
+        if self.sequence < 0:
+            raise ddd.BoundedContextError(ddd.BAD_REQUEST, 'Negative sequence')
+
+
+class RecordCommandHandler(ddd.AbstractCommandHandler[RecordCommand, tuple]):
+    def handle(self, command: ddd.TCommand) -> ddd.THandleCommandResult:
+        _handled.setdefault(command.key, []).append(command.sequence)
+        return os.getpid(), list(_handled[command.key])
+
+    @property
+    def events(self) -> list[ddd.AbstractEvent]:
+        return []
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+
+def create_bootstrapper() -> ddd.Bootstrapper:
+    bootstrapper = ddd.Bootstrapper()
+    bootstrapper.register_command_handler_factory(RecordCommand, RecordCommandHandler)
+    return bootstrapper
+
+
+def get_key(command: RecordCommand) -> str:
+    return command.key
+
+
+class TestShardedBootstrapper:
+    @pytest.fixture
+    def sharded_bootstrapper(self) -> ddd.ShardedBootstrapper:
+        with ddd.ShardedBootstrapper(create_bootstrapper, get_key, shards=2) as sharded_bootstrapper:
+            yield sharded_bootstrapper
+
+    def test_commands_of_a_key_are_handled_in_order_by_its_shard(self, sharded_bootstrapper):
+        keys = ['a', 'b', 'c', 'd']
+        futures = {key: [sharded_bootstrapper.submit(RecordCommand(key, i)) for i in range(20)] for key in keys}
+
+        for key in keys:
+            results = [future.result() for future in futures[key]]
+            assert len({pid for pid, _ in results}) == 1
+            assert results[-1][1] == list(range(20))
+
+    def test_errors_are_returned_by_the_future(self, sharded_bootstrapper):
+        with pytest.raises(ddd.BoundedContextError) as e:
+            sharded_bootstrapper.handle_command(RecordCommand('a', -1))
+
+        assert e.value.status_code == ddd.BAD_REQUEST
+
+    @pytest.mark.asyncio
+    async def test_async_handle_command(self, sharded_bootstrapper):
+        pid, sequences = await sharded_bootstrapper.async_handle_command(RecordCommand('a', 7))
+
+        assert pid != os.getpid()
+        assert sequences == [7]
+
+    def test_shards_must_be_positive(self):
+        with pytest.raises(ValueError):
+            ddd.ShardedBootstrapper(create_bootstrapper, get_key, shards=0)
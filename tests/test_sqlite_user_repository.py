@@ -0,0 +1,148 @@
+import pytest
+
+import ddd
+from demo.adapters.repositories.sqlite_user_repository import SqliteConnectionPool, SqliteUserRepository, \
+    AsyncSqliteUserRepository
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class TestSqliteUserRepository:
+    OLD_EMAIL = 'kamel.amin@thaabet.sy'
+    NEW_EMAIL = 'eli.cohen@mossad.gov.il'
+
+    @pytest.fixture(params=['memory', 'file'])
+    def pool(self, request, tmp_path) -> SqliteConnectionPool:
+        pool = SqliteConnectionPool(':memory:' if request.param == 'memory' else str(tmp_path / 'users.db'), size=2)
+        repository = SqliteUserRepository(pool)
+        for id_ in ['1', '2']:
+            repository.save(User(email=self.OLD_EMAIL, id_=id_))
+        repository.commit()
+        yield pool
+        pool.close()
+
+    def _changed_user(self, repository: SqliteUserRepository, id_: str, email: str) -> User:
+        user = repository.get_by_id(id_)
+        user.set_email(email)
+        return user
+
+    def test_staged_users_are_upserted_on_commit(self, pool):
+        repository = SqliteUserRepository(pool)
+        repository.save(self._changed_user(repository, '1', self.NEW_EMAIL))
+        repository.save(User(email=self.NEW_EMAIL, id_='3'))
+
+        assert repository.get_by_id('1').email == self.OLD_EMAIL
+
+        repository.commit()
+
+        assert repository.get_by_id('1').email == self.NEW_EMAIL
+        assert repository.get_by_id('3').email == self.NEW_EMAIL
+        assert repository.get_by_id('1').get_version() == 2
+
+    def test_rollback_and_savepoints(self, pool):
+        repository = SqliteUserRepository(pool)
+        repository.save(self._changed_user(repository, '1', self.NEW_EMAIL))
+        savepoint = repository.savepoint()
+        repository.save(self._changed_user(repository, '2', self.NEW_EMAIL))
+        repository.rollback_to_savepoint(savepoint)
+        repository.commit()
+
+        assert [repository.get_by_id(id_).email for id_ in ['1', '2']] == [self.NEW_EMAIL, self.OLD_EMAIL]
+
+        repository.save(self._changed_user(repository, '1', 'other@mail.com'))
+        repository.rollback()
+        repository.commit()
+
+        assert repository.get_by_id('1').email == self.NEW_EMAIL
+
+    def test_concurrent_changes_conflict(self, pool):
+        repository = SqliteUserRepository(pool)
+        user = self._changed_user(repository, '1', self.NEW_EMAIL)
+        other = SqliteUserRepository(pool)
+        other.save(self._changed_user(other, '1', 'other@mail.com'))
+        other.commit()
+        repository.save(self._changed_user(repository, '2', self.NEW_EMAIL))
+        repository.save(user)
+
+        with pytest.raises(ddd.ConflictError) as e:
+            repository.commit()
+
+        assert e.value.status_code == ddd.CONFLICT
+        assert [repository.get_by_id(id_).email for id_ in ['1', '2']] == ['other@mail.com', self.OLD_EMAIL]
+
+    def test_users_loaded_twice_conflict_within_a_commit(self, pool):
+        repository = SqliteUserRepository(pool)
+        user = self._changed_user(repository, '1', self.NEW_EMAIL)
+        repository.save(user)
+        repository.save(user)
+        repository.commit()
+
+        assert repository.get_by_id('1').get_version() == user.get_version() == 2
+
+        repository.save(self._changed_user(repository, '1', 'first@mail.com'))
+        repository.save(self._changed_user(repository, '1', 'second@mail.com'))
+
+        with pytest.raises(ddd.ConflictError):
+            repository.commit()
+
+        assert repository.get_by_id('1').email == self.NEW_EMAIL
+
+    def test_conflicting_commands_are_retried(self, pool, monkeypatch):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository = SqliteUserRepository(pool)
+        bootstrapper.set_retry_policy(ddd.RetryPolicy(attempts=2, backoff=0))
+        get_by_id = bootstrapper.user_repository.get_by_id
+        loads = []
+
+        def get_by_id_and_change_concurrently(id_: str) -> User:
+            user = get_by_id(id_)
+            loads.append(id_)
+            if len(loads) == 1:
+                other = SqliteUserRepository(pool)
+                other.save(self._changed_user(other, id_, 'other@mail.com'))
+                other.commit()
+            return user
+
+        monkeypatch.setattr(bootstrapper.user_repository, 'get_by_id', get_by_id_and_change_concurrently)
+
+        assert bootstrapper.handle_command(SaveUserCommand('1', self.NEW_EMAIL)) == '1'
+        assert loads == ['1', '1']
+        assert SqliteUserRepository(pool).get_by_id('1').email == self.NEW_EMAIL
+        assert bootstrapper.pubsub_client.kpi_event_sent
+
+    def test_get_many_beyond_the_host_parameters_limit(self, pool):
+        repository = SqliteUserRepository(pool)
+        ids = [str(i) for i in range(1200)]
+        for id_ in ids[3:]:
+            repository.save(User(email=self.NEW_EMAIL, id_=id_))
+        repository.commit()
+
+        users = repository.get_many(ids + ['missing'])
+
+        assert sorted(users) == sorted(set(ids) - {'0'})
+        assert users['1'].email == self.OLD_EMAIL and users['1199'].email == self.NEW_EMAIL
+
+    def test_missing_user(self, pool):
+        with pytest.raises(ddd.BoundedContextError) as e:
+            SqliteUserRepository(pool).get_by_id('missing')
+
+        assert e.value.status_code == ddd.NOT_FOUND
+
+    def test_handle_commands(self, pool):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository = SqliteUserRepository(pool)
+
+        results = bootstrapper.handle_commands([SaveUserCommand('1', self.NEW_EMAIL), SaveUserCommand('3', 'x@y.z')])
+
+        assert [result.ok for result in results] == [True, False]
+        assert bootstrapper.pubsub_client.kpi_event_sent
+        assert SqliteUserRepository(pool).get_by_id('1').email == self.NEW_EMAIL
+
+    @pytest.mark.asyncio
+    async def test_async_handle_command(self, pool):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.async_user_repository = AsyncSqliteUserRepository(pool)
+
+        assert await bootstrapper.async_handle_command(SaveUserCommand('2', self.NEW_EMAIL)) == '2'
+        assert (await AsyncSqliteUserRepository(pool).get_by_id('2')).email == self.NEW_EMAIL
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+import ddd
+from demo.domain.command_model.email_set_event import EmailSetEvent
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class TestTracer:
+    USER_ID = 'agent_566'
+    NEW_EMAIL = 'eli.cohen@mossad.gov.il'
+
+    @pytest.fixture
+    def bootstrapper(self) -> DemoBootstrapper:
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        bootstrapper.async_user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+        return bootstrapper
+
+    def test_spans_form_the_cascade_tree(self, bootstrapper):
+        tracer = ddd.Tracer()
+        bootstrapper.set_tracer(tracer)
+
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        command_span, email_set_span, kpi_span = tracer.spans()
+        assert command_span['name'] == 'SaveUserCommand'
+        assert command_span['parent_id'] is None
+        assert email_set_span['name'] == 'EmailSetEvent'
+        assert email_set_span['parent_id'] == command_span['span_id']
+        assert kpi_span['name'] == 'KpiEvent'
+        assert kpi_span['parent_id'] == email_set_span['span_id']
+        assert {span['trace_id'] for span in tracer.spans()} == {1}
+        assert all(span['outcome'] == 'ok' and span['end_ns'] >= span['start_ns'] for span in tracer.spans())
+
+    def test_parents_are_not_inherited_by_events_reusing_the_ids_of_raised_events(self):
+        trace = ddd.Tracer().start_trace()
+        span = trace.start_span(SaveUserCommand(self.USER_ID, self.NEW_EMAIL), object(), None)
+        trace.handled(span, [EmailSetEvent(self.USER_ID, self.NEW_EMAIL)])
+
+        events = [EmailSetEvent(self.USER_ID, self.NEW_EMAIL) for _ in range(100)]
+
+        assert all(trace.parent_of(event) is None for event in events)
+
+    def test_failed_span(self, bootstrapper):
+        tracer = ddd.Tracer()
+        bootstrapper.set_tracer(tracer)
+
+        with pytest.raises(ddd.BoundedContextError):
+            bootstrapper.handle_command(SaveUserCommand('not-existing-user-id', self.NEW_EMAIL))
+
+        [span] = tracer.spans()
+        assert span['outcome'] == 'error'
+        assert 'does not exist' in span['error']
+
+    def test_ring_buffer_keeps_the_latest_spans(self, bootstrapper):
+        tracer = ddd.Tracer(capacity=4)
+        bootstrapper.set_tracer(tracer)
+
+        for _ in range(2):
+            bootstrapper.user_repository.users_by_id[self.USER_ID] = User(email='old@mail.com', id_=self.USER_ID)
+            bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert [span['span_id'] for span in tracer.spans()] == [3, 4, 5, 6]
+
+    def test_sampling(self, bootstrapper):
+        tracer = ddd.Tracer(sample_rate=0)
+        bootstrapper.set_tracer(tracer)
+
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        assert tracer.spans() == []
+        with pytest.raises(ValueError):
+            ddd.Tracer(sample_rate=2)
+
+    def test_export_chrome_trace(self, bootstrapper, tmp_path):
+        tracer = ddd.Tracer()
+        bootstrapper.set_tracer(tracer)
+        bootstrapper.handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+        path = tmp_path / 'trace.json'
+
+        tracer.export_chrome_trace(str(path))
+
+        trace_events = json.loads(path.read_text())['traceEvents']
+        assert [event['name'] for event in trace_events] == ['SaveUserCommand', 'EmailSetEvent', 'KpiEvent']
+        assert all(event['ph'] == 'X' for event in trace_events)
+
+    @pytest.mark.asyncio
+    async def test_async_concurrent_spans(self, bootstrapper):
+        tracer = ddd.Tracer()
+        bootstrapper.set_tracer(tracer)
+        bootstrapper.enable_concurrent_async_events()
+
+        await bootstrapper.async_handle_command(SaveUserCommand(self.USER_ID, self.NEW_EMAIL))
+
+        command_span, email_set_span, kpi_span = tracer.spans()
+        assert email_set_span['parent_id'] == command_span['span_id']
+        assert kpi_span['parent_id'] == email_set_span['span_id']
+
+    def test_batched_commands_are_traced_separately(self, bootstrapper):
+        tracer = ddd.Tracer()
+        bootstrapper.set_tracer(tracer)
+
+        bootstrapper.handle_commands([SaveUserCommand(self.USER_ID, self.NEW_EMAIL)])
+
+        spans = tracer.spans()
+        assert [span['name'] for span in spans] == ['SaveUserCommand', 'EmailSetEvent', 'KpiEvent']
+        assert spans[1]['parent_id'] == spans[0]['span_id']
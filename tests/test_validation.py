@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+
+import ddd
+from demo.domain.command_model.save_user_command import SaveUserCommand
+from demo.domain.command_model.user import User
+from demo.domain.model import ChangeEmailCommand
+from demo.entrypoints.bootstrapper import DemoBootstrapper
+
+
+class _TransferCommand(ddd.Command):
+    account: str | None = ddd.field(required=True, min_length=2, max_length=4)
+    amount: int | None = ddd.field(min_value=1, max_value=100)
+    currency: str | None = ddd.field(default='USD', check=lambda value: value.isupper(), message='Lowercase currency')
+    tags: list[str] = ddd.field(default_factory=list)
+
+
+class TestValidation:
+    def test_all_violations_are_reported_at_once(self):
+        with pytest.raises(ddd.ValidationError) as e:
+            _TransferCommand('a', 101, 'usd').validate()
+
+        assert e.value.status_code == ddd.BAD_REQUEST
+        assert e.value.violations == [
+            'Invalid account: shorter than 2', 'Invalid amount: greater than 100', 'Lowercase currency'
+        ]
+
+    @pytest.mark.parametrize('command, violations', [
+        (_TransferCommand('ab'), []),
+        (_TransferCommand('abcd', 1, tags=['a']), []),
+        (_TransferCommand(''), ['Missing account']),
+        (_TransferCommand('abcde', 0), ['Invalid account: longer than 4', 'Invalid amount: less than 1']),
+        (_TransferCommand(12, '1'), ['Invalid account: of type int', 'Invalid amount: of type str']),
+        (SaveUserCommand('1', 'user.mail.com'), [r'Invalid email: does not match [^@\s]+@[^@\s]+']),
+    ])
+    def test_violations(self, command, violations):
+        assert ddd.get_violations(command) == violations
+
+    def test_batch_validation(self):
+        commands = [
+            _TransferCommand('ab'),
+            SaveUserCommand(),
+            _TransferCommand(''),
+            ChangeEmailCommand('1'),
+            SaveUserCommand('1', 'user@mail.com'),
+        ]
+
+        errors = ddd.validate_batch(commands)
+
+        assert [error and str(error) for error in errors] == [
+            None, 'Missing user_id; Missing email', 'Missing account', 'Missing new_email', None
+        ]
+
+    def test_handle_commands_validates_the_batch(self):
+        bootstrapper = DemoBootstrapper()
+        bootstrapper.user_repository.users_by_id['1'] = User(email='old@mail.com', id_='1')
+
+        results = bootstrapper.handle_commands([SaveUserCommand('1', 'new@mail.com'), SaveUserCommand('1')])
+
+        assert [result.ok for result in results] == [True, False]
+        assert isinstance(results[1].error, ddd.ValidationError)